@@ -0,0 +1,58 @@
+import azure.functions as func
+import logging
+import time
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.storage_backend import get_storage_client, storage_configured
+from shared.candidate_pools import rebuild_candidate_pools
+
+# Every location's pool is rebuilt at least this often so pools age out stale content
+SWEEP_INTERVAL_SECONDS = float(os.environ.get('CANDIDATE_POOL_SWEEP_SECONDS', '3600'))
+
+# When this worker last rebuilt every location's pool
+_last_sweep = None
+
+def main(mytimer: func.TimerRequest) -> None:
+    """
+    Candidate Pool Builder Function
+    Timer-triggered function (every 5 minutes) that rebuilds the pools that crawls and approvals marked
+    stale, and hourly rebuilds every crawled location's pool even when nothing new was crawled
+    """
+    global _last_sweep
+
+    utc_timestamp = datetime.now(timezone.utc).isoformat()
+    logging.info(f'Candidate pool builder ran at {utc_timestamp}')
+
+    if not storage_configured():
+        logging.info("Storage is not configured; skipping candidate pool rebuild")
+        return
+
+    try:
+        storage_client = get_storage_client()
+        stale = storage_client.get_stale_candidate_pools()
+        locations = set(stale)
+
+        sweep = _last_sweep is None or time.monotonic() - _last_sweep >= SWEEP_INTERVAL_SECONDS
+        if sweep:
+            locations.update(target.get('location') for target in storage_client.iter_crawling_targets())
+
+        outcomes = rebuild_candidate_pools(locations)
+
+        # A marker set again while its pool was rebuilding no longer matches, so it stays for the next run
+        for location, marker in stale.items():
+            if outcomes.get(location):
+                storage_client.clear_stale_candidate_pool(location, marker)
+
+        if sweep:
+            _last_sweep = time.monotonic()
+
+        rebuilt = sum(outcomes.values())
+        logging.info(f"Rebuilt {rebuilt}/{len(outcomes)} candidate pools ({len(stale)} marked stale)")
+
+    except Exception as e:
+        logging.error(f"Candidate pool builder error: {str(e)}")
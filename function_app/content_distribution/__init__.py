@@ -1,22 +1,36 @@
 import azure.functions as func
 import json
 import logging
+import re
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import sys
 import os
 
 # Add the function_app directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.storage_client import ContentStorageClient
-from shared.vector_client import VectorSearchClient
+from shared.storage_backend import StorageBackend, get_storage_client
+from shared.vector_client import VectorSearchClient, create_vector_client
+from shared.geo_index import get_geo_index
+from shared.viral_spread import SPREAD_THRESHOLDS, next_level as next_spread_level
+from shared.engagement_aggregator import get_engagement_aggregator
+
+# Upper bound on concurrent index and queue writes during fan-out
+DISTRIBUTION_CONCURRENCY = int(os.environ.get('DISTRIBUTION_CONCURRENCY', 16))
+
+# Shared write pool, created on first use
+_executor = None
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Geographic Content Distribution Function
     POST /api/content_distribution
-    Accepts: {"content_id": "...", "current_location": "Local", "engagement_stats": {...}}
+    Accepts: {"content_id": "...", "current_location": "Local", "origin_location": "Vancouver, BC",
+              "engagement_stats": {...}}
+    engagement_stats is optional; by default the aggregated engagement for the level is used
     Implements viral content algorithm based on engagement thresholds
     """
 
@@ -34,7 +48,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         # Validate required fields
         content_id = req_body.get('content_id')
         current_location = req_body.get('current_location')
-        engagement_stats = req_body.get('engagement_stats', {})
+        origin_location = req_body.get('origin_location') or current_location
+        engagement_stats = req_body.get('engagement_stats')
 
         if not content_id or not current_location:
             return func.HttpResponse(
@@ -43,9 +58,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
 
+        # Without caller-supplied stats, read the aggregated engagement for this level
+        if not engagement_stats:
+            engagement_stats = calculate_engagement_metrics(content_id, current_location)
+
         # Initialize clients
-        storage_client = ContentStorageClient()
-        vector_client = VectorSearchClient()
+        storage_client = get_storage_client()
+        vector_client = create_vector_client()
 
         # Determine if content should spread based on engagement
         should_spread, next_level = should_content_spread(current_location, engagement_stats)
@@ -53,6 +72,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         distribution_result = {
             "content_id": content_id,
             "current_location": current_location,
+            "origin_location": origin_location,
             "engagement_stats": engagement_stats,
             "should_spread": should_spread,
             "next_level": next_level,
@@ -61,18 +81,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         }
 
         if should_spread and next_level:
-            # Get neighboring locations for the next level
-            neighboring_locations = get_neighboring_locations(current_location, next_level)
+            # Get neighboring locations for the next level around the content's home city
+            neighboring_locations = get_neighboring_locations(origin_location, next_level)
 
-            # Distribute content to neighboring locations
-            for location in neighboring_locations:
-                success = distribute_to_location(content_id, location, storage_client, vector_client)
-
-                distribution_result["distribution_actions"].append({
-                    "target_location": location,
-                    "success": success,
-                    "action": "content_distributed"
-                })
+            # Distribute content to neighboring locations with one batched index upload
+            distribution_result["distribution_actions"] = distribute_to_locations(
+                content_id, neighboring_locations, storage_client, vector_client
+            )
 
         return func.HttpResponse(
             json.dumps(distribution_result),
@@ -100,16 +115,7 @@ def should_content_spread(current_location: str, engagement_stats: Dict[str, Any
     - Federal: 5% user selection
     """
 
-    # Define location hierarchy and thresholds
-    location_hierarchy = {
-        "Local": {"threshold": 0.25, "next": "Local+"},
-        "Local+": {"threshold": 0.20, "next": "Regional"},
-        "Regional": {"threshold": 0.15, "next": "Provincial"},
-        "Provincial": {"threshold": 0.10, "next": "Federal"},
-        "Federal": {"threshold": 0.05, "next": None}
-    }
-
-    if current_location not in location_hierarchy:
+    if current_location not in SPREAD_THRESHOLDS:
         logging.warning(f"Unknown location level: {current_location}")
         return False, None
 
@@ -121,122 +127,166 @@ def should_content_spread(current_location: str, engagement_stats: Dict[str, Any
         return False, None
 
     engagement_rate = engaged_users / total_users
-    required_threshold = location_hierarchy[current_location]["threshold"]
+    required_threshold = SPREAD_THRESHOLDS[current_location]
 
     logging.info(f"Content engagement: {engagement_rate:.2%} (required: {required_threshold:.2%})")
 
     if engagement_rate >= required_threshold:
-        next_level = location_hierarchy[current_location]["next"]
-        return True, next_level
+        return True, next_spread_level(current_location)
 
     return False, None
 
 def get_neighboring_locations(current_location: str, target_level: str) -> List[str]:
     """
     Get neighboring locations for content distribution
-    In a full implementation, this would use a geographic database
+    Rings come from the gazetteer-backed geographic index and are memoized per city
     """
-
-    # Simplified neighboring location mapping
-    # In production, this would be a proper geographic hierarchy database
-    location_mapping = {
-        "Vancouver": {
-            "Local+": ["Burnaby", "Richmond", "North Vancouver", "West Vancouver"],
-            "Regional": ["Surrey", "Langley", "Coquitlam", "New Westminster"],
-            "Provincial": ["Victoria", "Kelowna", "Prince George"],
-            "Federal": ["Seattle", "Portland", "Calgary"]
-        },
-        "Toronto": {
-            "Local+": ["Mississauga", "Brampton", "Markham", "Vaughan"],
-            "Regional": ["Hamilton", "London", "Kitchener", "Oshawa"],
-            "Provincial": ["Ottawa", "Thunder Bay", "Sudbury"],
-            "Federal": ["Montreal", "Detroit", "Buffalo"]
-        },
-        "Montreal": {
-            "Local+": ["Laval", "Longueuil", "Gatineau"],
-            "Regional": ["Quebec City", "Sherbrooke", "Trois-Rivières"],
-            "Provincial": ["Toronto", "Ottawa"],
-            "Federal": ["Boston", "New York", "Burlington"]
-        }
-    }
-
-    # Extract base city from location if it contains more specific info
-    base_location = current_location.split(",")[0].strip()
-
-    neighbors = location_mapping.get(base_location, {}).get(target_level, [])
+    neighbors = get_geo_index().ring(current_location, target_level)
 
     logging.info(f"Found {len(neighbors)} neighboring locations for {current_location} -> {target_level}")
 
     return neighbors
 
 def distribute_to_location(content_id: str, target_location: str,
-                         storage_client: ContentStorageClient,
+                         storage_client: StorageBackend,
                          vector_client: VectorSearchClient) -> bool:
     """Distribute content to a target location"""
+    actions = distribute_to_locations(content_id, [target_location], storage_client, vector_client)
+    return bool(actions) and actions[0]["success"]
+
+def distribute_to_locations(content_id: str, target_locations: List[str],
+                            storage_client: StorageBackend,
+                            vector_client: VectorSearchClient) -> List[Dict[str, Any]]:
+    """Distribute content to several target locations, indexing all copies in one batch"""
+    if not target_locations:
+        return []
+    return distribute_batch({content_id: target_locations}, storage_client, vector_client)[content_id]
+
+def distribute_batch(plans: Dict[str, List[str]], storage_client: StorageBackend,
+                     vector_client: VectorSearchClient) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Distribute many content items to their target locations in bulk
+    One multi-key lookup for the originals, then the batched index upload and one queue batch per
+    location run concurrently; copy ids are deterministic, so a retry upserts the index copy in place
+    and leaves an already queued (possibly reviewed) queue item untouched
+    """
     try:
-        # Get original content
-        original_content = get_content_by_id(content_id, vector_client)
-
-        if not original_content:
-            logging.error(f"Original content not found: {content_id}")
-            return False
-
-        # Create distributed content item
-        distributed_content = {
-            "id": f"{content_id}_distributed_{target_location}_{datetime.now(timezone.utc).isoformat()}",
-            "title": original_content.get("title", ""),
-            "content": original_content.get("content", ""),
-            "source": original_content.get("source", ""),
-            "category": original_content.get("category", ""),
-            "location": target_location,  # Updated location
-            "date": datetime.now(timezone.utc).isoformat(),
-            "url": original_content.get("url", ""),
-            "original_content_id": content_id,
-            "distribution_type": "viral_spread",
-            "sentiment": original_content.get("sentiment", "neutral")
-        }
-
-        # Store in vector search for the new location
-        success = vector_client.store_content(distributed_content)
-
-        if success:
-            # Add to editorial queue for the target location
-            editorial_success = storage_client.add_to_editorial_queue({
-                'source_url': original_content.get('url', ''),
-                'location': target_location,
-                'processed_content': {
-                    'title': distributed_content['title'],
-                    'summary': distributed_content['content'],
-                    'category': distributed_content['category'],
-                    'significance': 'high',  # Viral content is significant
-                    'original_location': original_content.get('location', ''),
-                    'distribution_reason': 'viral_engagement'
-                },
-                'priority': 'high'  # Viral content gets high priority
-            })
-
-            logging.info(f"Distributed content {content_id} to {target_location}")
-            return success and editorial_success
-
-        return False
+        originals = vector_client.get_documents(list(plans))
+
+        copies = []
+        for content_id, target_locations in plans.items():
+            original_content = originals.get(content_id)
+            if not original_content:
+                logging.error(f"Original content not found: {content_id}")
+                continue
+            for location in dict.fromkeys(target_locations):
+                copy = build_distributed_content(content_id, original_content, location)
+                copies.append((original_content, copy))
+
+        by_location: Dict[str, List[Dict[str, Any]]] = {}
+        for original_content, copy in copies:
+            by_location.setdefault(copy['location'], []).append(_queue_content(original_content, copy))
+
+        # Writes are idempotent, so the index and queue writes need not wait on each other
+        executor = get_distribution_executor()
+        index_future = None
+        if copies:
+            index_future = executor.submit(vector_client.store_contents, [copy for _, copy in copies])
+        queue_futures = [executor.submit(storage_client.add_items_to_editorial_queue, contents)
+                         for contents in by_location.values()]
+
+        index_outcomes = _future_result(index_future, "index upload") or {}
+        queue_outcomes: Dict[str, bool] = {}
+        for future in queue_futures:
+            queue_outcomes.update(_future_result(future, "editorial queue batch") or {})
+
+        succeeded = {copy['id'] for _, copy in copies
+                     if index_outcomes.get(copy['id'], False) and queue_outcomes.get(copy['id'], False)}
+
+        results = {}
+        for content_id, target_locations in plans.items():
+            results[content_id] = [
+                _distribution_action(location, distributed_content_id(content_id, location) in succeeded)
+                for location in target_locations
+            ]
+        logging.info(f"Distributed {len(succeeded)}/{len(copies)} copies of {len(plans)} content items")
+        return results
 
     except Exception as e:
-        logging.error(f"Failed to distribute content to {target_location}: {str(e)}")
-        return False
+        logging.error(f"Failed to distribute content batch: {str(e)}")
+        return {content_id: [_distribution_action(location, False) for location in target_locations]
+                for content_id, target_locations in plans.items()}
+
+def distributed_content_id(content_id: str, target_location: str) -> str:
+    """Stable id for a content copy in a target location (search keys allow letters, digits, '_', '-', '=')"""
+    ascii_location = unicodedata.normalize('NFKD', target_location).encode('ascii', 'ignore').decode('ascii')
+    slug = re.sub(r'[^a-z0-9]+', '-', ascii_location.lower()).strip('-')
+    return f"{content_id}--{slug}"
+
+def get_distribution_executor() -> ThreadPoolExecutor:
+    """Bounded worker pool for distribution writes, reused across invocations on a warm worker"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DISTRIBUTION_CONCURRENCY,
+                                       thread_name_prefix='distribution')
+    return _executor
+
+def _future_result(future: Optional[Future], description: str) -> Optional[Dict[str, bool]]:
+    """Outcome map from a write task; a failed task counts all of its writes as failed"""
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        logging.error(f"Distribution {description} failed: {str(e)}")
+        return None
+
+def _queue_content(original_content: Dict[str, Any], copy: Dict[str, Any]) -> Dict[str, Any]:
+    """Editorial queue entry for a distributed copy, keyed by the copy's id"""
+    return {
+        'source_url': original_content.get('url', ''),
+        'location': copy['location'],
+        'processed_content': {
+            'title': copy['title'],
+            'summary': copy['content'],
+            'category': copy['category'],
+            'significance': 'high',  # Viral content is significant
+            'original_location': original_content.get('location', ''),
+            'distribution_reason': 'viral_engagement'
+        },
+        'priority': 'high',  # Viral content gets high priority
+        'queue_item_id': copy['id']
+    }
+
+def build_distributed_content(content_id: str, original_content: Dict[str, Any],
+                              target_location: str) -> Dict[str, Any]:
+    """Create the distributed copy of content for a target location"""
+    return {
+        "id": distributed_content_id(content_id, target_location),
+        "title": original_content.get("title", ""),
+        "content": original_content.get("content", ""),
+        "source": original_content.get("source", ""),
+        "category": original_content.get("category", ""),
+        "location": target_location,  # Updated location
+        "date": datetime.now(timezone.utc).isoformat(),
+        "url": original_content.get("url", ""),
+        "original_content_id": content_id,
+        "distribution_type": "viral_spread",
+        "sentiment": original_content.get("sentiment", "neutral")
+    }
+
+def _distribution_action(target_location: str, success: bool) -> Dict[str, Any]:
+    """Describe the outcome of distributing to one location"""
+    return {
+        "target_location": target_location,
+        "success": success,
+        "action": "content_distributed"
+    }
 
 def get_content_by_id(content_id: str, vector_client: VectorSearchClient) -> Dict[str, Any]:
-    """Get content by ID from vector search"""
+    """Get content by ID from vector search (key lookup, memoized per invocation)"""
     try:
-        # In a full implementation, this would query by document ID
-        # For now, using a search approach
-        results = vector_client.client.search(
-            search_text="*",
-            filter=f"id eq '{content_id}'",
-            top=1
-        )
-
-        content_list = list(results)
-        return dict(content_list[0]) if content_list else None
+        return vector_client.get_document(content_id)
 
     except Exception as e:
         logging.error(f"Failed to get content by ID {content_id}: {str(e)}")
@@ -244,16 +294,8 @@ def get_content_by_id(content_id: str, vector_client: VectorSearchClient) -> Dic
 
 def calculate_engagement_metrics(content_id: str, location: str) -> Dict[str, Any]:
     """
-    Calculate engagement metrics for content in a location
-    This would typically be called by a separate analytics function
+    Calculate engagement metrics for content at a spread level
+    Served from the streaming engagement aggregator's windowed snapshot
     """
-    # Placeholder implementation
-    # In production, this would query user interaction data
-    return {
-        "total_users": 1000,
-        "engaged_users": 300,  # 30% engagement
-        "views": 1500,
-        "saves": 150,
-        "shares": 50,
-        "engagement_rate": 0.30
-    }
\ No newline at end of file
+    level = location if location in SPREAD_THRESHOLDS else None
+    return get_engagement_aggregator().snapshot(content_id, level)
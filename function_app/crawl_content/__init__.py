@@ -6,6 +6,14 @@ import hashlib
 import os
 from datetime import datetime, timezone
 from typing import Dict, Any, List
+import sys
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.foundry_client import FoundryClient
+from shared.pipeline import InMemoryChangeFeed, build_snapshot_pipeline
+from shared.storage_backend import change_feed_configured, get_storage_client
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -27,7 +35,6 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             sources = discover_local_sources(location)
 
         crawled_results = []
-        processed_content = []
 
         for source in sources:
             if not all(key in source for key in ['url', 'location', 'category']):
@@ -39,24 +46,24 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 crawl_result = simple_crawl_source(source)
 
                 if crawl_result:
-                    crawled_results.append(crawl_result)
-
-                    # Basic processing
-                    if meets_quality_rules(crawl_result):
-                        processed = simple_process_content(crawl_result, source)
-                        if processed:
-                            processed_content.append(processed)
+                    crawled_results.append((crawl_result, source))
 
             except Exception as e:
                 logging.error(f"Failed to process source {source['url']}: {str(e)}")
                 continue
 
+        # With Cosmos DB configured, snapshot writes feed the process_snapshots change-feed worker
+        if change_feed_configured():
+            return publish_snapshots(crawled_results)
+
+        processed_content = process_inline(crawled_results)
+
         return func.HttpResponse(
             json.dumps({
                 "status": "completed",
                 "crawled_sources": len(crawled_results),
                 "processed_items": len(processed_content),
-                "crawl_results": crawled_results,
+                "crawl_results": [crawl_result for crawl_result, _ in crawled_results],
                 "processed_content": processed_content,
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }),
@@ -72,6 +79,58 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json"
         )
 
+def publish_snapshots(crawled_results: List[tuple]) -> func.HttpResponse:
+    """Store crawl snapshots and return; changed snapshots are processed from the change feed"""
+    storage_client = get_storage_client()
+    changed = 0
+
+    for crawl_result, source in crawled_results:
+        try:
+            snapshot = storage_client.store_content_snapshot(
+                crawl_result['url'],
+                crawl_result['content'],
+                snapshot_metadata(crawl_result, source)
+            )
+            changed += 1 if snapshot['has_changed'] else 0
+        except Exception as e:
+            logging.error(f"Failed to store snapshot for {crawl_result['url']}: {str(e)}")
+
+    return func.HttpResponse(
+        json.dumps({
+            "status": "accepted",
+            "crawled_sources": len(crawled_results),
+            "changed_sources": changed,
+            "message": "Changed content is processed asynchronously",
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }),
+        status_code=202,
+        mimetype="application/json"
+    )
+
+def process_inline(crawled_results: List[tuple]) -> List[Dict[str, Any]]:
+    """Run the snapshot pipeline in-process when no change feed is available"""
+    feed = InMemoryChangeFeed()
+    for crawl_result, source in crawled_results:
+        feed.publish({
+            'source_url': crawl_result['url'],
+            'content': crawl_result['content'],
+            'content_hash': hashlib.sha256(crawl_result['content'].encode()).hexdigest(),
+            'metadata': snapshot_metadata(crawl_result, source),
+            'has_changed': True
+        })
+
+    pipeline = build_snapshot_pipeline(simple_process_content, meets_quality_rules)
+    return pipeline.run(feed)
+
+def snapshot_metadata(crawl_result: Dict[str, Any], source: Dict[str, Any]) -> Dict[str, Any]:
+    """Source details stored with a snapshot so the pipeline can process it later"""
+    return {
+        'location': source['location'],
+        'category': source['category'],
+        'title': crawl_result.get('title', ''),
+        'crawl_timestamp': crawl_result.get('crawl_timestamp')
+    }
+
 def simple_crawl_source(source: Dict[str, Any]) -> Dict[str, Any]:
     """Simplified crawling that doesn't depend on external libraries"""
     try:
@@ -2,15 +2,24 @@ import azure.functions as func
 import json
 import logging
 import os
+import sys
 from datetime import datetime, timezone
-from typing import Dict, Any, List
+from typing import Dict, Any
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.storage_backend import StorageBackend, get_storage_client, storage_configured
+from shared.candidate_pools import mark_candidate_pools_stale
+
+VALID_STATUSES = ['pending', 'approved', 'rejected', 'published', 'archived']
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Editorial Queue Management Function - Simplified version
-    GET /api/editorial_queue/{location} - Get queue items for location
+    GET /api/editorial_queue/{location} - Get queue items for location (?order=priority for review order)
     POST /api/editorial_queue/{location} - Add item to queue
-    PUT /api/editorial_queue/{location} - Update item status
+    PUT /api/editorial_queue/{location} - Update item status (one item, or many via item_ids/items)
     """
 
     logging.info('Editorial queue function processed a request.')
@@ -19,6 +28,17 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         method = req.method
         location = req.route_params.get('location', 'Vancouver')
 
+        # Use the configured storage backend, otherwise fall back to the mock handlers
+        if storage_configured():
+            storage_client = get_storage_client()
+
+            if method == 'GET':
+                return handle_get_queue(req, storage_client, location)
+            elif method == 'POST':
+                return handle_add_to_queue(req, storage_client, location)
+            elif method == 'PUT':
+                return handle_update_queue_item(req, storage_client, location)
+
         if method == 'GET':
             return handle_get_queue_simple(req, location)
         elif method == 'POST':
@@ -162,10 +182,9 @@ def handle_update_queue_item_simple(req: func.HttpRequest, location: str) -> fun
             )
 
         # Validate status
-        valid_statuses = ['pending', 'approved', 'rejected', 'published', 'archived']
-        if new_status not in valid_statuses:
+        if new_status not in VALID_STATUSES:
             return func.HttpResponse(
-                json.dumps({"error": f"Invalid status. Must be one of: {valid_statuses}"}),
+                json.dumps({"error": f"Invalid status. Must be one of: {VALID_STATUSES}"}),
                 status_code=400,
                 mimetype="application/json"
             )
@@ -197,7 +216,7 @@ def handle_update_queue_item_simple(req: func.HttpRequest, location: str) -> fun
             mimetype="application/json"
         )
 
-def handle_get_queue(req: func.HttpRequest, storage_client: ContentStorageClient,
+def handle_get_queue(req: func.HttpRequest, storage_client: StorageBackend,
                     location: str) -> func.HttpResponse:
     """Get editorial queue items for a location"""
     try:
@@ -210,30 +229,32 @@ def handle_get_queue(req: func.HttpRequest, storage_client: ContentStorageClient
 
         # Get query parameters
         status = req.params.get('status', 'pending')
-        limit = min(int(req.params.get('limit', 50)), 100)  # Max 100 items
+        limit = max(1, min(int(req.params.get('limit', 50)), 100))  # Max 100 items
+        cursor = req.params.get('cursor')
 
-        # Get queue items
-        queue_items = storage_client.get_editorial_queue(location, status)
+        order = req.params.get('order', 'recent')
 
-        # Limit results
-        if len(queue_items) > limit:
-            queue_items = queue_items[:limit]
+        # Fetch a single Cosmos page; the continuation token becomes the next cursor
+        if order == 'priority':
+            queue_items, next_cursor = storage_client.get_review_queue(location, status, limit, cursor)
+        else:
+            queue_items, next_cursor = storage_client.get_editorial_queue_page(location, status, limit, cursor)
 
-        # Add summary statistics
-        all_pending = storage_client.get_editorial_queue(location, 'pending')
-        all_approved = storage_client.get_editorial_queue(location, 'approved')
-        all_rejected = storage_client.get_editorial_queue(location, 'rejected')
+        # Add summary statistics (one grouped count query)
+        status_counts = storage_client.get_editorial_queue_stats(location)
 
         response = {
             "location": location,
             "status_filter": status,
+            "order": order,
             "items": queue_items,
             "count": len(queue_items),
+            "next_cursor": next_cursor,
             "statistics": {
-                "pending": len(all_pending),
-                "approved": len(all_approved),
-                "rejected": len(all_rejected),
-                "total": len(all_pending) + len(all_approved) + len(all_rejected)
+                "pending": status_counts.get('pending', 0),
+                "approved": status_counts.get('approved', 0),
+                "rejected": status_counts.get('rejected', 0),
+                "total": sum(status_counts.get(key, 0) for key in ('pending', 'approved', 'rejected'))
             },
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
@@ -252,7 +273,7 @@ def handle_get_queue(req: func.HttpRequest, storage_client: ContentStorageClient
             mimetype="application/json"
         )
 
-def handle_add_to_queue(req: func.HttpRequest, storage_client: ContentStorageClient,
+def handle_add_to_queue(req: func.HttpRequest, storage_client: StorageBackend,
                        location: str) -> func.HttpResponse:
     """Add new item to editorial queue"""
     try:
@@ -323,7 +344,7 @@ def handle_add_to_queue(req: func.HttpRequest, storage_client: ContentStorageCli
             mimetype="application/json"
         )
 
-def handle_update_queue_item(req: func.HttpRequest, storage_client: ContentStorageClient,
+def handle_update_queue_item(req: func.HttpRequest, storage_client: StorageBackend,
                            location: str) -> func.HttpResponse:
     """Update editorial queue item status"""
     try:
@@ -342,6 +363,10 @@ def handle_update_queue_item(req: func.HttpRequest, storage_client: ContentStora
                 mimetype="application/json"
             )
 
+        # Bulk actions: {"item_ids": [...], "status": ...} or {"items": [{"item_id", "status"}, ...]}
+        if 'item_ids' in req_body or 'items' in req_body:
+            return handle_bulk_update_queue_items(req_body, storage_client, location)
+
         # Validate required fields
         item_id = req_body.get('item_id')
         new_status = req_body.get('status')
@@ -354,10 +379,9 @@ def handle_update_queue_item(req: func.HttpRequest, storage_client: ContentStora
             )
 
         # Validate status
-        valid_statuses = ['pending', 'approved', 'rejected', 'published', 'archived']
-        if new_status not in valid_statuses:
+        if new_status not in VALID_STATUSES:
             return func.HttpResponse(
-                json.dumps({"error": f"Invalid status. Must be one of: {valid_statuses}"}),
+                json.dumps({"error": f"Invalid status. Must be one of: {VALID_STATUSES}"}),
                 status_code=400,
                 mimetype="application/json"
             )
@@ -383,6 +407,7 @@ def handle_update_queue_item(req: func.HttpRequest, storage_client: ContentStora
             if new_status == 'approved':
                 response["message"] += " and queued for publishing"
                 # In a full implementation, this would trigger the publishing function
+                mark_candidate_pools_stale([location])
 
             return func.HttpResponse(
                 json.dumps(response),
@@ -402,4 +427,87 @@ def handle_update_queue_item(req: func.HttpRequest, storage_client: ContentStora
             json.dumps({"error": "Failed to update queue item"}),
             status_code=500,
             mimetype="application/json"
-        )
\ No newline at end of file
+        )
+
+def handle_bulk_update_queue_items(req_body: Dict[str, Any], storage_client: StorageBackend,
+                                  location: str) -> func.HttpResponse:
+    """Apply one editorial action to many queue items in a location"""
+    default_status = req_body.get('status')
+    default_notes = req_body.get('editor_notes')
+
+    entries = req_body.get('items' if 'items' in req_body else 'item_ids') or []
+    entry_type = dict if 'items' in req_body else str
+    if not isinstance(entries, list) or not all(isinstance(entry, entry_type) for entry in entries):
+        return func.HttpResponse(
+            json.dumps({"error": "items must be a list of objects and item_ids a list of strings"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    if 'items' in req_body:
+        updates = [
+            {
+                'item_id': item.get('item_id'),
+                'status': item.get('status', default_status),
+                'editor_notes': item.get('editor_notes', default_notes)
+            }
+            for item in entries
+        ]
+    else:
+        updates = [
+            {'item_id': item_id, 'status': default_status, 'editor_notes': default_notes}
+            for item_id in entries
+        ]
+
+    if not updates:
+        return func.HttpResponse(
+            json.dumps({"error": "At least one item is required"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    invalid = [update for update in updates
+               if not update['item_id'] or not isinstance(update['item_id'], str)
+               or update['status'] not in VALID_STATUSES]
+    if invalid:
+        return func.HttpResponse(
+            json.dumps({
+                "error": f"Every item needs an item_id and a status in: {VALID_STATUSES}",
+                "invalid_items": invalid
+            }),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    # Outcomes are keyed by item id, so one request may only update each item once
+    item_ids = [update['item_id'] for update in updates]
+    duplicates = sorted({item_id for item_id in item_ids if item_ids.count(item_id) > 1})
+    if duplicates:
+        return func.HttpResponse(
+            json.dumps({"error": "Each item may appear only once per request", "duplicate_items": duplicates}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    outcomes = storage_client.update_queue_items_status(location, updates)
+    updated = [item_id for item_id, success in outcomes.items() if success]
+    failed = [item_id for item_id, success in outcomes.items() if not success]
+
+    approved = {update['item_id'] for update in updates if update['status'] == 'approved'}
+    if approved.intersection(updated):
+        mark_candidate_pools_stale([location])
+
+    response = {
+        "message": f"Updated {len(updated)} of {len(updates)} queue items",
+        "updated": updated,
+        "failed": failed,
+        "location": location,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+    # 207 signals a partial success so editors can retry only the failed items
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200 if not failed else (207 if updated else 500),
+        mimetype="application/json"
+    )
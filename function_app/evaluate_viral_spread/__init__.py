@@ -0,0 +1,90 @@
+import azure.functions as func
+import logging
+import time
+import sys
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.storage_backend import StorageBackend, get_storage_client
+from shared.vector_client import VectorSearchClient, create_vector_client
+from shared.viral_spread import select_spreading
+from content_distribution import distribute_batch, get_neighboring_locations
+
+# Records are evaluated and distributed in chunks so memory stays flat across the catalogue
+BATCH_SIZE = 1000
+
+# Content with no engagement updates in this window is considered inactive
+ACTIVE_WINDOW_HOURS = 72
+
+def main(mytimer: func.TimerRequest) -> None:
+    """
+    Viral Spread Batch Function
+    Timer-triggered function (every 10 minutes) that evaluates spread thresholds for all active
+    content in one vectorized pass per chunk and distributes spreading items in bulk
+    """
+
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    logging.info(f'Viral spread batch ran at {now.isoformat()}')
+
+    try:
+        storage_client = get_storage_client()
+        vector_client = create_vector_client()
+
+        since = (now - timedelta(hours=ACTIVE_WINDOW_HOURS)).isoformat()
+        totals = {'evaluated': 0, 'spreading': 0, 'advanced': 0, 'copies': 0}
+
+        chunk = []
+        for record in storage_client.iter_content_engagement(updated_since=since, page_size=BATCH_SIZE):
+            chunk.append(record)
+            if len(chunk) >= BATCH_SIZE:
+                _add(totals, evaluate_batch(chunk, storage_client, vector_client, now))
+                chunk = []
+        if chunk:
+            _add(totals, evaluate_batch(chunk, storage_client, vector_client, now))
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Viral spread batch complete in {elapsed:.2f}s: {totals}")
+
+    except Exception as e:
+        logging.error(f"Viral spread batch error: {str(e)}")
+
+def evaluate_batch(records: List[Dict[str, Any]], storage_client: StorageBackend,
+                   vector_client: VectorSearchClient, now: datetime) -> Dict[str, int]:
+    """Evaluate one chunk of engagement records and distribute the ones that cross their threshold"""
+    spreading = select_spreading(records)
+
+    plans = {
+        record['content_id']: get_neighboring_locations(record.get('origin_location', ''), level)
+        for record, level in spreading
+    }
+    results = distribute_batch({content_id: targets for content_id, targets in plans.items() if targets},
+                               storage_client, vector_client) if any(plans.values()) else {}
+
+    # Advance a record once every copy landed (or there was nowhere to send them at this level);
+    # any failed location keeps the level, so the next run retries the whole (idempotent) distribution.
+    # Only the level fields are patched, so engagement flushed since this chunk was read is kept
+    advanced = 0
+    for record, level in spreading:
+        targets = plans[record['content_id']]
+        actions = results.get(record['content_id'], [])
+        if targets and (len(actions) < len(targets) or not all(action['success'] for action in actions)):
+            continue
+        if storage_client.advance_content_level(record['content_id'], record.get('level', 'Local'),
+                                                level, now.isoformat()):
+            advanced += 1
+
+    return {
+        'evaluated': len(records),
+        'spreading': len(spreading),
+        'advanced': advanced,
+        'copies': sum(action['success'] for actions in results.values() for action in actions)
+    }
+
+def _add(totals: Dict[str, int], counts: Dict[str, int]) -> None:
+    for key, value in counts.items():
+        totals[key] += value
@@ -0,0 +1,60 @@
+import azure.functions as func
+import logging
+import sys
+import os
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.pipeline import build_snapshot_pipeline
+from shared.candidate_pools import mark_candidate_pools_stale
+from shared.storage_backend import get_storage_client
+from shared.vector_client import create_vector_client
+from crawl_content import simple_process_content, meets_quality_rules
+
+# Reused across invocations on a warm worker so dedup state carries over
+_pipeline = None
+
+def main(documents: func.DocumentList) -> None:
+    """
+    Snapshot Processing Function
+    Cosmos DB change feed trigger on content_snapshots; the lease container checkpoints each batch,
+    and a failed batch is retried with exponential backoff before it is checkpointed
+
+    Runs changed snapshots through dedup, summarization, indexing and editorial queueing,
+    then marks the affected locations' recommendation candidate pools stale for the pool builder
+    """
+
+    if not documents:
+        return
+
+    events = [document.to_dict() for document in documents]
+    logging.info(f"Processing {len(events)} snapshot changes")
+
+    # An exception fails the invocation; the retry policy in function.json re-runs the same batch before
+    # the lease moves on, and once its retries are spent the batch is checkpointed without being processed
+    pipeline = get_pipeline()
+    queued = pipeline.process_batch(events)
+    logging.info(f"Snapshot batch complete: {len(queued)} items queued for review")
+
+    # Newly indexed content changes what each affected location recommends
+    mark_candidate_pools_stale(item.get('location') for item in queued)
+
+    # Returning checkpoints the batch, so only now may dedup treat its content as processed
+    pipeline.commit()
+
+def get_pipeline():
+    """Build the snapshot pipeline once per worker"""
+    global _pipeline
+    if _pipeline is None:
+        vector_client = None
+        if os.environ.get('AZURE_AISEARCH_ENDPOINT') or os.environ.get('VECTOR_BACKEND') == 'local':
+            vector_client = create_vector_client()
+
+        _pipeline = build_snapshot_pipeline(
+            simple_process_content,
+            meets_quality_rules,
+            vector_client=vector_client,
+            storage_client=get_storage_client()
+        )
+    return _pipeline
@@ -1,7 +1,16 @@
 import azure.functions as func
 import json
 import logging
+import os
+import sys
 from datetime import datetime
+from typing import Dict, Any, List, Iterator, Iterable, Tuple
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.agent_parser import parse_agent_content
+from shared.storage_backend import get_storage_client, storage_configured
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -37,6 +46,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         logging.info(f"Processing research request for location: {location}")
 
+        # Event mode: {"stream": true} / ?stream=true for SSE framing, "ndjson" for newline-delimited JSON.
+        # The v1 programming model buffers HTTP responses, so all events arrive once the run has finished
+        stream_format = req_body.get('stream') or req.params.get('stream')
+        if stream_format and str(stream_format).lower() not in ('false', '0'):
+            return handle_streaming_research(location, interests, past_events, stream_format)
+
         # Call Azure AI Foundry Agent with REAL internet search
         try:
             from .foundry_helper import call_foundry_agent
@@ -58,10 +73,15 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             else:
                 raise Exception("Agent returned invalid response structure")
 
+            # Parse the agent markdown into typed records once, for every consumer
+            items = parse_agent_content(content, location)
+            indexing = persist_research_items(items) if req_body.get('index_results', True) else {}
+
             # Return structured response
             enhanced_result = {
                 "agent_response": {
                     "content": content,
+                    "items": items,
                     "location_specific": True,
                     "research_agent_active": True,
                     "discovery_status": "real_data_retrieved",
@@ -75,7 +95,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     },
                     "timestamp": datetime.utcnow().isoformat(),
                     "status": "success",
-                    "agent_type": "azure_ai_foundry_with_internet_search"
+                    "agent_type": "azure_ai_foundry_with_internet_search",
+                    "indexing": indexing
                 }
             }
 
@@ -119,4 +140,153 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
                 "Access-Control-Allow-Headers": "Content-Type"
             }
-        )
\ No newline at end of file
+        )
+
+def handle_streaming_research(location: str, interests: List[str], past_events: List[str],
+                              stream_format: Any) -> func.HttpResponse:
+    """
+    Consume the Foundry run incrementally and return it as SSE or newline-delimited JSON events
+    The response body is buffered, not streamed: clients get every event together when the run finishes
+    """
+    use_ndjson = str(stream_format).lower() == 'ndjson'
+    cors_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type",
+        "Cache-Control": "no-cache"
+    }
+
+    try:
+        from .foundry_helper import stream_foundry_agent
+
+        fragments = stream_foundry_agent(
+            location=location,
+            user_interests=interests if interests else None
+        )
+        # Pull the first fragment eagerly so configuration errors still map to a 503
+        first_fragment = next(fragments, "")
+    except Exception as foundry_error:
+        logging.error(f"Azure AI Foundry research stream failed: {str(foundry_error)}")
+        return func.HttpResponse(
+            json.dumps({
+                "error": "Research agent failed - please check Azure AI Foundry configuration",
+                "details": str(foundry_error),
+                "solution": "Verify AGENT_ID and ensure agent has internet search enabled"
+            }),
+            status_code=503,
+            mimetype="application/json",
+            headers=cors_headers
+        )
+
+    metadata = {
+        "location": location,
+        "user_preferences": {
+            "interests": interests,
+            "past_events": past_events
+        },
+        "timestamp": datetime.utcnow().isoformat(),
+        "agent_type": "azure_ai_foundry_with_internet_search",
+        "delivery": "buffered"
+    }
+
+    events = iter_research_events(_prepend(first_fragment, fragments), metadata)
+    formatter = format_ndjson_event if use_ndjson else format_sse_event
+
+    # v1 HttpResponse bodies are buffered, so the events are framed here and sent together
+    return func.HttpResponse(
+        "".join(formatter(event, data) for event, data in events),
+        status_code=200,
+        mimetype="application/x-ndjson" if use_ndjson else "text/event-stream",
+        headers=cors_headers
+    )
+
+def iter_research_events(fragments: Iterable[str], metadata: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Turn agent text fragments into start / delta / complete (or error) events, then an indexed event
+    The research result is complete before its items are persisted, so indexing never holds it back
+    """
+    yield "start", {"metadata": metadata}
+
+    content_parts = []
+    try:
+        for fragment in fragments:
+            content_parts.append(fragment)
+            yield "delta", {"text": fragment}
+    except Exception as e:
+        logging.error(f"Research agent stream interrupted: {str(e)}")
+        yield "error", {"error": "Research agent stream interrupted", "details": str(e)}
+        return
+
+    content = "".join(content_parts)
+    items = parse_agent_content(content, metadata["location"])
+
+    yield "complete", {
+        "agent_response": {
+            "content": content,
+            "items": items,
+            "location_specific": True,
+            "research_agent_active": True,
+            "discovery_status": "real_data_retrieved",
+            "data_source": "azure_ai_foundry_internet_search"
+        },
+        "metadata": dict(metadata, status="success")
+    }
+
+    yield "indexed", {"indexing": persist_research_items(items)}
+
+def persist_research_items(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bulk-write parsed research items to the vector index and editorial queue when configured"""
+    summary = {"indexed": 0, "queued": 0}
+    if not items:
+        return summary
+
+    if os.environ.get('AZURE_AISEARCH_ENDPOINT') or os.environ.get('VECTOR_BACKEND') == 'local':
+        try:
+            from shared.vector_client import create_vector_client
+
+            index_documents = [
+                {key: item[key] for key in ("id", "title", "content", "source", "category", "location", "date", "url")}
+                for item in items
+            ]
+            outcomes = create_vector_client().store_contents(index_documents)
+            summary["indexed"] = sum(1 for ok in outcomes.values() if ok)
+        except Exception as e:
+            logging.warning(f"Indexing research items failed: {str(e)}")
+
+    if storage_configured():
+        try:
+
+            queue_contents = [{
+                'queue_item_id': item['id'],
+                'source_url': item['url'],
+                'location': item['location'],
+                'processed_content': {
+                    'title': item['title'],
+                    'summary': item['content'],
+                    'category': item['category'],
+                    'item_type': item['item_type'],
+                    'date': item['date'],
+                    'significance': 'medium'
+                },
+                'submitted_by': 'research_agent'
+            } for item in items]
+            outcomes = get_storage_client().add_items_to_editorial_queue(queue_contents)
+            summary["queued"] = sum(1 for ok in outcomes.values() if ok)
+        except Exception as e:
+            logging.warning(f"Queueing research items failed: {str(e)}")
+
+    return summary
+
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one event in text/event-stream framing"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def format_ndjson_event(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one event as a newline-delimited JSON chunk"""
+    return json.dumps({"event": event, **data}) + "\n"
+
+def _prepend(first: str, rest: Iterator[str]) -> Iterator[str]:
+    """Re-attach an eagerly consumed fragment to the front of the stream"""
+    if first:
+        yield first
+    yield from rest
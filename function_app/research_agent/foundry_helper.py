@@ -5,7 +5,7 @@ Uses Agent-to-Agent (A2A) communication with internet search
 import os
 import logging
 import sys
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
 
 # Add the function_app directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,12 +24,7 @@ def call_foundry_agent(location: str, user_interests: Optional[List[str]] = None
         foundry_client = FoundryClient()
 
         # Build concise user query for the agent (cost optimization)
-        user_query = f"Find current events, meetings, and news in {location}."
-        
-        if user_interests:
-            user_query += f" Focus on: {', '.join(user_interests[:3])}."  # Limit to 3 interests
-        
-        user_query += " Provide 3-5 items per category with dates/times/locations and sources."
+        user_query = build_research_query(location, user_interests)
 
         # Call the agent with internet search enabled (with cost limits)
         result = foundry_client.call_agent_with_search(user_query, max_tokens=800)
@@ -40,4 +35,38 @@ def call_foundry_agent(location: str, user_interests: Optional[List[str]] = None
 
     except Exception as e:
         logging.error(f"Azure Foundry Agent research failed: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def stream_foundry_agent(location: str, user_interests: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Stream the Azure AI Foundry Agent research run for a location
+    Yields text fragments as soon as the agent produces them
+    """
+    from shared.foundry_client import FoundryClient, extract_message_delta_text
+
+    logging.info(f"Streaming Azure AI Foundry Agent research about {location}")
+
+    foundry_client = FoundryClient()
+    user_query = build_research_query(location, user_interests)
+
+    for event in foundry_client.stream_agent_with_search(user_query, max_tokens=800):
+        if event["event"] in ("thread.run.failed", "error"):
+            raise Exception(f"Agent run failed: {event.get('data')}")
+        if event["event"] == "done":
+            break
+
+        text = extract_message_delta_text(event)
+        if text:
+            yield text
+
+    logging.info("Azure Foundry Agent research stream completed")
+
+def build_research_query(location: str, user_interests: Optional[List[str]] = None) -> str:
+    """Build the concise research query sent to the agent"""
+    user_query = f"Find current events, meetings, and news in {location}."
+
+    if user_interests:
+        user_query += f" Focus on: {', '.join(user_interests[:3])}."  # Limit to 3 interests
+
+    user_query += " Provide 3-5 items per category with dates/times/locations and sources."
+    return user_query
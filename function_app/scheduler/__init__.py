@@ -10,7 +10,7 @@ import os
 # Add the function_app directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.storage_client import ContentStorageClient
+from shared.storage_backend import get_storage_client
 
 def main(mytimer: func.TimerRequest) -> None:
     """
@@ -28,19 +28,16 @@ def main(mytimer: func.TimerRequest) -> None:
     logging.info(f'Scheduler function ran at {utc_timestamp}')
 
     try:
-        storage_client = ContentStorageClient()
-
-        # Get all crawling targets
-        targets = storage_client.get_crawling_targets()
-
-        if not targets:
-            logging.info("No crawling targets found")
-            return
+        storage_client = get_storage_client()
 
+        # Only targets whose next crawl is due are read; their change history was last updated when they
+        # were crawled, so that is when their frequency can change too
+        targets_seen = 0
         schedule_updates = []
         crawl_triggers = []
 
-        for target in targets:
+        for target in storage_client.iter_due_crawling_targets():
+            targets_seen += 1
             try:
                 # Calculate new frequency based on adaptive logic
                 new_frequency = calculate_adaptive_frequency(target)
@@ -74,6 +71,10 @@ def main(mytimer: func.TimerRequest) -> None:
                 logging.error(f"Error processing target {target.get('url', 'unknown')}: {str(e)}")
                 continue
 
+        if not targets_seen:
+            logging.info("No crawling targets are due")
+            return
+
         # Trigger crawling for targets that are due
         if crawl_triggers:
             trigger_crawling(crawl_triggers)
@@ -216,7 +217,7 @@ def trigger_crawling(targets: List[Dict[str, Any]]) -> None:
                         f"Processed: {result.get('processed_items', 0)} items")
 
             # Update last crawl times
-            storage_client = ContentStorageClient()
+            storage_client = get_storage_client()
             for target in targets:
                 target['last_crawl_time'] = datetime.now(timezone.utc).isoformat()
                 storage_client.store_crawling_target(target)
@@ -232,7 +233,7 @@ def trigger_crawling(targets: List[Dict[str, Any]]) -> None:
 def initialize_default_targets() -> None:
     """Initialize some default crawling targets for testing"""
     try:
-        storage_client = ContentStorageClient()
+        storage_client = get_storage_client()
 
         default_targets = [
             {
@@ -0,0 +1,76 @@
+import azure.functions as func
+import json
+import logging
+import sys
+import os
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.vector_client import create_vector_client
+
+MAX_PAGE_SIZE = 50
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Content Search Function
+    GET /api/search_content?location=<location>&q=<query> - hybrid keyword and vector search
+    Optional: ?top=<1-50> page size, ?cursor=<continuation_token> from the previous page
+    """
+
+    logging.info('Search content function processed a request.')
+
+    location = req.params.get('location')
+    if not location:
+        return func.HttpResponse(
+            json.dumps({"error": "location is required"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    try:
+        top = int(req.params.get('top', 10))
+    except ValueError:
+        top = 0
+    if not 1 <= top <= MAX_PAGE_SIZE:
+        return func.HttpResponse(
+            json.dumps({"error": f"top must be an integer from 1 to {MAX_PAGE_SIZE}"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    if not (os.environ.get('AZURE_AISEARCH_ENDPOINT') or os.environ.get('VECTOR_BACKEND') == 'local'):
+        return func.HttpResponse(
+            json.dumps({"error": "Search is not configured"}),
+            status_code=503,
+            mimetype="application/json"
+        )
+
+    query = req.params.get('q', '')
+    try:
+        page = create_vector_client().search_hybrid(location, query, top, req.params.get('cursor'))
+    except ValueError as e:
+        # Raised for cursors that are malformed or belong to a different location or query
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Search content function failed: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Search failed"}),
+            status_code=500,
+            mimetype="application/json"
+        )
+
+    return func.HttpResponse(
+        json.dumps({
+            "location": location,
+            "query": query,
+            "results": page["results"],
+            "cursor": page["continuation_token"]
+        }, default=str),
+        status_code=200,
+        mimetype="application/json"
+    )
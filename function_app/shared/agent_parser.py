@@ -0,0 +1,197 @@
+"""
+Structured parser for research agent output
+Turns "**Title** - description. Source: URL" markdown into typed, indexable records
+"""
+import re
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Item types and the feed category each one is indexed under
+ITEM_CATEGORIES = {
+    'meeting': 'government',
+    'event': 'events',
+    'news': 'news',
+    'service': 'services'
+}
+
+# Keywords used to classify section headings and unsectioned items (checked in order)
+TYPE_KEYWORDS = [
+    ('meeting', ('town hall', 'townhall', 'council', 'meeting', 'hearing', 'agenda', 'committee')),
+    ('service', ('service', 'library', 'recreation', 'program', 'registration', 'class')),
+    ('event', ('event', 'festival', 'market', 'concert', 'fair', 'parade', 'celebration', 'tour')),
+    ('news', ('news', 'story', 'stories', 'announce', 'update', 'report'))
+]
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+_MONTH_NAME = r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\.?"
+
+_ITEM_RE = re.compile(
+    r"^\s*(?:[-*•]|\d+[.)])?\s*\*\*(?P<title>[^*]+?)\*\*\s*(?:[-–—:]\s*)?(?P<body>.*)$"
+)
+_HEADING_RE = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?:\d+[.)]\s*)?(?:\*\*)?(?P<heading>[A-Za-z][^*:.]{2,80}?)(?:\*\*)?\s*:?\s*$"
+)
+_SOURCE_RE = re.compile(r"\s*\(?Source:\s*(?:\[[^\]]*\]\((?P<md>[^)\s]+)\)|(?P<raw><?https?://[^\s)>]+>?))\)?\.?\s*$", re.IGNORECASE)
+_LINK_RE = re.compile(r"\[[^\]]*\]\((https?://[^)\s]+)\)|(https?://[^\s)>\]]+)")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+_MONTH_DAY_RE = re.compile(_MONTH_NAME + r"\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*[-–]\s*\d{1,2})?(?:,?\s+(\d{4}))?", re.IGNORECASE)
+_DAY_MONTH_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+" + _MONTH_NAME + r"(?:,?\s+(\d{4}))?", re.IGNORECASE)
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([AaPp])\.?[Mm]\.?")
+
+
+def parse_agent_content(content: str, location: str,
+                        reference_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Parse research agent markdown into typed event/news/meeting/service records"""
+    if not content:
+        return []
+
+    reference_date = reference_date or datetime.now(timezone.utc)
+    records = []
+    seen_ids = set()
+    section_type = None
+
+    for line in content.splitlines():
+        item_match = _ITEM_RE.match(line)
+
+        if item_match and item_match.group('body').strip():
+            record = _build_record(item_match.group('title'), item_match.group('body'),
+                                   section_type, location, reference_date)
+            if record['id'] not in seen_ids:
+                seen_ids.add(record['id'])
+                records.append(record)
+            continue
+
+        heading_match = _HEADING_RE.match(line) if line.strip() else None
+        if heading_match:
+            heading_type = classify_text(heading_match.group('heading'))
+            if heading_type:
+                section_type = heading_type
+
+    logging.info(f"Parsed {len(records)} structured items from agent output for {location}")
+    return records
+
+
+def classify_text(text: str) -> Optional[str]:
+    """Classify a heading or item text as meeting, service, event or news"""
+    lowered = text.lower()
+    for item_type, keywords in TYPE_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return item_type
+    return None
+
+
+def normalize_date(text: str, reference_date: Optional[datetime] = None) -> Optional[str]:
+    """Extract the first date (and time, if present) from free text as an ISO 8601 UTC string"""
+    reference_date = reference_date or datetime.now(timezone.utc)
+    parsed = _extract_date(text, reference_date)
+    if not parsed:
+        return None
+
+    year, month, day = parsed
+    hour, minute = _extract_time(text)
+    try:
+        return datetime(year, month, day, hour, minute, tzinfo=timezone.utc).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_url(url: str) -> str:
+    """Strip markdown/angle-bracket wrapping and trailing punctuation from a source URL"""
+    return url.strip().strip('<>').rstrip('.,;')
+
+
+def _build_record(title: str, body: str, section_type: Optional[str],
+                  location: str, reference_date: datetime) -> Dict[str, Any]:
+    """Build one indexable record from a parsed item line"""
+    title = title.strip().rstrip(':').strip()
+    description, url = _split_source(body)
+    item_type = section_type or classify_text(f"{title} {description}") or 'news'
+    date = normalize_date(description, reference_date)
+
+    # Deterministic key so re-parsing the same item updates rather than duplicates it
+    key_source = f"{location}|{item_type}|{title.lower()}|{url}"
+    record_id = f"agent-{hashlib.sha256(key_source.encode()).hexdigest()[:32]}"
+
+    return {
+        'id': record_id,
+        'item_type': item_type,
+        'title': title,
+        'content': description,
+        'source': urlparse(url).netloc if url else 'research_agent',
+        'category': ITEM_CATEGORIES[item_type],
+        'location': location,
+        'date': date,
+        'url': url
+    }
+
+
+def _split_source(body: str) -> Tuple[str, str]:
+    """Split an item body into its description and source URL"""
+    body = body.strip()
+    source_match = _SOURCE_RE.search(body)
+    if source_match:
+        url = normalize_url(source_match.group('md') or source_match.group('raw'))
+        return body[:source_match.start()].strip(), url
+
+    link_match = _LINK_RE.search(body)
+    if link_match:
+        url = normalize_url(link_match.group(1) or link_match.group(2))
+        return body.strip(), url
+
+    return body, ''
+
+
+def _extract_date(text: str, reference_date: datetime) -> Optional[Tuple[int, int, int]]:
+    """Find the first recognizable calendar date in text"""
+    iso_match = _ISO_DATE_RE.search(text)
+    if iso_match:
+        return int(iso_match.group(1)), int(iso_match.group(2)), int(iso_match.group(3))
+
+    numeric_match = _NUMERIC_DATE_RE.search(text)
+    if numeric_match:
+        # North American month/day/year
+        return int(numeric_match.group(3)), int(numeric_match.group(1)), int(numeric_match.group(2))
+
+    month_day = _MONTH_DAY_RE.search(text)
+    day_month = _DAY_MONTH_RE.search(text)
+    if month_day and (not day_month or month_day.start() <= day_month.start()):
+        month, day, year = month_day.group(1), month_day.group(2), month_day.group(3)
+    elif day_month:
+        day, month, year = day_month.group(1), day_month.group(2), day_month.group(3)
+    else:
+        return None
+
+    month_number = MONTHS[month[:3].lower()]
+    day_number = int(day)
+    if year:
+        return int(year), month_number, day_number
+
+    # Year omitted: agent output describes current/upcoming items, so a date
+    # more than ~6 months behind the reference date belongs to next year
+    year_number = reference_date.year
+    if (reference_date.month - month_number) > 6:
+        year_number += 1
+    return year_number, month_number, day_number
+
+
+def _extract_time(text: str) -> Tuple[int, int]:
+    """Find the first 12-hour clock time in text, defaulting to midnight"""
+    time_match = _TIME_RE.search(text)
+    if not time_match:
+        return 0, 0
+
+    hour = int(time_match.group(1)) % 12
+    minute = int(time_match.group(2) or 0)
+    if time_match.group(3).lower() == 'p':
+        hour += 12
+    if hour > 23 or minute > 59:
+        return 0, 0
+    return hour, minute
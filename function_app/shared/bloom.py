@@ -0,0 +1,127 @@
+"""
+Bloom filters for per-user "already seen" checks
+"""
+import math
+import base64
+import hashlib
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int = 1000, error_rate: float = 0.01,
+                 bits: Optional[np.ndarray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bits if bits is not None else np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = count
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        # Unbuffered OR: two of a key's positions can share a byte, and `bits[idx] |= ...` keeps only one
+        np.bitwise_or.at(self.bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        return bool(np.all(self.bits[positions >> 3] & (1 << (positions & 7)).astype(np.uint8)))
+
+    def contains_many(self, keys) -> np.ndarray:
+        """Membership for many keys as a boolean array"""
+        return np.fromiter((key in self for key in keys), dtype=bool, count=len(keys))
+
+    def contains_hashes(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Membership for keys given their precomputed key_hashes, in one vectorized pass"""
+        first = first % self.num_bits
+        second = second % self.num_bits
+        found = np.ones(len(first), dtype=bool)
+        for i in range(self.num_hashes):
+            positions = ((first + np.uint64(i) * second) % self.num_bits).astype(np.int64)
+            found &= (self.bits[positions >> 3] & (1 << (positions & 7)).astype(np.uint8)) != 0
+        return found
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self.count,
+            'bits': base64.b64encode(self.bits.tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'BloomFilter':
+        bits = np.frombuffer(base64.b64decode(state['bits']), dtype=np.uint8).copy()
+        return cls(state['capacity'], state['error_rate'], bits=bits, count=state.get('count', 0))
+
+    def _positions(self, key: str) -> np.ndarray:
+        first, second = _hash_pair(key)
+        return np.array([(first + i * second) % self.num_bits for i in range(self.num_hashes)], dtype=np.int64)
+
+
+class SeenFilter:
+    """
+    Two-generation Bloom filter of content a user has seen
+    When the current generation fills up it becomes the previous one, so the oldest history ages out
+    instead of the false-positive rate climbing without bound
+    """
+
+    def __init__(self, capacity: int = 1000, error_rate: float = 0.01):
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: Optional[BloomFilter] = None
+
+    def add(self, key: str) -> None:
+        if self.current.is_full:
+            self.previous = self.current
+            self.current = BloomFilter(self.current.capacity, self.current.error_rate)
+        self.current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def contains_many(self, keys) -> np.ndarray:
+        seen = self.current.contains_many(keys)
+        if self.previous is not None:
+            seen |= self.previous.contains_many(keys)
+        return seen
+
+    def contains_hashes(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        seen = self.current.contains_hashes(first, second)
+        if self.previous is not None:
+            seen |= self.previous.contains_hashes(first, second)
+        return seen
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'current': self.current.to_dict(),
+            'previous': self.previous.to_dict() if self.previous else None
+        }
+
+    @classmethod
+    def from_dict(cls, state: Optional[Dict[str, Any]]) -> 'SeenFilter':
+        seen = cls()
+        if state:
+            seen.current = BloomFilter.from_dict(state['current'])
+            seen.previous = BloomFilter.from_dict(state['previous']) if state.get('previous') else None
+        return seen
+
+
+def key_hashes(keys) -> Tuple[np.ndarray, np.ndarray]:
+    """Double-hashing seeds for many keys, reusable across filters of any size"""
+    pairs = [_hash_pair(key) for key in keys]
+    first = np.array([pair[0] for pair in pairs], dtype=np.uint64)
+    second = np.array([pair[1] for pair in pairs], dtype=np.uint64)
+    return first, second
+
+
+def _hash_pair(key: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
@@ -0,0 +1,185 @@
+"""
+Buffered bulk indexer for Azure AI Search document uploads
+"""
+import json
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+from azure.core.exceptions import AzureError, HttpResponseError
+
+# Azure AI Search accepts at most 1000 documents and 16 MB per indexing request
+MAX_BATCH_DOCUMENTS = 1000
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+# Per-document status codes worth retrying (conflict, transient validation, throttled/unavailable)
+RETRYABLE_STATUS_CODES = {409, 422, 429, 503}
+
+
+class BulkIndexer:
+    """
+    Buffers documents and uploads them in batches bounded by count, size and age
+    A background timer flushes a partial batch once it is flush_interval old, even if nothing more is added
+    """
+
+    def __init__(self, client, max_batch_size: int = MAX_BATCH_DOCUMENTS,
+                 max_batch_bytes: int = MAX_BATCH_BYTES, flush_interval: float = 5.0,
+                 max_retries: int = 3, retry_backoff: float = 0.5, action: str = 'upload'):
+        self.client = client
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_DOCUMENTS)
+        # Leave headroom for the JSON envelope around the documents
+        self.max_batch_bytes = min(max_batch_bytes, MAX_BATCH_BYTES - 64 * 1024)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.action = action
+
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_bytes = 0
+        self._oldest_buffered_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def add(self, document: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Buffer a document; returns outcomes of any flush this triggered"""
+        document_bytes = _document_size(document)
+        flushed = []
+
+        if self._buffer and self._buffer_bytes + document_bytes > self.max_batch_bytes:
+            flushed.extend(self.flush())
+
+        with self._lock:
+            self._buffer.append(document)
+            self._buffer_bytes += document_bytes
+            if self._oldest_buffered_at is None:
+                self._oldest_buffered_at = time.monotonic()
+                self._schedule_flush()
+            full = (len(self._buffer) >= self.max_batch_size or
+                    time.monotonic() - self._oldest_buffered_at >= self.flush_interval)
+
+        if full:
+            flushed.extend(self.flush())
+
+        return flushed
+
+    def add_many(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Buffer many documents; returns outcomes of any flushes this triggered"""
+        flushed = []
+        for document in documents:
+            flushed.extend(self.add(document))
+        return flushed
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Upload everything buffered and return one outcome per document"""
+        # Waits for a background flush already uploading, so results are complete when this returns
+        with self._flush_lock:
+            with self._lock:
+                batch = self._buffer
+                self._buffer = []
+                self._buffer_bytes = 0
+                self._oldest_buffered_at = None
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+
+            if not batch:
+                return []
+
+            outcomes = self._upload_batch(batch)
+            succeeded = sum(1 for outcome in outcomes if outcome['succeeded'])
+            logging.info(f"Bulk indexer flushed {len(batch)} documents: {succeeded} succeeded")
+            return outcomes
+
+    def _schedule_flush(self) -> None:
+        """Flush the batch started just now once it reaches flush_interval; callers hold _lock"""
+        timer = threading.Timer(self.flush_interval, self._background_flush)
+        timer.daemon = True
+        self._flush_timer = timer
+        timer.start()
+
+    def _background_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Background bulk index flush failed: {str(e)}")
+
+    def _upload_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upload one batch, splitting on oversize errors and retrying failed keys individually"""
+        try:
+            results = self._send(batch)
+        except HttpResponseError as e:
+            if e.status_code == 413 and len(batch) > 1:
+                middle = len(batch) // 2
+                return self._upload_batch(batch[:middle]) + self._upload_batch(batch[middle:])
+            logging.error(f"Bulk index request failed: {str(e)}")
+            return [self._record(doc['id'], False, e.status_code, str(e), 1) for doc in batch]
+        except AzureError as e:
+            logging.error(f"Bulk index request failed: {str(e)}")
+            return [self._record(doc['id'], False, None, str(e), 1) for doc in batch]
+
+        documents_by_key = {doc['id']: doc for doc in batch}
+        outcomes = []
+        for result in results:
+            if result.succeeded:
+                outcomes.append(self._record(result.key, True, result.status_code, None, 1))
+            elif result.status_code in RETRYABLE_STATUS_CODES and result.key in documents_by_key:
+                outcomes.append(self._retry_document(documents_by_key[result.key], result))
+            else:
+                logging.error(f"Failed to index {result.key}: {result.error_message}")
+                outcomes.append(self._record(result.key, False, result.status_code, result.error_message, 1))
+        return outcomes
+
+    def _retry_document(self, document: Dict[str, Any], last_result) -> Dict[str, Any]:
+        """Retry a single failed document with exponential backoff"""
+        status_code, error = last_result.status_code, last_result.error_message
+        attempt = 1
+
+        for attempt in range(2, self.max_retries + 2):
+            time.sleep(self.retry_backoff * (2 ** (attempt - 2)))
+            try:
+                result = self._send([document])[0]
+            except AzureError as e:
+                status_code, error = getattr(e, 'status_code', None), str(e)
+                continue
+
+            if result.succeeded:
+                return self._record(result.key, True, result.status_code, None, attempt)
+
+            status_code, error = result.status_code, result.error_message
+            if status_code not in RETRYABLE_STATUS_CODES:
+                break
+
+        logging.error(f"Failed to index {document['id']} after retries: {error}")
+        return self._record(document['id'], False, status_code, error, attempt)
+
+    def _send(self, batch: List[Dict[str, Any]]):
+        """Issue one indexing request for the configured action"""
+        if self.action == 'merge_or_upload':
+            return self.client.merge_or_upload_documents(batch)
+        return self.client.upload_documents(batch)
+
+    def _record(self, key: str, succeeded: bool, status_code: Optional[int],
+                error: Optional[str], attempts: int) -> Dict[str, Any]:
+        """Record and return the outcome for one document"""
+        outcome = {
+            'id': key,
+            'succeeded': succeeded,
+            'status_code': status_code,
+            'error': error,
+            'attempts': attempts
+        }
+        self.results[key] = outcome
+        return outcome
+
+
+def _document_size(document: Dict[str, Any]) -> int:
+    """Approximate serialized size of a document in bytes"""
+    return len(json.dumps(document, default=str).encode('utf-8'))
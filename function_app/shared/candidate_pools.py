@@ -0,0 +1,285 @@
+"""
+Precomputed per-location candidate pools for recommendations
+Crawls and approvals mark pools stale and the pool builder rebuilds them; requests only re-rank a small array-backed pool
+"""
+import time
+import json
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable
+
+import numpy as np
+
+from .bloom import key_hashes
+from .ranking import recency_decay, to_epoch
+
+POOL_FORMAT_VERSION = 1
+POOL_WINDOW_HOURS = 24 * 7
+POOL_FETCH_SIZE = 1000
+
+# Pools keep the best items per category so one busy category cannot crowd out the rest
+MAX_PER_CATEGORY = 50
+
+# Fields kept per item for rendering the feed
+ITEM_FIELDS = ('title', 'url', 'date', 'location', 'category')
+
+
+class CandidatePool:
+    """Candidates as parallel arrays: interned category and location codes, epochs and popularity"""
+
+    def __init__(self, location: str, items: List[Dict[str, Any]], category_codes: np.ndarray,
+                 category_names: List[str], location_codes: np.ndarray, location_names: List[str],
+                 epochs: np.ndarray, popularity: np.ndarray, built_at: float, version: str):
+        self.location = location
+        self.items = items
+        self.ids = [item['id'] for item in items]
+        self.category_codes = category_codes
+        self.category_names = category_names
+        self.location_codes = location_codes
+        self.location_names = location_names
+        self.epochs = epochs
+        self.popularity = popularity
+        self.built_at = built_at
+        self.version = version
+        self._id_hashes = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def id_hashes(self):
+        """Bloom filter hash seeds for every id, computed once per pool rather than per request"""
+        if self._id_hashes is None:
+            self._id_hashes = key_hashes(self.ids)
+        return self._id_hashes
+
+    @classmethod
+    def build(cls, location: str, documents: Iterable[Dict[str, Any]],
+              engagement_scores: Optional[Dict[str, float]] = None,
+              max_per_category: int = MAX_PER_CATEGORY, now: Optional[float] = None) -> 'CandidatePool':
+        """Pre-score documents, with popularity from each id's engagement score, and keep the best per category"""
+        now = now if now is not None else time.time()
+        unique: Dict[str, Dict[str, Any]] = {}
+        for document in documents:
+            unique.setdefault(document['id'], document)
+        documents = list(unique.values())
+
+        category_names: List[str] = []
+        location_names: List[str] = []
+        category_codes = np.array([_intern(category_names, (doc.get('category') or '').lower())
+                                   for doc in documents], dtype=np.uint16)
+        location_codes = np.array([_intern(location_names, doc.get('location') or '')
+                                   for doc in documents], dtype=np.uint16)
+        epochs = np.array([to_epoch(doc.get('date')) for doc in documents], dtype=np.float64)
+        engagement_scores = engagement_scores or {}
+        engagement = np.array([engagement_scores.get(doc['id'], 0.0) for doc in documents], dtype=np.float64)
+        popularity = (1.0 + 0.1 * np.log1p(np.clip(engagement, 0.0, None))).astype(np.float32)
+
+        # Order by category, then by score at build time, and keep the head of each category
+        prescore = recency_decay(epochs, now) * popularity
+        order = np.lexsort((-prescore, category_codes))
+        keep = []
+        for code in range(len(category_names)):
+            rows = order[category_codes[order] == code]
+            keep.extend(rows[:max_per_category].tolist())
+        keep = np.array(keep, dtype=np.int64)
+
+        items = [{'id': documents[row]['id'], **{field: documents[row].get(field) for field in ITEM_FIELDS}}
+                 for row in keep]
+        version = _pool_version(location, [item['id'] for item in items])
+
+        return cls(location, items, category_codes[keep], category_names, location_codes[keep],
+                   location_names, epochs[keep], popularity[keep], now, version)
+
+    @classmethod
+    def concat(cls, pools: List['CandidatePool']) -> 'CandidatePool':
+        """Merge pools (e.g. primary and additional locations), keeping each id's first occurrence"""
+        items, category_names, location_names = [], [], []
+        category_codes, location_codes, epochs, popularity = [], [], [], []
+        seen = set()
+
+        for pool in pools:
+            category_map = np.array([_intern(category_names, name) for name in pool.category_names] or [0],
+                                    dtype=np.uint16)
+            location_map = np.array([_intern(location_names, name) for name in pool.location_names] or [0],
+                                    dtype=np.uint16)
+            keep = [row for row, item_id in enumerate(pool.ids) if item_id not in seen]
+            seen.update(pool.ids)
+            if not keep:
+                continue
+
+            items.extend(pool.items[row] for row in keep)
+            category_codes.append(category_map[pool.category_codes[keep]])
+            location_codes.append(location_map[pool.location_codes[keep]])
+            epochs.append(pool.epochs[keep])
+            popularity.append(pool.popularity[keep])
+
+        location = pools[0].location if pools else ''
+        return cls(
+            location, items,
+            np.concatenate(category_codes) if category_codes else np.zeros(0, dtype=np.uint16),
+            category_names,
+            np.concatenate(location_codes) if location_codes else np.zeros(0, dtype=np.uint16),
+            location_names,
+            np.concatenate(epochs) if epochs else np.zeros(0, dtype=np.float64),
+            np.concatenate(popularity) if popularity else np.zeros(0, dtype=np.float32),
+            min((pool.built_at for pool in pools), default=time.time()),
+            '+'.join(pool.version for pool in pools)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'format': POOL_FORMAT_VERSION,
+            'location': self.location,
+            'version': self.version,
+            'built_at': self.built_at,
+            'items': self.items,
+            'category_names': self.category_names,
+            'location_names': self.location_names,
+            'category_codes': _encode_array(self.category_codes, '<u2'),
+            'location_codes': _encode_array(self.location_codes, '<u2'),
+            'epochs': _encode_array(self.epochs, '<f8'),
+            'popularity': _encode_array(self.popularity, '<f4')
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'CandidatePool':
+        return cls(
+            state['location'], state['items'],
+            _decode_array(state['category_codes'], '<u2'), state['category_names'],
+            _decode_array(state['location_codes'], '<u2'), state['location_names'],
+            _decode_array(state['epochs'], '<f8'), _decode_array(state['popularity'], '<f4'),
+            state['built_at'], state['version']
+        )
+
+
+class CandidatePoolStore:
+    """Reads pools from the storage backend through a short-lived in-process cache"""
+
+    def __init__(self, storage_client, ttl_seconds: float = 60.0, max_entries: int = 256):
+        self.storage_client = storage_client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, location: str) -> Optional[CandidatePool]:
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(location)
+                return entry[1]
+
+        state = self.storage_client.get_candidate_pool(location)
+        pool = CandidatePool.from_dict(state) if state else None
+        self._put(location, pool)
+        return pool
+
+    def versions(self, locations: List[str]) -> Dict[str, Optional[str]]:
+        """Current pool version per location"""
+        versions = {}
+        for location in locations:
+            pool = self.get(location)
+            versions[location] = pool.version if pool else None
+        return versions
+
+    def rebuild(self, location: str, vector_client) -> Optional[CandidatePool]:
+        """Rebuild and persist one location's pool from the vector index"""
+        from .engagement_aggregator import content_engagement_score
+
+        documents = vector_client.get_recent_content(location, hours=POOL_WINDOW_HOURS, top=POOL_FETCH_SIZE)
+        records = self.storage_client.get_content_engagement_many([document['id'] for document in documents])
+        scores = {content_id: content_engagement_score(record) for content_id, record in records.items()}
+        pool = CandidatePool.build(location, documents, scores)
+        if not self.storage_client.store_candidate_pool(location, pool.to_dict()):
+            return None
+        self._put(location, pool)
+        logging.info(f"Rebuilt candidate pool for {location}: {len(pool)} items, version {pool.version}")
+        return pool
+
+    def _put(self, key: str, pool: Optional[CandidatePool]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, pool)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Process-wide store, shared across invocations on a warm worker
+_pool_store = None
+
+
+def get_candidate_pool_store() -> CandidatePoolStore:
+    """Get the process-wide candidate pool store on the configured storage backend"""
+    global _pool_store
+    if _pool_store is None:
+        from .storage_backend import get_storage_client
+
+        _pool_store = CandidatePoolStore(get_storage_client())
+    return _pool_store
+
+
+def mark_candidate_pools_stale(locations: Iterable[str]) -> bool:
+    """Queue locations for the pool builder's next run; failures are logged and reported, never raised"""
+    from .storage_backend import get_storage_client, storage_configured
+
+    locations = sorted({location for location in locations if location})
+    if not locations or not storage_configured():
+        return False
+
+    try:
+        return get_storage_client().mark_candidate_pools_stale(locations)
+    except Exception as e:
+        logging.warning(f"Failed to mark candidate pools stale: {str(e)}")
+        return False
+
+
+def rebuild_candidate_pools(locations: Iterable[str]) -> Dict[str, bool]:
+    """Rebuild pools for the given locations; failures are logged and reported, never raised"""
+    from .vector_client import create_vector_client
+    from .storage_backend import storage_configured
+    from .recommendations import recommendations_configured
+
+    outcomes = {}
+    locations = sorted({location for location in locations if location})
+    if not locations or not (storage_configured() and recommendations_configured()):
+        return outcomes
+
+    try:
+        store = get_candidate_pool_store()
+        vector_client = create_vector_client()
+    except Exception as e:
+        logging.warning(f"Candidate pool rebuild unavailable: {str(e)}")
+        return {location: False for location in locations}
+
+    for location in locations:
+        try:
+            outcomes[location] = store.rebuild(location, vector_client) is not None
+        except Exception as e:
+            logging.error(f"Failed to rebuild candidate pool for {location}: {str(e)}")
+            outcomes[location] = False
+    return outcomes
+
+
+def _intern(names: List[str], value: str) -> int:
+    try:
+        return names.index(value)
+    except ValueError:
+        names.append(value)
+        return len(names) - 1
+
+
+# Derived from the ranked ids alone, so rebuilding an unchanged pool keeps cached feeds and ETags valid
+def _pool_version(location: str, ids: List[str]) -> str:
+    return hashlib.sha1(json.dumps([location, ids]).encode('utf-8')).hexdigest()[:16]
+
+
+def _encode_array(values: np.ndarray, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _decode_array(encoded: str, dtype: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype=dtype).copy()
@@ -0,0 +1,304 @@
+"""
+Request unit and latency instrumentation for Cosmos DB operations
+Every container call is attributed to the storage method that issued it and aggregated into histograms
+"""
+import time
+import bisect
+import functools
+import inspect
+import threading
+import contextvars
+from typing import Dict, Any, List, Optional, Callable
+
+# Process-wide registry, shared across invocations on a warm worker
+_metrics = None
+
+# Storage method currently issuing Cosmos calls (set by @track_method)
+_current_method: contextvars.ContextVar = contextvars.ContextVar('cosmos_method', default='unattributed')
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+CHARGE_BUCKETS_RU = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+# Cap per-method partition tracking so unbounded keys (e.g. URLs) cannot grow memory
+MAX_TRACKED_PARTITIONS = 100
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket containing the given fraction of observations"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': {
+                (f"le_{bound}" if index < len(self.bounds) else "inf"): count
+                for index, (bound, count) in enumerate(zip(self.bounds + [None], self.counts))
+            }
+        }
+
+
+class MethodStats:
+    """Aggregates for one (storage method, container, operation)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.items = 0
+        self.request_charge = Histogram(CHARGE_BUCKETS_RU)
+        self.server_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.client_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.partitions: Dict[str, float] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        hot_partitions = sorted(self.partitions.items(), key=lambda entry: entry[1], reverse=True)[:10]
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'items': self.items,
+            'total_request_charge': round(self.request_charge.total, 3),
+            'request_charge': self.request_charge.to_dict(),
+            'server_ms': self.server_ms.to_dict(),
+            'client_ms': self.client_ms.to_dict(),
+            'hot_partitions': [{'partition': key, 'request_charge': round(charge, 3)}
+                               for key, charge in hot_partitions]
+        }
+
+
+class CosmosMetrics:
+    """Thread-safe registry of per-method Cosmos request statistics"""
+
+    def __init__(self):
+        self._stats: Dict[str, MethodStats] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, method: str, container: str, operation: str, request_charge: float = 0.0,
+               server_ms: Optional[float] = None, client_ms: Optional[float] = None,
+               item_count: int = 0, partition: Optional[str] = None, error: bool = False) -> None:
+        key = f"{method}:{container}.{operation}"
+        with self._lock:
+            stats = self._stats.setdefault(key, MethodStats())
+            stats.calls += 1
+            stats.errors += 1 if error else 0
+            stats.items += item_count
+            stats.request_charge.observe(request_charge)
+            if server_ms is not None:
+                stats.server_ms.observe(server_ms)
+            if client_ms is not None:
+                stats.client_ms.observe(client_ms)
+            if partition is not None and (partition in stats.partitions or
+                                          len(stats.partitions) < MAX_TRACKED_PARTITIONS):
+                stats.partitions[partition] = stats.partitions.get(partition, 0.0) + request_charge
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Export all aggregates, most expensive first"""
+        with self._lock:
+            methods = {key: stats.to_dict() for key, stats in self._stats.items()}
+        ordered = dict(sorted(methods.items(), key=lambda entry: entry[1]['total_request_charge'], reverse=True))
+        return {
+            'since': self.started_at,
+            'total_request_charge': round(sum(entry['total_request_charge'] for entry in ordered.values()), 3),
+            'methods': ordered
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+
+class InstrumentedContainer:
+    """Container proxy that records charge, latency, item count and partition for each call"""
+
+    POINT_OPERATIONS = ('read_item', 'create_item', 'upsert_item', 'replace_item', 'patch_item',
+                        'delete_item', 'execute_item_batch')
+    PAGED_OPERATIONS = ('query_items', 'read_all_items', 'query_items_change_feed')
+
+    def __init__(self, container, metrics: 'CosmosMetrics', partition_path: str):
+        self._container = container
+        self._metrics = metrics
+        self._partition_field = partition_path.strip('/')
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._container, name)
+        if name in self.POINT_OPERATIONS:
+            return functools.partial(self._point_call, name, attribute)
+        if name in self.PAGED_OPERATIONS:
+            return functools.partial(self._paged_call, name, attribute)
+        return attribute
+
+    def _point_call(self, operation: str, call: Callable, *args, **kwargs):
+        method = _current_method.get()
+        partition = self._partition_of(kwargs, args)
+        captured: Dict[str, Any] = {}
+        kwargs['response_hook'] = _chain_hook(kwargs.get('response_hook'), captured)
+
+        started = time.perf_counter()
+        try:
+            result = call(*args, **kwargs)
+        except Exception:
+            self._record(method, operation, captured, started, partition, error=True)
+            raise
+
+        item_count = len(result) if operation == 'execute_item_batch' else 1
+        self._record(method, operation, captured, started, partition, item_count=item_count)
+        return result
+
+    def _paged_call(self, operation: str, call: Callable, *args, **kwargs):
+        # Pages are fetched lazily as results are consumed, so each fetch is timed and recorded as it happens
+        method = _current_method.get()
+        partition = self._partition_of(kwargs, args)
+        captured: Dict[str, Any] = {}
+        kwargs['response_hook'] = _chain_hook(kwargs.get('response_hook'), captured)
+
+        def record_page(started: float, error: bool = False) -> None:
+            if 'headers' not in captured and not error:
+                return
+            item_count = int(_header_float(captured.get('headers'), 'x-ms-item-count') or 0)
+            self._record(method, operation, captured, started, partition, item_count=item_count, error=error)
+            captured.pop('headers', None)
+
+        started = time.perf_counter()
+        try:
+            pager = call(*args, **kwargs)
+        except Exception:
+            record_page(started, error=True)
+            raise
+        return _TimedPages(pager, record_page)
+
+    def _record(self, method: str, operation: str, captured: Dict[str, Any], started: float,
+                partition: Optional[str], item_count: int = 0, error: bool = False) -> None:
+        headers = captured.get('headers') or {}
+        self._metrics.record(
+            method, self._container.id, operation,
+            request_charge=_header_float(headers, 'x-ms-request-charge') or 0.0,
+            server_ms=_header_float(headers, 'x-ms-request-duration-ms'),
+            client_ms=(time.perf_counter() - started) * 1000.0,
+            item_count=item_count,
+            partition=partition,
+            error=error
+        )
+
+    def _partition_of(self, kwargs: Dict[str, Any], args: tuple) -> Optional[str]:
+        if kwargs.get('partition_key') is not None:
+            return str(kwargs['partition_key'])
+        body = kwargs.get('body') or (args[0] if args and isinstance(args[0], dict) else None)
+        if isinstance(body, dict) and body.get(self._partition_field) is not None:
+            return str(body[self._partition_field])
+        return None
+
+
+class _TimedPages:
+    """Pager proxy that records every page fetch it triggers, with client latency and errors"""
+
+    def __init__(self, pager, record_page: Callable):
+        self._pager = pager
+        self._record_page = record_page
+
+    def __getattr__(self, name: str):
+        return getattr(self._pager, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            result = next(self._pager)
+        except StopIteration:
+            self._record_page(started)
+            raise
+        except Exception:
+            self._record_page(started, error=True)
+            raise
+        self._record_page(started)
+        return result
+
+    def by_page(self, continuation_token: Optional[str] = None) -> '_TimedPages':
+        return _TimedPages(self._pager.by_page(continuation_token), self._record_page)
+
+
+def track_method(fn: Callable) -> Callable:
+    """Attribute Cosmos calls made inside a storage method (or generator) to that method"""
+    name = fn.__name__
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            generator = fn(*args, **kwargs)
+            while True:
+                token = _current_method.set(name)
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    _current_method.reset(token)
+                yield item
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current_method.set(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_method.reset(token)
+    return wrapper
+
+
+def _chain_hook(user_hook: Optional[Callable], captured: Dict[str, Any]) -> Callable:
+    def hook(headers, result):
+        captured['headers'] = headers
+        if user_hook:
+            user_hook(headers, result)
+    return hook
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name) if headers else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def get_cosmos_metrics() -> CosmosMetrics:
+    """Get the process-wide Cosmos metrics registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = CosmosMetrics()
+    return _metrics
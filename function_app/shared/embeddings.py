@@ -0,0 +1,175 @@
+"""
+Embedding generation for the crawl-to-index pipeline
+Batches texts per request and caches vectors by content hash
+"""
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Process-wide pipeline, shared across invocations on a warm worker
+_pipeline = None
+
+
+class LocalHashEmbedder:
+    """Deterministic feature-hashing embedder for offline use and tests"""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.model_name = f"local-hash-{dimensions}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts by hashing word and character-trigram features into a signed vector"""
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens + [token[i:i + 3] for token in tokens if len(token) > 3
+                                 for i in range(len(token) - 2)]
+            for feature in features:
+                # blake2b rather than hash() so vectors are stable across processes
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+
+class AzureOpenAIEmbedder:
+    """Embedder backed by an Azure OpenAI embeddings deployment"""
+
+    def __init__(self, deployment: Optional[str] = None, dimensions: int = 256):
+        from .foundry_client import FoundryClient
+
+        self.client = FoundryClient()
+        self.deployment = deployment or os.environ.get('AZURE_OPENAI_EMBEDDING_DEPLOYMENT',
+                                                       'text-embedding-3-small')
+        self.dimensions = dimensions
+        self.model_name = f"{self.deployment}-{dimensions}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one request"""
+        result = self.client.call_embeddings(texts, self.deployment, self.dimensions)
+        data = sorted(result.get('data', []), key=lambda item: item['index'])
+        if len(data) != len(texts):
+            raise Exception(f"Embeddings response returned {len(data)} vectors for {len(texts)} inputs")
+        return [item['embedding'] for item in data]
+
+
+class EmbeddingCache:
+    """Bounded LRU of embedding vectors keyed by content hash"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class EmbeddingPipeline:
+    """Embeds texts in batches, never embedding the same content twice"""
+
+    def __init__(self, embedder, cache: Optional[EmbeddingCache] = None, batch_size: int = 64):
+        self.embedder = embedder
+        self.cache = cache or EmbeddingCache()
+        self.batch_size = batch_size
+
+    @property
+    def dimensions(self) -> int:
+        return self.embedder.dimensions
+
+    def content_hash(self, text: str) -> str:
+        """Cache key: the embedding model plus a hash of the exact text"""
+        return hashlib.sha256(f"{self.embedder.model_name}\n{text}".encode('utf-8')).hexdigest()
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, serving unchanged content from the cache and batching the rest"""
+        keys = [self.content_hash(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        pending: Dict[str, str] = {}
+
+        for key, text in zip(keys, texts):
+            if key in vectors or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                pending[key] = text
+
+        pending_items = list(pending.items())
+        for start in range(0, len(pending_items), self.batch_size):
+            batch = pending_items[start:start + self.batch_size]
+            embedded = self.embedder.embed([text for _, text in batch])
+            for (key, _), vector in zip(batch, embedded):
+                self.cache.put(key, vector)
+                vectors[key] = vector
+
+        if pending:
+            logging.info(f"Embedded {len(pending)} new texts ({len(texts) - len(pending)} served from cache)")
+
+        return [vectors[key] for key in keys]
+
+    def embed_documents(self, documents: List[Dict[str, Any]],
+                        field: str = 'content_vector') -> List[Dict[str, Any]]:
+        """Return copies of index documents with an embedding of title + content"""
+        texts = [document_text(document) for document in documents]
+        vectors = self.embed_texts(texts)
+        return [dict(document, **{field: vector}) for document, vector in zip(documents, vectors)]
+
+
+def document_text(document: Dict[str, Any]) -> str:
+    """Text embedded for an index document"""
+    return f"{document.get('title', '')}\n{document.get('content', '')}".strip()
+
+
+def get_embedding_pipeline() -> Optional[EmbeddingPipeline]:
+    """
+    Get the configured process-wide embedding pipeline
+    EMBEDDING_BACKEND=azure uses the Azure OpenAI deployment, =local the deterministic hash embedder
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+
+    backend = os.environ.get('EMBEDDING_BACKEND', '').lower()
+    dimensions = int(os.environ.get('EMBEDDING_DIMENSIONS', 256))
+
+    if backend == 'azure':
+        embedder = AzureOpenAIEmbedder(dimensions=dimensions)
+    elif backend == 'local':
+        embedder = LocalHashEmbedder(dimensions=dimensions)
+    else:
+        return None
+
+    _pipeline = EmbeddingPipeline(embedder)
+    logging.info(f"Initialized embedding pipeline with {embedder.model_name}")
+    return _pipeline
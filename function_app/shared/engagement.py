@@ -0,0 +1,122 @@
+"""
+Incremental engagement scoring with exponentially decayed running aggregates
+Each interaction updates the profile in O(1) instead of rescanning its interaction history
+"""
+from typing import Dict, Any, List, Optional
+
+from .interaction_log import InteractionLog
+
+# Per-action weights for the engagement score
+ACTION_WEIGHTS = {
+    'view': 1.0,
+    'save': 3.0,
+    'share': 4.0,
+    'like': 2.0,
+    'dismiss': -1.0
+}
+
+# Per-action contribution to category interest
+INTEREST_WEIGHTS = {
+    'save': 2.0,
+    'share': 2.0,
+    'like': 2.0,
+    'view': 1.0,
+    'dismiss': -1.0
+}
+
+# Effective window sizes, in interactions, matching the previous "last N" scans
+SCORE_SPAN = 100
+INTEREST_SPAN = 50
+
+SCORE_DECAY = 1.0 - 1.0 / SCORE_SPAN
+INTEREST_DECAY = 1.0 - 1.0 / INTEREST_SPAN
+
+
+def interaction_score(action: Optional[str], engagement_time: float = 0) -> float:
+    """Score of one interaction: action weight scaled up by time spent, capped at 3x for 60+ seconds"""
+    weight = ACTION_WEIGHTS.get(action or 'view', 1.0)
+    time_multiplier = min((engagement_time or 0) / 30.0, 2.0)
+    return weight * (1 + time_multiplier)
+
+
+class EngagementAggregates:
+    """
+    Decayed engagement state stored on a user profile
+    Decay is counted in interactions; categories decay lazily from the event count at their last update
+    """
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.events = state.get('events', 0)
+        self.score_sum = state.get('score_sum', 0.0)
+        self.score_weight = state.get('score_weight', 0.0)
+        self.categories: Dict[str, Dict[str, float]] = state.get('categories', {})
+        self.last_interaction_at = state.get('last_interaction_at')
+
+    @classmethod
+    def from_profile(cls, profile: Dict[str, Any]) -> 'EngagementAggregates':
+        """Load aggregates from a profile, replaying its stored interactions once if they are missing"""
+        if profile.get('engagement'):
+            return cls(profile['engagement'])
+        if profile.get('interaction_log'):
+            return cls.bootstrap(InteractionLog.from_dict(profile['interaction_log']).to_records())
+        return cls.bootstrap(profile.get('interaction_history', []))
+
+    @classmethod
+    def bootstrap(cls, interactions: List[Dict[str, Any]]) -> 'EngagementAggregates':
+        """Build aggregates by replaying a stored interaction history in order"""
+        aggregates = cls()
+        for interaction in interactions:
+            aggregates.record(interaction)
+        return aggregates
+
+    def record(self, interaction: Dict[str, Any]) -> None:
+        """Fold one interaction into the aggregates in constant time"""
+        action = interaction.get('action', 'view')
+
+        self.score_sum = self.score_sum * SCORE_DECAY + interaction_score(
+            action, interaction.get('engagement_time', 0))
+        self.score_weight = self.score_weight * SCORE_DECAY + 1.0
+        self.events += 1
+        self.last_interaction_at = interaction.get('timestamp', self.last_interaction_at)
+
+        category = interaction.get('category')
+        if category:
+            entry = self.categories.get(category)
+            value = self._decayed(entry) if entry else 0.0
+            self.categories[category] = {
+                'value': value + INTEREST_WEIGHTS.get(action, 0.0),
+                'event': self.events
+            }
+
+    def score(self) -> float:
+        """Decayed mean interaction score; 0.0 before any interaction"""
+        return self.score_sum / self.score_weight if self.score_weight else 0.0
+
+    def category_scores(self) -> Dict[str, float]:
+        """Current decayed interest per category"""
+        return {category: self._decayed(entry) for category, entry in self.categories.items()}
+
+    def top_interests(self, limit: int = 5) -> List[str]:
+        """Highest positively scored categories"""
+        ranked = sorted(self.category_scores().items(), key=lambda item: item[1], reverse=True)
+        return [category for category, value in ranked[:limit] if value > 0]
+
+    def prune(self, min_value: float = 0.01) -> None:
+        """Drop categories whose interest has decayed to noise, keeping the document small"""
+        self.categories = {
+            category: entry for category, entry in self.categories.items()
+            if abs(self._decayed(entry)) >= min_value
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'score_sum': self.score_sum,
+            'score_weight': self.score_weight,
+            'categories': self.categories,
+            'last_interaction_at': self.last_interaction_at
+        }
+
+    def _decayed(self, entry: Dict[str, float]) -> float:
+        return entry['value'] * INTEREST_DECAY ** (self.events - entry['event'])
@@ -0,0 +1,350 @@
+"""
+Streaming engagement aggregation per (content_id, spread level)
+Interaction events are folded into time-bucketed HyperLogLog sketches of unique and engaged users as they
+arrive, so spread decisions read a snapshot in O(1) instead of scanning user profiles
+"""
+import os
+import math
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from .engagement import ACTION_WEIGHTS
+from .hyperloglog import HyperLogLog
+from .ranking import to_epoch
+from .viral_spread import SPREAD_LEVELS
+
+WINDOW_HOURS = 24
+BUCKET_HOURS = 4
+
+# Actions that count a user as engaged; long views count too
+ENGAGED_ACTIONS = {'save', 'share', 'like'}
+ENGAGED_VIEW_SECONDS = 30
+
+DEFAULT_MAX_ENTRIES = 5000
+
+# Events are written behind: after this long, or at once when this many items have unwritten events
+FLUSH_INTERVAL_SECONDS = 30.0
+FLUSH_BATCH_SIZE = 200
+
+# Conditional writes retried per flush when another worker wrote the same item first
+FLUSH_ATTEMPTS = 3
+
+
+class ContentEngagement:
+    """Windowed sketches and action counts for one content item across its spread levels"""
+
+    def __init__(self, content_id: str, record: Optional[Dict[str, Any]] = None):
+        record = record or {}
+        self.content_id = content_id
+        self.origin_location = record.get('origin_location')
+        self.level = record.get('level', SPREAD_LEVELS[0])
+        self.buckets: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.pending: Dict[Tuple[str, int, str], int] = {}
+        self.revision = 0
+        self.dirty = False
+        self.merge_stored(record)
+
+    def merge_stored(self, record: Dict[str, Any]) -> None:
+        """Fold persisted sketches in (idempotent) and take the stored action counts as the base"""
+        for level, buckets in (record.get('sketches') or {}).items():
+            for bucket, state in buckets.items():
+                entry = self._bucket(level, int(bucket))
+                entry['total'].merge(HyperLogLog.from_dict(state['total']))
+                entry['engaged'].merge(HyperLogLog.from_dict(state['engaged']))
+                entry['actions'] = dict(state.get('actions') or {})
+        if record.get('level'):
+            self.level = record['level']
+        self.origin_location = self.origin_location or record.get('origin_location')
+
+    def record(self, user_id: str, interaction: Dict[str, Any], level: str, bucket: int) -> None:
+        action = interaction.get('action') or 'view'
+        entry = self._bucket(level, bucket)
+        entry['total'].add(user_id)
+        if action in ENGAGED_ACTIONS or (action == 'view' and
+                                         (interaction.get('engagement_time') or 0) >= ENGAGED_VIEW_SECONDS):
+            entry['engaged'].add(user_id)
+
+        key = (level, bucket, action)
+        self.pending[key] = self.pending.get(key, 0) + 1
+        if level == SPREAD_LEVELS[0] and not self.origin_location:
+            self.origin_location = interaction.get('location')
+        self.revision += 1
+        self.dirty = True
+
+    def snapshot(self, level: str, oldest_bucket: int) -> Dict[str, Any]:
+        total = HyperLogLog()
+        engaged = HyperLogLog()
+        actions: Dict[str, int] = {}
+        for (entry_level, bucket), entry in self.buckets.items():
+            if entry_level != level or bucket < oldest_bucket:
+                continue
+            total.merge(entry['total'])
+            engaged.merge(entry['engaged'])
+            for action, count in entry['actions'].items():
+                actions[action] = actions.get(action, 0) + count
+        for (entry_level, bucket, action), count in self.pending.items():
+            if entry_level == level and bucket >= oldest_bucket:
+                actions[action] = actions.get(action, 0) + count
+
+        total_users = total.count()
+        # Sketch error can put engaged slightly above total; engaged users are a subset
+        engaged_users = min(engaged.count(), total_users)
+        return {
+            'content_id': self.content_id,
+            'level': level,
+            'total_users': total_users,
+            'engaged_users': engaged_users,
+            'views': actions.get('view', 0),
+            'saves': actions.get('save', 0),
+            'shares': actions.get('share', 0),
+            'likes': actions.get('like', 0),
+            'dismissals': actions.get('dismiss', 0),
+            'engagement_rate': engaged_users / total_users if total_users else 0.0
+        }
+
+    def to_record(self, oldest_bucket: int, etag: Optional[str] = None) -> Dict[str, Any]:
+        """Persistable record, conditional on `etag` (the stored version merged in); out-of-window buckets drop"""
+        self.buckets = {key: entry for key, entry in self.buckets.items() if key[1] >= oldest_bucket}
+        self.pending = {key: count for key, count in self.pending.items() if key[1] >= oldest_bucket}
+
+        sketches: Dict[str, Dict[str, Any]] = {}
+        for (level, bucket), entry in self.buckets.items():
+            actions = dict(entry['actions'])
+            for (pending_level, pending_bucket, action), count in self.pending.items():
+                if (pending_level, pending_bucket) == (level, bucket):
+                    actions[action] = actions.get(action, 0) + count
+            sketches.setdefault(level, {})[str(bucket)] = {
+                'total': entry['total'].to_dict(),
+                'engaged': entry['engaged'].to_dict(),
+                'actions': actions
+            }
+
+        levels = {level: self.snapshot(level, oldest_bucket) for level in sketches}
+        return {
+            'content_id': self.content_id,
+            'origin_location': self.origin_location,
+            'level': self.level,
+            'levels': {
+                level: {key: stats[key] for key in ('total_users', 'engaged_users', 'views', 'saves', 'shares', 'likes')}
+                for level, stats in levels.items()
+            },
+            'sketches': sketches,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            '_etag': etag
+        }
+
+    def mark_flushed(self, record: Dict[str, Any], sent: Dict[Tuple[str, int, str], int], revision: int) -> None:
+        """Stored counts now include the deltas that were sent; events recorded since stay pending"""
+        for level, buckets in record['sketches'].items():
+            for bucket, state in buckets.items():
+                self._bucket(level, int(bucket))['actions'] = dict(state['actions'])
+        for key, count in sent.items():
+            remaining = self.pending.get(key, 0) - count
+            if remaining > 0:
+                self.pending[key] = remaining
+            else:
+                self.pending.pop(key, None)
+        self.dirty = self.revision != revision
+
+    def _bucket(self, level: str, bucket: int) -> Dict[str, Any]:
+        entry = self.buckets.get((level, bucket))
+        if entry is None:
+            entry = {'total': HyperLogLog(), 'engaged': HyperLogLog(), 'actions': {}}
+            self.buckets[(level, bucket)] = entry
+        return entry
+
+
+class EngagementAggregator:
+    """Consumes interaction events and serves windowed engagement snapshots per content and level"""
+
+    def __init__(self, storage_client=None, window_hours: int = WINDOW_HOURS,
+                 bucket_hours: int = BUCKET_HOURS, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, flush_batch_size: int = FLUSH_BATCH_SIZE):
+        self.storage_client = storage_client
+        self.window_hours = window_hours
+        self.bucket_seconds = bucket_hours * 3600
+        self.window_buckets = max(1, window_hours // bucket_hours)
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._entries: "OrderedDict[str, ContentEngagement]" = OrderedDict()
+        self._dirty: set = set()
+        self._lock = threading.RLock()
+        # Storage I/O happens outside _lock; this only keeps flushes from overlapping
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_due = 0.0
+
+    def record(self, user_id: str, interaction: Dict[str, Any]) -> bool:
+        """Fold one interaction in; events without a user or content id are ignored"""
+        content_id = interaction.get('original_content_id') or interaction.get('content_id')
+        if not user_id or not content_id:
+            return False
+
+        epoch = to_epoch(interaction.get('timestamp'))
+        bucket = int((time.time() if math.isnan(epoch) else epoch) // self.bucket_seconds)
+        state = self._state(content_id)
+        with self._lock:
+            # Re-attach in case the entry was evicted while it was being loaded
+            state = self._entries.setdefault(content_id, state)
+            level = interaction.get('level') if interaction.get('level') in SPREAD_LEVELS else state.level
+            state.record(user_id, interaction, level, bucket)
+            self._dirty.add(content_id)
+            self._schedule_flush()
+        return True
+
+    def record_many(self, events: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Fold (user_id, interaction) pairs in; returns how many were counted"""
+        return sum(self.record(user_id, interaction) for user_id, interaction in events)
+
+    def snapshot(self, content_id: str, level: Optional[str] = None) -> Dict[str, Any]:
+        """Engagement over the window for a content item at a level (its current level by default)"""
+        state = self._state(content_id)
+        with self._lock:
+            snapshot = state.snapshot(level or state.level, self._oldest_bucket())
+        snapshot['window_hours'] = self.window_hours
+        return snapshot
+
+    def flush(self) -> int:
+        """
+        Persist every content item with new events, merging with what other workers stored
+        Writes are conditional on the version that was merged, so concurrent flushes never lose increments
+        and a level advanced by the spread batch is kept
+        """
+        if self.storage_client is None:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                remaining = [self._entries[content_id] for content_id in self._dirty if content_id in self._entries]
+            total = len(remaining)
+            flushed = 0
+
+            for _ in range(FLUSH_ATTEMPTS):
+                if not remaining:
+                    break
+                stored = {state.content_id: self.storage_client.get_content_engagement(state.content_id)
+                          for state in remaining}
+
+                with self._lock:
+                    oldest = self._oldest_bucket()
+                    writes = []
+                    for state in remaining:
+                        record = stored[state.content_id]
+                        if record:
+                            state.merge_stored(record)
+                        writes.append((state, state.to_record(oldest, (record or {}).get('_etag')),
+                                       dict(state.pending), state.revision))
+
+                outcomes = self.storage_client.store_content_engagement([write[1] for write in writes])
+
+                with self._lock:
+                    remaining = []
+                    for state, record, sent, revision in writes:
+                        if not outcomes.get(state.content_id):
+                            remaining.append(state)
+                            continue
+                        state.mark_flushed(record, sent, revision)
+                        flushed += 1
+                        if not state.dirty:
+                            self._dirty.discard(state.content_id)
+                    self._evict()
+
+            with self._lock:
+                if self._dirty:
+                    self._schedule_flush()
+
+        if total:
+            logging.info(f"Flushed engagement for {flushed}/{total} content items")
+        return flushed
+
+    def _state(self, content_id: str) -> ContentEngagement:
+        """Tracked state for a content item, loading its stored record outside the lock on a miss"""
+        with self._lock:
+            state = self._entries.get(content_id)
+            if state is not None:
+                self._entries.move_to_end(content_id)
+                return state
+
+        record = self.storage_client.get_content_engagement(content_id) if self.storage_client else None
+        with self._lock:
+            state = self._entries.get(content_id)
+            if state is None:
+                state = ContentEngagement(content_id, record)
+                self._entries[content_id] = state
+                self._evict()
+            self._entries.move_to_end(content_id)
+            return state
+
+    def _schedule_flush(self) -> None:
+        """Flush in the background, at once if enough items are dirty; callers hold _lock"""
+        if self.storage_client is None:
+            return
+        delay = 0.0 if len(self._dirty) >= self.flush_batch_size else self.flush_interval
+        if self._flush_timer is not None:
+            if self._flush_due <= time.monotonic() + delay:
+                return
+            self._flush_timer.cancel()
+
+        timer = threading.Timer(delay, self._background_flush)
+        timer.daemon = True
+        self._flush_timer = timer
+        self._flush_due = time.monotonic() + delay
+        timer.start()
+
+    def _background_flush(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Background engagement flush failed: {str(e)}")
+
+    def _evict(self) -> None:
+        """Drop least recently used items that have nothing pending"""
+        excess = len(self._entries) - self.max_entries
+        for content_id in list(self._entries):
+            if excess <= 0:
+                break
+            if not self._entries[content_id].dirty:
+                del self._entries[content_id]
+                excess -= 1
+
+    def _oldest_bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds) - self.window_buckets + 1
+
+
+def content_engagement_score(record: Optional[Dict[str, Any]]) -> float:
+    """Action-weighted engagement of a stored record over its window, summed across spread levels"""
+    score = 0.0
+    for stats in ((record or {}).get('levels') or {}).values():
+        score += (ACTION_WEIGHTS['view'] * stats.get('views', 0) + ACTION_WEIGHTS['save'] * stats.get('saves', 0) +
+                  ACTION_WEIGHTS['share'] * stats.get('shares', 0) + ACTION_WEIGHTS['like'] * stats.get('likes', 0))
+    return max(score, 0.0)
+
+
+# Process-wide aggregator, shared across invocations on a warm worker
+_aggregator = None
+
+
+def get_engagement_aggregator() -> EngagementAggregator:
+    """
+    Get the process-wide aggregator, persisted to the storage backend when one is configured
+    (ENGAGEMENT_FLUSH_INTERVAL_SECONDS, ENGAGEMENT_FLUSH_BATCH_SIZE); pending events are flushed at exit
+    """
+    global _aggregator
+    if _aggregator is None:
+        from .storage_backend import get_storage_client, storage_configured
+
+        _aggregator = EngagementAggregator(
+            get_storage_client() if storage_configured() else None,
+            flush_interval=float(os.environ.get('ENGAGEMENT_FLUSH_INTERVAL_SECONDS', FLUSH_INTERVAL_SECONDS)),
+            flush_batch_size=int(os.environ.get('ENGAGEMENT_FLUSH_BATCH_SIZE', FLUSH_BATCH_SIZE))
+        )
+        atexit.register(_aggregator.flush)
+    return _aggregator
@@ -0,0 +1,161 @@
+"""
+Materialized per-user recommendation feeds
+A bounded in-memory LRU in front of the storage backend; a feed is rebuilt only when the user's
+interests or locations change, or when one of their locations' candidate pools is rebuilt
+"""
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from .bloom import SeenFilter
+
+# Items materialized per feed; requests serve the first unseen `limit` of these
+FEED_DEPTH = 50
+
+# Safety net for feeds whose pools have no version to compare (e.g. no storage backend)
+FEED_MAX_AGE_SECONDS = 6 * 3600
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class FeedCache:
+    """Materialized feeds keyed by user id, in a bounded LRU backed by the storage backend"""
+
+    def __init__(self, storage_client=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.storage_client = storage_client
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Cached feed from memory, falling back to the persistent tier"""
+        with self._lock:
+            feed = self._entries.get(user_id)
+            if feed is not None:
+                self._entries.move_to_end(user_id)
+                return feed
+
+        if self.storage_client is None:
+            return None
+        feed = self.storage_client.get_user_feed(user_id)
+        if feed is not None:
+            self._remember(user_id, feed)
+        return feed
+
+    def put(self, user_id: str, feed: Dict[str, Any]) -> None:
+        self._remember(user_id, feed)
+        if self.storage_client is not None:
+            self.storage_client.store_user_feed(user_id, feed)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the in-memory copy; the persistent copy is rejected by its signature on next read"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def feed(self, profile: Dict[str, Any], engine, limit: int = 10) -> Tuple[List[Dict[str, Any]], str]:
+        """First `limit` unseen items of the user's materialized feed, and the ETag for them"""
+        user_id = profile['user_id']
+        signature = feed_signature(profile, engine.pool_versions(profile_locations(profile)))
+        seen = SeenFilter.from_dict(profile.get('seen_filter'))
+
+        feed = self.get(user_id)
+        items = unseen_items(feed, seen, limit) if is_current(feed, signature) else None
+        if items is None:
+            self.misses += 1
+            feed = {
+                'user_id': user_id,
+                'signature': signature,
+                'built_at': time.time(),
+                'items': engine.recommend(profile, max(FEED_DEPTH, limit))
+            }
+            self.put(user_id, feed)
+            items = unseen_items(feed, seen, limit) or []
+        else:
+            self.hits += 1
+
+        return items, feed_etag(signature, items)
+
+    def _remember(self, user_id: str, feed: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[user_id] = feed
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def profile_locations(profile: Dict[str, Any]) -> List[str]:
+    """Locations a profile's feed draws from, primary first"""
+    locations = [profile.get('primary_location')] + list(profile.get('additional_locations') or [])
+    return [location for location in locations if location]
+
+
+def feed_signature(profile: Dict[str, Any], pool_versions: Dict[str, Optional[str]]) -> str:
+    """Fingerprint of everything a materialized feed depends on"""
+    payload = {
+        'locations': profile_locations(profile),
+        'categories': sorted(category.lower() for category in profile.get('categories') or []),
+        'interests': list(profile.get('interests') or []),
+        'pools': pool_versions
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def is_current(feed: Optional[Dict[str, Any]], signature: str) -> bool:
+    if not feed or feed.get('signature') != signature:
+        return False
+    return time.time() - feed.get('built_at', 0) < FEED_MAX_AGE_SECONDS
+
+
+def unseen_items(feed: Dict[str, Any], seen: SeenFilter, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Unseen items from a feed, or None if too few remain and a deeper feed could supply more"""
+    items = feed.get('items') or []
+    if not items:
+        return []
+    mask = seen.contains_many([item['id'] for item in items])
+    unseen = [item for item, was_seen in zip(items, mask) if not was_seen]
+    if len(unseen) < limit and len(items) >= max(FEED_DEPTH, limit):
+        return None
+    return unseen[:limit]
+
+
+def feed_etag(signature: str, items: List[Dict[str, Any]]) -> str:
+    """
+    Strong ETag over the feed's signature and the served item ids
+    Interactions rewrite the profile on every PUT, so its revision is left out or clients would never get a 304
+    """
+    payload = json.dumps([signature, [item['id'] for item in items]])
+    return '"' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the current ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or any(value.replace('W/', '', 1) == etag for value in candidates)
+
+
+# Process-wide cache, shared across invocations on a warm worker
+_feed_cache = None
+
+
+def get_feed_cache() -> FeedCache:
+    """Get the process-wide feed cache, persisted to the storage backend when one is configured"""
+    global _feed_cache
+    if _feed_cache is None:
+        from .storage_backend import get_storage_client, storage_configured
+
+        storage_client = None
+        if storage_configured():
+            try:
+                storage_client = get_storage_client()
+            except Exception as e:
+                logging.warning(f"Feed cache running without a persistent tier: {str(e)}")
+        _feed_cache = FeedCache(storage_client)
+    return _feed_cache
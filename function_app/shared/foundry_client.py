@@ -4,7 +4,7 @@ Azure AI Foundry client utilities for consistent API interactions
 import os
 import logging
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, Iterable
 # Handle azure.identity import with fallback
 try:
     from azure.identity import ManagedIdentityCredential
@@ -71,6 +71,23 @@ class FoundryClient:
         - Clear, concise instructions to minimize reasoning tokens
         - Structured output format to reduce token waste
         """
+        url, payload = self._build_search_run(user_query, max_tokens, stream=False)
+
+        logging.info(f"Calling Azure AI Foundry Agent with internet search (max_tokens={max_tokens})")
+        return self._make_request(url, payload, "agent_internet_search")
+
+    def stream_agent_with_search(self, user_query: str, max_tokens: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream an internet-search agent run as it is generated.
+        Yields {"event": ..., "data": ...} dicts; text arrives as "thread.message.delta" events.
+        """
+        url, payload = self._build_search_run(user_query, max_tokens, stream=True)
+
+        logging.info(f"Streaming Azure AI Foundry Agent with internet search (max_tokens={max_tokens})")
+        return self._stream_request(url, payload, "agent_internet_search_stream")
+
+    def _build_search_run(self, user_query: str, max_tokens: int, stream: bool):
+        """Build the threads/runs URL and payload for an internet-search agent run"""
         if not self.agent_id:
             raise ValueError("AGENT_ID is required for agent-based internet search")
         
@@ -104,12 +121,10 @@ Be concise. Use only verified information you find online.""",
                 }
             ],
             "max_completion_tokens": max_tokens,  # Cost control
-            "stream": False,
+            "stream": stream,
             "temperature": 0.3  # Lower temperature for more focused, cheaper responses
         }
-        
-        logging.info(f"Calling Azure AI Foundry Agent with internet search (max_tokens={max_tokens})")
-        return self._make_request(url, payload, "agent_internet_search")
+        return url, payload
 
     def call_agent(self, messages: list, tools: Optional[list] = None) -> Dict[str, Any]:
         """Call Azure AI Foundry Agent using A2A communication with Azure OpenAI Assistants API"""
@@ -199,6 +214,17 @@ Be concise. Use only verified information you find online.""",
 
         return result
 
+    def call_embeddings(self, texts: list, deployment: str,
+                        dimensions: Optional[int] = None) -> Dict[str, Any]:
+        """Call the embeddings endpoint for a batch of input texts"""
+        url = f"{self.base_url}/openai/deployments/{deployment}/embeddings?api-version={API_VERSION}"
+
+        payload = {"input": texts}
+        if dimensions:
+            payload["dimensions"] = dimensions  # Supported by text-embedding-3 models
+
+        return self._make_request(url, payload, "embeddings")
+
     def _make_request(self, url: str, payload: Dict[str, Any],
                      function_name: str) -> Dict[str, Any]:
         """Make HTTP request to Foundry API with consistent error handling"""
@@ -235,4 +261,82 @@ Be concise. Use only verified information you find online.""",
 
             except Exception as e:
                 logging.error(f"Foundry API call failed for {function_name}: {str(e)}")
-                raise
\ No newline at end of file
+                raise
+
+    def _stream_request(self, url: str, payload: Dict[str, Any],
+                        function_name: str) -> Iterator[Dict[str, Any]]:
+        """Make a streaming HTTP request to Foundry API and yield parsed server-sent events"""
+        headers = self._get_headers()
+        headers["Accept"] = "text/event-stream"
+
+        logging.info(f"Streaming Foundry endpoint {url} for function {function_name}")
+
+        if REQUESTS_AVAILABLE:
+            try:
+                response = requests.post(url, headers=headers, json=payload, timeout=60, stream=True)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                logging.error(f"Foundry streaming call failed for {function_name}: {str(e)}")
+                raise
+
+            with response:
+                yield from parse_sse_lines(response.iter_lines(decode_unicode=True))
+        else:
+            # Fallback using urllib
+            try:
+                data = json.dumps(payload).encode('utf-8')
+                req = urllib.request.Request(url, data=data, headers=headers)
+                response = urllib.request.urlopen(req, timeout=60)
+            except Exception as e:
+                logging.error(f"Foundry streaming call failed for {function_name}: {str(e)}")
+                raise
+
+            with response:
+                yield from parse_sse_lines(line.decode('utf-8') for line in response)
+
+
+def parse_sse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse a server-sent event stream into {"event": ..., "data": ...} dicts"""
+    event_name = "message"
+    data_lines = []
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n") if raw_line else ""
+
+        if not line:
+            # Blank line terminates the current event
+            if data_lines:
+                yield _decode_sse_event(event_name, "\n".join(data_lines))
+            event_name = "message"
+            data_lines = []
+        elif line.startswith(":"):
+            continue  # Comment / keep-alive
+        elif line.startswith("event:"):
+            event_name = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+
+    if data_lines:
+        yield _decode_sse_event(event_name, "\n".join(data_lines))
+
+
+def _decode_sse_event(event_name: str, data: str) -> Dict[str, Any]:
+    """Decode the JSON payload of a server-sent event when possible"""
+    if data == "[DONE]":
+        return {"event": "done", "data": None}
+    try:
+        return {"event": event_name, "data": json.loads(data)}
+    except json.JSONDecodeError:
+        return {"event": event_name, "data": data}
+
+
+def extract_message_delta_text(event: Dict[str, Any]) -> str:
+    """Return the text carried by a "thread.message.delta" event, or an empty string"""
+    if event.get("event") != "thread.message.delta" or not isinstance(event.get("data"), dict):
+        return ""
+
+    parts = []
+    for content in event["data"].get("delta", {}).get("content", []):
+        if content.get("type") == "text":
+            parts.append(content.get("text", {}).get("value", ""))
+    return "".join(parts)
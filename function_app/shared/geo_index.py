@@ -0,0 +1,271 @@
+"""
+Geographic hierarchy index for content distribution
+Built from an offline gazetteer; maps a city to its Local+ / Regional / Provincial / Federal rings
+by distance (k-d tree over unit-sphere coordinates) and admin boundaries, memoized per city
+"""
+import os
+import csv
+import math
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+
+RING_LEVELS = ['Local+', 'Regional', 'Provincial', 'Federal']
+
+# Ring radii; Local+ and Regional never cross a province or state boundary
+LOCAL_PLUS_KM = 25.0
+REGIONAL_KM = 120.0
+CROSS_BORDER_KM = 250.0
+
+# Places per ring
+LOCAL_PLUS_LIMIT = 8
+REGIONAL_LIMIT = 10
+PROVINCIAL_LIMIT = 8
+FEDERAL_LIMIT = 10
+CROSS_BORDER_LIMIT = 3
+
+
+class KDTree:
+    """Static k-d tree over points, stored as flat arrays for radius and nearest-neighbour queries"""
+
+    def __init__(self, points: np.ndarray):
+        self.points = np.asarray(points, dtype=np.float64)
+        count = len(self.points)
+        self.index = np.arange(count)
+        self.axis = np.zeros(count, dtype=np.int8)
+        self.left = np.full(count, -1, dtype=np.int64)
+        self.right = np.full(count, -1, dtype=np.int64)
+        self.root = self._build(0, count)
+
+    def _build(self, start: int, stop: int) -> int:
+        """Arrange index[start:stop] around its median; the median slot becomes the subtree's node"""
+        if start >= stop:
+            return -1
+        span = self.points[self.index[start:stop]]
+        axis = int(np.argmax(span.max(axis=0) - span.min(axis=0)))
+        order = np.argsort(span[:, axis], kind='stable')
+        self.index[start:stop] = self.index[start:stop][order]
+
+        middle = (start + stop) // 2
+        self.axis[middle] = axis
+        self.left[middle] = self._build(start, middle)
+        self.right[middle] = self._build(middle + 1, stop)
+        return middle
+
+    def query_radius(self, point: np.ndarray, radius: float) -> List[int]:
+        """Indices of points within `radius` of `point`"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            candidate = self.index[node]
+            delta = point[self.axis[node]] - self.points[candidate, self.axis[node]]
+            if np.sum((self.points[candidate] - point) ** 2) <= radius * radius:
+                found.append(int(candidate))
+            near, far = (self.left[node], self.right[node]) if delta < 0 else (self.right[node], self.left[node])
+            stack.append(near)
+            if abs(delta) <= radius:
+                stack.append(far)
+        return found
+
+    def nearest(self, point: np.ndarray) -> Tuple[int, float]:
+        """Index of and distance to the closest point"""
+        best, best_distance = -1, math.inf
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            candidate = self.index[node]
+            distance = float(np.sqrt(np.sum((self.points[candidate] - point) ** 2)))
+            if distance < best_distance:
+                best, best_distance = int(candidate), distance
+            delta = point[self.axis[node]] - self.points[candidate, self.axis[node]]
+            near, far = (self.left[node], self.right[node]) if delta < 0 else (self.right[node], self.left[node])
+            if abs(delta) < best_distance:
+                stack.append(far)
+            stack.append(near)
+        return best, best_distance
+
+
+class GeoIndex:
+    """Gazetteer places with name lookup, spatial queries and memoized distribution rings"""
+
+    def __init__(self, places: List[Dict[str, Any]]):
+        self.places = places
+        latitudes = np.radians([place['latitude'] for place in places])
+        longitudes = np.radians([place['longitude'] for place in places])
+        self.tree = KDTree(np.column_stack([
+            np.cos(latitudes) * np.cos(longitudes),
+            np.cos(latitudes) * np.sin(longitudes),
+            np.sin(latitudes)
+        ]))
+
+        # Name lookup; an ambiguous bare name resolves to the most populous match
+        self._by_name: Dict[str, List[int]] = {}
+        for row, place in enumerate(places):
+            self._by_name.setdefault(_normalize(place['name']), []).append(row)
+        for rows in self._by_name.values():
+            rows.sort(key=lambda row: -places[row]['population'])
+
+        # Largest places first within each province/state and each country
+        by_population = sorted(range(len(places)), key=lambda row: -places[row]['population'])
+        self._admin1_rows: Dict[Tuple[str, str], List[int]] = {}
+        self._country_rows: Dict[str, List[int]] = {}
+        for row in by_population:
+            place = places[row]
+            self._admin1_rows.setdefault((place['country'], place['admin1']), []).append(row)
+            self._country_rows.setdefault(place['country'], []).append(row)
+
+        self._rings: Dict[int, Dict[str, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_GAZETTEER_PATH) -> 'GeoIndex':
+        with open(path, newline='', encoding='utf-8') as handle:
+            places = [
+                {
+                    'name': row['name'],
+                    'admin2': row['admin2'],
+                    'admin1': row['admin1'],
+                    'admin1_code': row['admin1_code'],
+                    'country': row['country'],
+                    'latitude': float(row['latitude']),
+                    'longitude': float(row['longitude']),
+                    'population': int(row['population'])
+                }
+                for row in csv.DictReader(handle)
+            ]
+        logging.info(f"Loaded {len(places)} gazetteer places from {path}")
+        return cls(places)
+
+    def resolve(self, location: str) -> Optional[int]:
+        """Row for a location such as "Vancouver", "Vancouver, BC" or "Vancouver, British Columbia" """
+        name, _, qualifier = (location or '').partition(',')
+        rows = self._by_name.get(_normalize(name), [])
+        qualifier = _normalize(qualifier)
+        if qualifier:
+            rows = [row for row in rows if qualifier in (_normalize(self.places[row]['admin1_code']),
+                                                         _normalize(self.places[row]['admin1']),
+                                                         _normalize(self.places[row]['country']))]
+        return rows[0] if rows else None
+
+    def nearest(self, latitude: float, longitude: float) -> Tuple[Dict[str, Any], float]:
+        """Closest gazetteer place to a coordinate, with its great-circle distance in km"""
+        row, chord = self.tree.nearest(_unit_vector(latitude, longitude))
+        return self.places[row], _chord_to_km(chord)
+
+    def within(self, row: int, radius_km: float) -> List[Tuple[int, float]]:
+        """Other places within a great-circle radius of a place, nearest first"""
+        point = self.tree.points[row]
+        rows = [other for other in self.tree.query_radius(point, _km_to_chord(radius_km)) if other != row]
+        distances = [_chord_to_km(float(np.linalg.norm(self.tree.points[other] - point))) for other in rows]
+        return sorted(zip(rows, distances), key=lambda pair: pair[1])
+
+    def label(self, row: int) -> str:
+        place = self.places[row]
+        return f"{place['name']}, {place['admin1_code']}"
+
+    def rings(self, location: str) -> Dict[str, List[str]]:
+        """Distribution rings around a location; empty rings for places not in the gazetteer"""
+        row = self.resolve(location)
+        if row is None:
+            return {level: [] for level in RING_LEVELS}
+
+        with self._lock:
+            rings = self._rings.get(row)
+        if rings is None:
+            rings = self._build_rings(row)
+            with self._lock:
+                self._rings[row] = rings
+        return rings
+
+    def ring(self, location: str, level: str) -> List[str]:
+        return self.rings(location).get(level, [])
+
+    def precompute(self) -> None:
+        """Memoize rings for every place up front"""
+        for row in range(len(self.places)):
+            self.rings(self.label(row))
+
+    def _build_rings(self, row: int) -> Dict[str, List[str]]:
+        place = self.places[row]
+        taken = {row}
+
+        def same_admin1(other: int) -> bool:
+            return (self.places[other]['country'] == place['country'] and
+                    self.places[other]['admin1'] == place['admin1'])
+
+        def claim(rows: List[int], limit: int) -> List[int]:
+            claimed = [other for other in rows if other not in taken][:limit]
+            taken.update(claimed)
+            return claimed
+
+        nearby = self.within(row, max(REGIONAL_KM, CROSS_BORDER_KM))
+
+        local_plus = claim([other for other, distance in nearby
+                            if distance <= LOCAL_PLUS_KM and same_admin1(other)], LOCAL_PLUS_LIMIT)
+
+        regional = claim([other for other, distance in nearby
+                          if same_admin1(other) and (distance <= REGIONAL_KM or
+                                                     self.places[other]['admin2'] == place['admin2'])],
+                         REGIONAL_LIMIT)
+
+        provincial = claim(self._admin1_rows[(place['country'], place['admin1'])], PROVINCIAL_LIMIT)
+
+        # The largest place in each other province/state, then nearby places across the border
+        leaders = {}
+        for other in self._country_rows[place['country']]:
+            leaders.setdefault(self.places[other]['admin1'], other)
+        federal = claim(sorted(leaders.values(), key=lambda other: -self.places[other]['population']),
+                        FEDERAL_LIMIT)
+        cross_border = sorted((other for other, distance in nearby
+                               if self.places[other]['country'] != place['country']),
+                              key=lambda other: -self.places[other]['population'])
+        federal += claim(cross_border, CROSS_BORDER_LIMIT)
+
+        return {
+            'Local+': [self.label(other) for other in local_plus],
+            'Regional': [self.label(other) for other in regional],
+            'Provincial': [self.label(other) for other in provincial],
+            'Federal': [self.label(other) for other in federal]
+        }
+
+
+def _normalize(value: str) -> str:
+    return ' '.join((value or '').lower().replace('.', '').split())
+
+
+def _unit_vector(latitude: float, longitude: float) -> np.ndarray:
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return np.array([math.cos(latitude) * math.cos(longitude),
+                     math.cos(latitude) * math.sin(longitude),
+                     math.sin(latitude)])
+
+
+def _km_to_chord(distance_km: float) -> float:
+    return 2.0 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2.0)
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(chord / 2.0, 1.0))
+
+
+# Process-wide index, loaded once per worker
+_geo_index = None
+
+
+def get_geo_index() -> GeoIndex:
+    """Get the process-wide geographic index (GAZETTEER_PATH overrides the bundled gazetteer)"""
+    global _geo_index
+    if _geo_index is None:
+        _geo_index = GeoIndex.from_csv(os.environ.get('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH))
+    return _geo_index
@@ -0,0 +1,64 @@
+"""
+HyperLogLog sketches for approximate distinct counts (e.g. unique users per content item)
+"""
+import zlib
+import math
+import base64
+import hashlib
+from typing import Dict, Any, Iterable, Optional
+
+import numpy as np
+
+# 2^10 registers: ~3% standard error in 1 KB
+DEFAULT_PRECISION = 10
+
+
+class HyperLogLog:
+    """Distinct-count sketch; merging is a register-wise max, so re-adding or re-merging is harmless"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.num_registers, dtype=np.uint8)
+
+    def add(self, key: str) -> None:
+        value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Fold another sketch of the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(zlib.compress(self.registers.tobytes(), 6)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'HyperLogLog':
+        registers = np.frombuffer(zlib.decompress(base64.b64decode(state['registers'])), dtype=np.uint8).copy()
+        return cls(state.get('precision', DEFAULT_PRECISION), registers=registers)
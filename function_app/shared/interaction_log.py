@@ -0,0 +1,207 @@
+"""
+Compact columnar interaction log stored on user profiles
+A fixed-capacity ring buffer of parallel arrays, serialized as a delta-encoded, zlib-packed blob
+"""
+import zlib
+import base64
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+LOG_FORMAT_VERSION = 2
+DEFAULT_CAPACITY = 1000
+
+# The only actions recorded; anything else is logged as a view. Seeded so codes are stable across profiles
+KNOWN_ACTIONS = ['view', 'save', 'share', 'like', 'dismiss']
+
+# Interned name tables are bounded by their code column's range
+MAX_NAMES = np.iinfo(np.uint16).max + 1
+
+# Engagement time is stored in whole seconds, saturating at the column's limit
+MAX_ENGAGEMENT_SECONDS = np.iinfo(np.uint16).max
+
+_HEADER = struct.Struct('<Iq')
+
+
+class InteractionLog:
+    """Most recent interactions as parallel timestamp/action/content/category/location/engagement columns"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.uint8)
+        self.contents = np.zeros(capacity, dtype=np.uint16)
+        self.categories = np.zeros(capacity, dtype=np.uint16)
+        self.locations = np.zeros(capacity, dtype=np.uint16)
+        self.engagement = np.zeros(capacity, dtype=np.uint16)
+        self.size = 0
+        self._next = 0
+
+        # Code 0 means "not set" for content ids, categories and locations
+        self.action_names: List[str] = list(KNOWN_ACTIONS)
+        self.content_names: List[Optional[str]] = [None]
+        self.category_names: List[Optional[str]] = [None]
+        self.location_names: List[Optional[str]] = [None]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, interaction: Dict[str, Any]) -> None:
+        """Record an interaction, overwriting the oldest once the buffer is full"""
+        slot = self._next
+        action = interaction.get('action') if interaction.get('action') in KNOWN_ACTIONS else 'view'
+        self.timestamps[slot] = _to_epoch(interaction.get('timestamp'))
+        self.actions[slot] = self.action_names.index(action) if action in self.action_names else 0
+        self.contents[slot] = self._intern('contents', self.content_names, interaction.get('content_id'))
+        self.categories[slot] = self._intern('categories', self.category_names, interaction.get('category'))
+        self.locations[slot] = self._intern('locations', self.location_names, interaction.get('location'))
+        self.engagement[slot] = min(int(interaction.get('engagement_time') or 0), MAX_ENGAGEMENT_SECONDS)
+
+        self._next = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, interactions: List[Dict[str, Any]]) -> None:
+        for interaction in interactions:
+            self.append(interaction)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Chronologically ordered copies of each column"""
+        order = self._order()
+        return {
+            'timestamps': self.timestamps[order],
+            'actions': self.actions[order],
+            'contents': self.contents[order],
+            'categories': self.categories[order],
+            'locations': self.locations[order],
+            'engagement': self.engagement[order]
+        }
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Interactions as dicts, oldest first (optionally only the most recent `limit`)"""
+        columns = self.columns()
+        start = max(0, self.size - limit) if limit else 0
+        return [
+            {
+                'content_id': self.content_names[columns['contents'][i]],
+                'action': self.action_names[columns['actions'][i]],
+                'category': self.category_names[columns['categories'][i]],
+                'location': self.location_names[columns['locations'][i]],
+                'engagement_time': int(columns['engagement'][i]),
+                'timestamp': datetime.fromtimestamp(int(columns['timestamps'][i]), timezone.utc).isoformat()
+            }
+            for i in range(start, self.size)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-safe dict; unused interned names are dropped"""
+        columns = self.columns()
+        contents, content_names = _compact(columns['contents'], self.content_names)
+        categories, category_names = _compact(columns['categories'], self.category_names)
+        locations, location_names = _compact(columns['locations'], self.location_names)
+
+        timestamps = columns['timestamps']
+        base = int(timestamps[0]) if self.size else 0
+        deltas = np.diff(timestamps).astype('<i4') if self.size else np.zeros(0, dtype='<i4')
+
+        payload = b''.join([
+            _HEADER.pack(self.size, base),
+            deltas.tobytes(),
+            columns['actions'].astype('<u1').tobytes(),
+            contents.astype('<u2').tobytes(),
+            categories.astype('<u2').tobytes(),
+            locations.astype('<u2').tobytes(),
+            columns['engagement'].astype('<u2').tobytes()
+        ])
+
+        return {
+            'version': LOG_FORMAT_VERSION,
+            'capacity': self.capacity,
+            'actions': self.action_names,
+            'contents': content_names,
+            'categories': category_names,
+            'locations': location_names,
+            'data': base64.b64encode(zlib.compress(payload, 6)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'InteractionLog':
+        log = cls(state.get('capacity', DEFAULT_CAPACITY))
+        log.action_names = list(state['actions'])
+        log.content_names = list(state.get('contents') or [None])
+        log.category_names = list(state['categories'])
+        log.location_names = list(state['locations'])
+
+        payload = zlib.decompress(base64.b64decode(state['data']))
+        size, base = _HEADER.unpack_from(payload)
+        offset = _HEADER.size
+
+        def column(dtype: str, count: int) -> np.ndarray:
+            nonlocal offset
+            values = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+            offset += values.nbytes
+            return values
+
+        deltas = column('<i4', max(size - 1, 0))
+        if size:
+            log.timestamps[:size] = base + np.concatenate(([0], np.cumsum(deltas, dtype=np.int64)))
+        log.actions[:size] = column('<u1', size)
+        if state.get('version', 1) >= 2:
+            log.contents[:size] = column('<u2', size)
+        log.categories[:size] = column('<u2', size)
+        log.locations[:size] = column('<u2', size)
+        log.engagement[:size] = column('<u2', size)
+
+        log.size = size
+        log._next = size % log.capacity
+        return log
+
+    @classmethod
+    def from_profile(cls, profile: Dict[str, Any]) -> 'InteractionLog':
+        """Load a profile's log, converting a legacy interaction_history list if present"""
+        if profile.get('interaction_log'):
+            return cls.from_dict(profile['interaction_log'])
+        log = cls()
+        log.extend(profile.get('interaction_history', [])[-log.capacity:])
+        return log
+
+    def _intern(self, column: str, names: List[Optional[str]], value: Optional[str]) -> int:
+        """Code for a value; a full table is first compacted to the names the buffer still references"""
+        try:
+            return names.index(value)
+        except ValueError:
+            pass
+        if len(names) >= MAX_NAMES:
+            codes, names[:] = _compact(getattr(self, column), names)
+            setattr(self, column, codes)
+            if len(names) >= MAX_NAMES:
+                return 0
+        names.append(value)
+        return len(names) - 1
+
+    def _order(self) -> np.ndarray:
+        if self.size < self.capacity:
+            return np.arange(self.size)
+        return (np.arange(self.capacity) + self._next) % self.capacity
+
+
+def _compact(codes: np.ndarray, names: List[Optional[str]]):
+    """Renumber codes to only the names still referenced, keeping code 0 for unset values"""
+    used = np.unique(codes)
+    used = used[used != 0]
+    remap = np.zeros(len(names), dtype=np.uint16)
+    remap[used] = np.arange(1, len(used) + 1, dtype=np.uint16)
+    return remap[codes], [None] + [names[code] for code in used]
+
+
+def _to_epoch(timestamp: Any) -> int:
+    if not timestamp:
+        return int(datetime.now(timezone.utc).timestamp())
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return int(datetime.now(timezone.utc).timestamp())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
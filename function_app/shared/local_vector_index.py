@@ -0,0 +1,526 @@
+"""
+Local in-process vector index backed by NumPy
+Offline stand-in for Azure AI Search and hot cache in front of the remote index
+"""
+import os
+import re
+import json
+import logging
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from .embeddings import document_text
+from .ranking import hybrid_rank, encode_continuation, decode_continuation
+
+SELECT_FIELDS = ["id", "title", "content", "source", "category", "location", "date", "url"]
+
+# Rows with no parseable date sort last and never pass a date filter
+MISSING_DATE = np.iinfo(np.int64).min
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# The append-only document log is compacted once it holds this many superseded entries
+COMPACT_SLACK = 1024
+
+
+class LocalVectorIndex:
+    """NumPy-backed vector index exposing the VectorSearchClient query API"""
+
+    def __init__(self, path: Optional[str] = None, dimensions: int = 256,
+                 quantization: str = 'float32',
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 initial_capacity: int = 1024):
+        if quantization not in ('float32', 'int8'):
+            raise ValueError("quantization must be 'float32' or 'int8'")
+
+        self.path = path
+        self.dimensions = dimensions
+        self.quantization = quantization
+        self.embed_fn = embed_fn
+
+        self._lock = threading.RLock()
+        self._documents: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._location_bitmaps: Dict[str, np.ndarray] = {}
+        self._category_bitmaps: Dict[str, np.ndarray] = {}
+        self._date_order: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._synced: Dict[str, float] = {}
+        self._log_lines = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._file('meta.json')):
+                self._load()
+                return
+
+        self._allocate(initial_capacity)
+
+    # ------------------------------------------------------------------
+    # VectorSearchClient-compatible API
+    # ------------------------------------------------------------------
+
+    def search_community_content(self, location: str, query: str,
+                                 top: int = 5) -> List[Dict[str, Any]]:
+        """Search for relevant community content based on location and query"""
+        return self.search_hybrid(location, query, top)["results"]
+
+    def search_hybrid(self, location: str, query: str, top: int = 10,
+                      continuation_token: Optional[str] = None) -> Dict[str, Any]:
+        """Keyword and vector rankings fused with RRF plus location/recency boosts, with paging"""
+        offset = decode_continuation(continuation_token, location, query)
+        window = offset + top
+        fetch_k = max(window * 2, 20)
+
+        query_vector = None
+        if query and self.embed_fn:
+            try:
+                query_vector = np.asarray(self.embed_fn([query])[0], dtype=np.float32)
+            except Exception as e:
+                logging.warning(f"Query embedding failed, using keyword search only: {str(e)}")
+
+        with self._lock:
+            mask = self._location_mask(location)
+            keyword_rows = self._keyword_rows(mask, query, fetch_k)
+
+            vector_rows = np.empty(0, dtype=np.int64)
+            if query_vector is not None and self._has_vector[:self._count].any():
+                vector_rows, _ = self._vector_top_k(query_vector, mask.copy(), fetch_k, nprobe=4)
+
+            documents = {self._documents[row]['id']: self._select(row)
+                         for row in np.union1d(keyword_rows, vector_rows).astype(np.int64)}
+            keyword_ids = [self._documents[row]['id'] for row in keyword_rows]
+            vector_ids = [self._documents[row]['id'] for row in vector_rows]
+
+        ranked = hybrid_rank(documents, keyword_ids, vector_ids, location)
+        page = [dict(document, **{'@search.score': score}) for document, score in ranked[offset:window]]
+
+        has_more = len(ranked) > window or len(keyword_rows) >= fetch_k or len(vector_rows) >= fetch_k
+        return {
+            "results": page,
+            "continuation_token": encode_continuation(window, location, query) if page and has_more else None
+        }
+
+    def store_content(self, content_item: Dict[str, Any]) -> bool:
+        """Store or update content item in the local index"""
+        return self.store_contents([content_item]).get(content_item.get('id', ''), False)
+
+    def store_contents(self, content_items: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Store or update many content items; returns success per document id"""
+        required_fields = ['id', 'title', 'content', 'location']
+        outcomes = {}
+        valid_items = []
+
+        for item in content_items:
+            if all(field in item for field in required_fields):
+                valid_items.append(item)
+            else:
+                logging.error(f"Missing required fields for content storage: {item.get('id', 'unknown')}")
+                outcomes[item.get('id', '')] = False
+
+        if not valid_items:
+            return outcomes
+
+        vectors = self._vectors_for(valid_items)
+
+        with self._lock:
+            rows = []
+            for item, vector in zip(valid_items, vectors):
+                rows.append(self._upsert(item, vector))
+                outcomes[item['id']] = True
+            self._date_order = None
+            self._flush(rows)
+
+        return outcomes
+
+    def search_by_category(self, category: str, location: str,
+                           top: int = 10) -> List[Dict[str, Any]]:
+        """Search content by category and location"""
+        with self._lock:
+            mask = self._location_mask(location) & self._bitmap(self._category_bitmaps, category)
+            return [self._select(row) for row in self._newest(mask, top)]
+
+    def get_recent_content(self, location: str, hours: int = 24,
+                           top: int = 20) -> List[Dict[str, Any]]:
+        """Get recent content for a location within specified hours"""
+        cutoff = int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp())
+
+        with self._lock:
+            mask = self._location_mask(location) & (self._dates[:self._count] >= cutoff)
+            return [self._select(row) for row in self._newest(mask, top)]
+
+    def get_document(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single document by key"""
+        with self._lock:
+            row = self._rows.get(key)
+            return dict(self._documents[row]) if row is not None else None
+
+    def get_documents(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch many documents by key"""
+        return {key: self.get_document(key) for key in keys}
+
+    # ------------------------------------------------------------------
+    # Hot cache freshness
+    # ------------------------------------------------------------------
+
+    def mark_synced(self, location: str, ttl_seconds: float) -> None:
+        """Record that a location was just refreshed from the remote index"""
+        with self._lock:
+            self._synced[(location or '').lower()] = time.monotonic() + ttl_seconds
+
+    def is_synced(self, location: str) -> bool:
+        """Whether a location was refreshed from the remote index within its TTL"""
+        with self._lock:
+            expires = self._synced.get((location or '').lower())
+            return expires is not None and expires > time.monotonic()
+
+    def invalidate_location(self, location: str) -> None:
+        """Stop serving a location locally; regional content appears in every feed, so it clears all"""
+        location_key = (location or '').lower()
+        with self._lock:
+            if location_key == 'regional':
+                self._synced.clear()
+            else:
+                self._synced.pop(location_key, None)
+
+    # ------------------------------------------------------------------
+    # Vector search
+    # ------------------------------------------------------------------
+
+    def vector_search(self, vector: List[float], top: int = 10,
+                      location: Optional[str] = None, nprobe: int = 4) -> List[Dict[str, Any]]:
+        """Top-k cosine similarity search, optionally restricted to a location"""
+        with self._lock:
+            mask = self._location_mask(location) if location else self._has_vector[:self._count].copy()
+            rows, scores = self._vector_top_k(np.asarray(vector, dtype=np.float32), mask, top, nprobe)
+            return [dict(self._select(row), **{'@search.score': float(score)})
+                    for row, score in zip(rows, scores)]
+
+    def build_ivf(self, nlist: int = 64, iterations: int = 10, seed: int = 0) -> None:
+        """Train an IVF coarse quantizer (k-means) so queries only scan the nearest lists"""
+        with self._lock:
+            vector_rows = np.flatnonzero(self._has_vector[:self._count])
+            if len(vector_rows) < nlist:
+                logging.info(f"Not enough vectors ({len(vector_rows)}) to build {nlist} IVF lists")
+                self._centroids = None
+                return
+
+            data = self._dequantize(vector_rows)
+            rng = np.random.default_rng(seed)
+            centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                assignments = np.argmax(data @ centroids.T, axis=1)
+                for list_id in range(nlist):
+                    members = data[assignments == list_id]
+                    if len(members):
+                        centroids[list_id] = _normalize(members.mean(axis=0))
+
+            self._centroids = centroids
+            self._assignments[vector_rows] = np.argmax(data @ centroids.T, axis=1)
+            self._compact()
+            logging.info(f"Built IVF index with {nlist} lists over {len(vector_rows)} vectors")
+
+    def _vector_top_k(self, query: np.ndarray, mask: np.ndarray, top: int, nprobe: int):
+        """Score candidate rows against a query vector and return the best rows and scores"""
+        query = _normalize(query.reshape(-1)[:self.dimensions])
+        mask &= self._has_vector[:self._count]
+
+        if self._centroids is not None:
+            probes = np.argsort(self._centroids @ query)[::-1][:nprobe]
+            mask &= np.isin(self._assignments[:self._count], probes)
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = self._dequantize(candidates) @ query
+        best = _top_k_indices(scores, top)
+        return candidates[best], scores[best]
+
+    # ------------------------------------------------------------------
+    # Ranking helpers
+    # ------------------------------------------------------------------
+
+    def _keyword_rows(self, mask: np.ndarray, query: str, top: int) -> np.ndarray:
+        """Rank masked rows by query token overlap (newest first when there is no query)"""
+        query_tokens = set(_TOKEN_RE.findall(query.lower())) if query else set()
+        if not query_tokens:
+            return self._newest(mask, top)
+
+        candidates = np.flatnonzero(mask)
+        overlap = np.fromiter(
+            (len(query_tokens & self._documents[row]['_tokens']) for row in candidates),
+            dtype=np.float64, count=len(candidates)
+        )
+        matching = overlap > 0
+        candidates, overlap = candidates[matching], overlap[matching]
+
+        # Relevance first, recency as the tie-breaker
+        order = np.lexsort((self._dates[candidates], overlap))[::-1]
+        return candidates[order[:top]]
+
+    def _newest(self, mask: np.ndarray, top: int) -> np.ndarray:
+        """Return the newest masked rows using the cached date-descending order"""
+        if self._date_order is None:
+            self._date_order = np.argsort(self._dates[:self._count], kind='stable')[::-1]
+        ordered = self._date_order[mask[self._date_order]]
+        return ordered[:top]
+
+    def _location_mask(self, location: str) -> np.ndarray:
+        """Bitmap of rows for a location plus regional content"""
+        return (self._bitmap(self._location_bitmaps, location) |
+                self._bitmap(self._location_bitmaps, 'regional'))
+
+    def _bitmap(self, bitmaps: Dict[str, np.ndarray], value: str) -> np.ndarray:
+        """Copy of the precomputed bitmap for a value, trimmed to the live rows"""
+        bitmap = bitmaps.get((value or '').lower())
+        if bitmap is None:
+            return np.zeros(self._count, dtype=bool)
+        return bitmap[:self._count].copy()
+
+    def _select(self, row: int) -> Dict[str, Any]:
+        """Project a stored document onto the search select fields"""
+        document = self._documents[row]
+        return {field: document.get(field) for field in SELECT_FIELDS}
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _vectors_for(self, items: List[Dict[str, Any]]) -> List[Optional[np.ndarray]]:
+        """Use supplied content_vector fields, embedding the rest when an embedder is configured"""
+        vectors: List[Optional[np.ndarray]] = [
+            np.asarray(item['content_vector'], dtype=np.float32) if item.get('content_vector') else None
+            for item in items
+        ]
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.embed_fn:
+            embedded = self.embed_fn([document_text(items[i]) for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = np.asarray(vector, dtype=np.float32)
+
+        return vectors
+
+    def _upsert(self, item: Dict[str, Any], vector: Optional[np.ndarray]) -> int:
+        """Insert or replace one document and its vector; returns its row"""
+        row = self._put_document(item)
+        if vector is not None:
+            self._write_vector(row, vector)
+        else:
+            self._has_vector[row] = False
+        return row
+
+    def _put_document(self, item: Dict[str, Any]) -> int:
+        """Insert or replace one document's metadata, bitmaps and date column; returns its row"""
+        row = self._rows.get(item['id'])
+        if row is None:
+            if self._count == self._capacity:
+                self._allocate(self._capacity * 2)
+            row = self._count
+            self._count += 1
+            self._rows[item['id']] = row
+            self._documents.append({})
+        else:
+            previous = self._documents[row]
+            self._bitmap_for(self._location_bitmaps, previous.get('location'))[row] = False
+            self._bitmap_for(self._category_bitmaps, previous.get('category'))[row] = False
+
+        document = {key: value for key, value in item.items() if key != 'content_vector'}
+        document['_tokens'] = set(_TOKEN_RE.findall(f"{item.get('title', '')} {item.get('content', '')}".lower()))
+        self._documents[row] = document
+
+        self._bitmap_for(self._location_bitmaps, item.get('location'))[row] = True
+        self._bitmap_for(self._category_bitmaps, item.get('category'))[row] = True
+        self._dates[row] = _to_epoch(item.get('date'))
+        return row
+
+    def _write_vector(self, row: int, vector: np.ndarray) -> None:
+        """Normalize, quantize and store a vector; assign it to an IVF list if trained"""
+        vector = _normalize(vector.reshape(-1)[:self.dimensions])
+        if self.quantization == 'int8':
+            scale = float(np.abs(vector).max()) / 127.0 or 1.0
+            self._vectors[row] = np.round(vector / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vector
+        self._has_vector[row] = True
+
+        if self._centroids is not None:
+            self._assignments[row] = int(np.argmax(self._centroids @ vector))
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        """Return float32 vectors for rows"""
+        if self.quantization == 'int8':
+            return self._vectors[rows].astype(np.float32) * self._scales[rows, None]
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def _bitmap_for(self, bitmaps: Dict[str, np.ndarray], value: Optional[str]) -> np.ndarray:
+        """Get or create the bitmap for a location/category value"""
+        key = (value or '').lower()
+        if key not in bitmaps:
+            bitmaps[key] = np.zeros(self._capacity, dtype=bool)
+        return bitmaps[key]
+
+    def _allocate(self, capacity: int) -> None:
+        """(Re)allocate column storage, preserving existing rows"""
+        count = getattr(self, '_count', 0)
+        previous = getattr(self, '_vectors', None)
+
+        vectors = self._open_vectors(capacity)
+        if count:
+            vectors[:count] = previous[:count]
+
+        # Drop the previous, smaller mapping file after growth
+        if isinstance(previous, np.memmap):
+            stale_file = previous.filename
+            del previous
+            self._vectors = None
+            os.remove(stale_file)
+
+        self._vectors = vectors
+        self._scales = _grow(getattr(self, '_scales', None), capacity, np.float32, 1.0)
+        self._has_vector = _grow(getattr(self, '_has_vector', None), capacity, bool, False)
+        self._dates = _grow(getattr(self, '_dates', None), capacity, np.int64, MISSING_DATE)
+        self._assignments = _grow(getattr(self, '_assignments', None), capacity, np.int32, -1)
+        for bitmaps in (self._location_bitmaps, self._category_bitmaps):
+            for key in bitmaps:
+                bitmaps[key] = _grow(bitmaps[key], capacity, bool, False)
+
+        self._capacity = capacity
+        self._count = count
+        self._write_meta()
+
+    def _open_vectors(self, capacity: int) -> np.ndarray:
+        """Vector storage: a memory-mapped file when the index has a path, else an in-memory array"""
+        dtype = np.int8 if self.quantization == 'int8' else np.float32
+        if not self.path:
+            return np.zeros((capacity, self.dimensions), dtype=dtype)
+
+        return np.lib.format.open_memmap(self._file(f"vectors_{capacity}.{self.quantization}"),
+                                         mode='w+', dtype=dtype, shape=(capacity, self.dimensions))
+
+    def _flush(self, rows: List[int]) -> None:
+        """Append written rows to the document log; vectors are already in the memmap"""
+        if not self.path:
+            return
+
+        self._vectors.flush()
+        with open(self._file('documents.jsonl'), 'a') as f:
+            for row in rows:
+                f.write(json.dumps(self._log_entry(row)) + '\n')
+        self._log_lines += len(rows)
+
+        if self._log_lines > 2 * self._count + COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the document log with one entry per row, and persist the IVF centroids"""
+        if not self.path:
+            return
+
+        self._vectors.flush()
+        with open(self._file('documents.jsonl.tmp'), 'w') as f:
+            for row in range(self._count):
+                f.write(json.dumps(self._log_entry(row)) + '\n')
+        os.replace(self._file('documents.jsonl.tmp'), self._file('documents.jsonl'))
+        self._log_lines = self._count
+
+        np.save(self._file('centroids.npy'),
+                self._centroids if self._centroids is not None else np.empty(0, dtype=np.float32))
+
+    def _log_entry(self, row: int) -> Dict[str, Any]:
+        return {
+            'document': {key: value for key, value in self._documents[row].items() if key != '_tokens'},
+            'scale': float(self._scales[row]),
+            'has_vector': bool(self._has_vector[row]),
+            'assignment': int(self._assignments[row])
+        }
+
+    def _write_meta(self) -> None:
+        if not self.path:
+            return
+        with open(self._file('meta.json'), 'w') as f:
+            json.dump({'dimensions': self.dimensions, 'quantization': self.quantization,
+                       'capacity': self._capacity}, f)
+
+    def _load(self) -> None:
+        """Load a persisted index by replaying its document log; later entries replace earlier ones"""
+        with open(self._file('meta.json')) as f:
+            meta = json.load(f)
+
+        self.dimensions = meta['dimensions']
+        self.quantization = meta['quantization']
+        self._capacity = meta['capacity']
+        self._count = 0
+
+        self._vectors = np.load(self._file(f"vectors_{self._capacity}.{self.quantization}"), mmap_mode='r+')
+        self._scales = np.ones(self._capacity, dtype=np.float32)
+        self._has_vector = np.zeros(self._capacity, dtype=bool)
+        self._dates = np.full(self._capacity, MISSING_DATE, dtype=np.int64)
+        self._assignments = np.full(self._capacity, -1, dtype=np.int32)
+
+        if os.path.exists(self._file('centroids.npy')):
+            centroids = np.load(self._file('centroids.npy'))
+            self._centroids = centroids if centroids.size else None
+
+        if os.path.exists(self._file('documents.jsonl')):
+            with open(self._file('documents.jsonl')) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final write; everything before it is intact
+                        logging.warning(f"Skipping unreadable local index log entry in {self.path}")
+                        break
+                    row = self._put_document(entry['document'])
+                    self._scales[row] = entry['scale']
+                    self._has_vector[row] = entry['has_vector']
+                    self._assignments[row] = entry['assignment']
+                    self._log_lines += 1
+
+        logging.info(f"Loaded local vector index with {self._count} documents from {self.path}")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector so dot products are cosine similarities"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if len(scores) > k:
+        partition = np.argpartition(-scores, k)[:k]
+        return partition[np.argsort(-scores[partition])]
+    return np.argsort(-scores)
+
+
+def _grow(array: Optional[np.ndarray], capacity: int, dtype, fill) -> np.ndarray:
+    """Copy a column into a larger array filled with a default value"""
+    grown = np.full(capacity, fill, dtype=dtype)
+    if array is not None:
+        grown[:len(array)] = array[:capacity]
+    return grown
+
+
+def _to_epoch(date_value: Any) -> int:
+    """Convert an ISO date string to epoch seconds (naive dates are treated as UTC)"""
+    if not date_value:
+        return MISSING_DATE
+    try:
+        parsed = datetime.fromisoformat(str(date_value).replace('Z', '+00:00'))
+    except ValueError:
+        return MISSING_DATE
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
@@ -0,0 +1,268 @@
+"""
+Event-driven content pipeline fed by content snapshot changes
+Changed snapshots flow through dedup, summarization, indexing and queueing stages in checkpointed batches
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+
+class InMemoryChangeFeed:
+    """Ordered in-process stand-in for the Cosmos change feed with at-least-once delivery"""
+
+    def __init__(self):
+        self._events: List[Dict[str, Any]] = []
+        self._checkpoint = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._events.append(event)
+
+    def read_batch(self, max_items: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """Read events after the last checkpoint; returns them with the token to checkpoint"""
+        with self._lock:
+            end = min(self._checkpoint + max_items, len(self._events))
+            return list(self._events[self._checkpoint:end]), end
+
+    def checkpoint(self, token: int) -> None:
+        """Mark everything before token as processed and release it"""
+        with self._lock:
+            released = token - self._checkpoint
+            if released <= 0:
+                return
+            del self._events[:released]
+            self._checkpoint = 0
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events) - self._checkpoint
+
+
+class PipelineStage:
+    """One unit of work over a batch; returns the items to hand to the next stage"""
+
+    name = "stage"
+
+    def process(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        """Called once the last processed batch has been checkpointed"""
+
+
+class DedupStage(PipelineStage):
+    """
+    Drop unchanged snapshots and content this worker already processed
+    A batch's hashes are only remembered once it is checkpointed, so a failed batch is not deduped on retry
+    """
+
+    name = "dedup"
+
+    def __init__(self, max_hashes: int = 10000):
+        self.max_hashes = max_hashes
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._pending: List[str] = []
+
+    def process(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self._pending = []
+        unique = []
+        for snapshot in batch:
+            if not snapshot.get('has_changed', True):
+                continue
+
+            content_hash = snapshot.get('content_hash') or _hash_text(snapshot.get('content', ''))
+            if content_hash in self._seen:
+                self._seen.move_to_end(content_hash)
+                continue
+            if content_hash in self._pending:
+                continue
+
+            self._pending.append(content_hash)
+            unique.append(snapshot)
+        return unique
+
+    def commit(self) -> None:
+        for content_hash in self._pending:
+            self._seen[content_hash] = None
+        while len(self._seen) > self.max_hashes:
+            self._seen.popitem(last=False)
+        self._pending = []
+
+
+class SummarizeStage(PipelineStage):
+    """Apply quality rules and summarize each snapshot into processed content"""
+
+    name = "summarize"
+
+    def __init__(self, process_fn: Callable[[Dict[str, Any], Dict[str, Any]], Optional[Dict[str, Any]]],
+                 quality_fn: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self.process_fn = process_fn
+        self.quality_fn = quality_fn
+
+    def process(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        processed = []
+        for snapshot in batch:
+            crawl_result, source = snapshot_to_crawl(snapshot)
+            if self.quality_fn and not self.quality_fn(crawl_result):
+                continue
+
+            result = self.process_fn(crawl_result, source)
+            if result:
+                result['content_hash'] = snapshot.get('content_hash') or _hash_text(crawl_result['content'])
+                processed.append(result)
+        return processed
+
+
+class IndexStage(PipelineStage):
+    """Index processed content in one bulk call; any failed item fails the batch so it is retried"""
+
+    name = "index"
+
+    def __init__(self, vector_client):
+        self.vector_client = vector_client
+
+    def process(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        documents = [build_index_document(item) for item in batch]
+        if not documents:
+            return []
+
+        outcomes = self.vector_client.store_contents(documents)
+        _raise_for_failures(self.name, [document['id'] for document in documents], outcomes)
+        return [dict(item, content_id=document['id']) for item, document in zip(batch, documents)]
+
+
+class QueueStage(PipelineStage):
+    """Add processed content to the editorial queue in per-location batches; any failed item fails the batch"""
+
+    name = "queue"
+
+    def __init__(self, storage_client):
+        self.storage_client = storage_client
+
+    def process(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not batch:
+            return []
+
+        items = [
+            {
+                'source_url': item.get('source_url', ''),
+                'location': item['location'],
+                'processed_content': item,
+                'queue_item_id': item.get('content_id') or content_id_for(item)
+            }
+            for item in batch
+        ]
+        outcomes = self.storage_client.add_items_to_editorial_queue(items)
+        _raise_for_failures(self.name, [queued['queue_item_id'] for queued in items], outcomes)
+        return batch
+
+
+class SnapshotPipeline:
+    """Runs change events through the stages in batches, checkpointing after each batch"""
+
+    def __init__(self, stages: List[PipelineStage], batch_size: int = 100):
+        self.stages = stages
+        self.batch_size = batch_size
+        self.stats: Dict[str, Dict[str, int]] = {
+            stage.name: {'in': 0, 'out': 0} for stage in stages
+        }
+
+    def process_batch(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run one batch through every stage and return what came out of the last one"""
+        batch = events
+        for stage in self.stages:
+            if not batch:
+                break
+            self.stats[stage.name]['in'] += len(batch)
+            batch = stage.process(batch)
+            self.stats[stage.name]['out'] += len(batch)
+        return batch
+
+    def commit(self) -> None:
+        """Tell every stage the last processed batch was checkpointed"""
+        for stage in self.stages:
+            stage.commit()
+
+    def run(self, feed, max_batches: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Drain a change feed; a batch is only checkpointed once every stage has handled it"""
+        outputs = []
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            events, token = feed.read_batch(self.batch_size)
+            if not events:
+                break
+
+            outputs.extend(self.process_batch(events))
+            feed.checkpoint(token)
+            self.commit()
+            batches += 1
+
+        logging.info(f"Pipeline processed {batches} batches: {self.stats}")
+        return outputs
+
+
+def snapshot_to_crawl(snapshot: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split a stored snapshot back into the crawl result and source it came from"""
+    metadata = snapshot.get('metadata') or {}
+    url = snapshot.get('source_url', '')
+    crawl_result = {
+        'url': url,
+        'title': metadata.get('title', ''),
+        'content': snapshot.get('content', ''),
+        'crawl_timestamp': metadata.get('crawl_timestamp', snapshot.get('timestamp'))
+    }
+    source = {
+        'url': url,
+        'location': metadata.get('location', ''),
+        'category': metadata.get('category', 'general')
+    }
+    return crawl_result, source
+
+
+def content_id_for(item: Dict[str, Any]) -> str:
+    """Stable id for processed content: the same source and content always map to one document"""
+    key = f"{item.get('source_url', '')}\n{item.get('content_hash', '')}"
+    return f"crawl-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}"
+
+
+def build_index_document(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Search index document for processed crawl content"""
+    return {
+        'id': content_id_for(item),
+        'title': item.get('original_title') or 'Untitled',
+        'content': item.get('summary', ''),
+        'category': item.get('category', 'general'),
+        'location': item.get('location', ''),
+        'date': item.get('processed_timestamp'),
+        'url': item.get('source_url', ''),
+        'source': 'crawler'
+    }
+
+
+def build_snapshot_pipeline(process_fn, quality_fn=None, vector_client=None, storage_client=None,
+                            batch_size: int = 100) -> SnapshotPipeline:
+    """Assemble the standard stages; indexing and queueing are skipped when their client is absent"""
+    stages: List[PipelineStage] = [DedupStage(), SummarizeStage(process_fn, quality_fn)]
+    if vector_client is not None:
+        stages.append(IndexStage(vector_client))
+    if storage_client is not None:
+        stages.append(QueueStage(storage_client))
+    return SnapshotPipeline(stages, batch_size=batch_size)
+
+
+def _raise_for_failures(stage: str, keys: List[str], outcomes: Dict[str, bool]) -> None:
+    """
+    Fail the whole batch when any item failed, before it is checkpointed or its dedup hashes are kept
+    Indexing and queueing are idempotent, so items that did succeed are harmless to redo on retry
+    """
+    failed = [key for key in keys if not outcomes.get(key)]
+    if failed:
+        raise RuntimeError(f"Pipeline stage {stage} failed for {len(failed)}/{len(keys)} items: {failed[:5]}")
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
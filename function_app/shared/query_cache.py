@@ -0,0 +1,81 @@
+"""
+TTL + LRU cache for vector search query results
+Per-location feeds only change on crawl or editorial approval, so repeated loads are served from memory
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+# Process-wide cache, shared across invocations on a warm worker
+_query_cache = None
+
+CacheKey = Tuple[str, str, str, Tuple[Any, ...]]
+
+
+class QueryResultCache:
+    """Result cache keyed by (method, location, query, filters) with TTL expiry and LRU eviction"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(method: str, location: str, query: str = '', filters: Tuple[Any, ...] = ()) -> CacheKey:
+        return method, (location or '').lower(), query or '', filters
+
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results (as copies) or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(result) for result in entry[1]]
+
+    def put(self, key: CacheKey, results: List[Dict[str, Any]]) -> None:
+        """Cache results for the configured TTL, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_location(self, location: str) -> int:
+        """Drop cached results for a location; regional content appears in every feed, so it clears all"""
+        location_key = (location or '').lower()
+        with self._lock:
+            if location_key == 'regional':
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+
+            stale = [key for key in self._entries if key[1] == location_key]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Get the process-wide query result cache (QUERY_CACHE_TTL_SECONDS, QUERY_CACHE_MAX_ENTRIES)"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryResultCache(
+            ttl_seconds=float(os.environ.get('QUERY_CACHE_TTL_SECONDS', 60)),
+            max_entries=int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 1024))
+        )
+    return _query_cache
@@ -0,0 +1,107 @@
+"""
+Hybrid keyword + vector ranking with location and recency boosting
+"""
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Standard RRF smoothing constant; dampens the advantage of the very top ranks
+RRF_K = 60
+
+# Score multipliers by how a document's location relates to the requested one
+EXACT_LOCATION_BOOST = 1.0
+REGIONAL_LOCATION_BOOST = 0.6
+OTHER_LOCATION_BOOST = 0.3
+
+DEFAULT_HALF_LIFE_HOURS = 72.0
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[str]], k: int = RRF_K,
+                           weights: Optional[List[float]] = None) -> Dict[str, float]:
+    """Fuse several best-first id lists into one score per id"""
+    weights = weights or [1.0] * len(ranked_lists)
+    scores: Dict[str, float] = {}
+    for ranked_ids, weight in zip(ranked_lists, weights):
+        for rank, doc_id in enumerate(ranked_ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return scores
+
+
+def recency_decay(epochs: np.ndarray, now: Optional[float] = None,
+                  half_life_hours: float = DEFAULT_HALF_LIFE_HOURS) -> np.ndarray:
+    """Exponential decay factor per document age; undated documents get the floor value"""
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    epochs = np.asarray(epochs, dtype=np.float64)
+    age_hours = np.clip((now - epochs) / 3600.0, 0.0, None)
+    decay = np.power(0.5, age_hours / half_life_hours)
+    # Keep a floor so an old but highly relevant item can still surface
+    return np.where(np.isfinite(epochs), 0.25 + 0.75 * decay, 0.25)
+
+
+def location_boost(locations: List[Optional[str]], location: str) -> np.ndarray:
+    """Multiplier per document: exact location beats regional content beats anything else"""
+    target = (location or '').lower()
+    return np.array([
+        EXACT_LOCATION_BOOST if (value or '').lower() == target
+        else REGIONAL_LOCATION_BOOST if (value or '').lower() == 'regional'
+        else OTHER_LOCATION_BOOST
+        for value in locations
+    ], dtype=np.float64)
+
+
+def hybrid_rank(documents: Dict[str, Dict[str, Any]], keyword_ids: List[str], vector_ids: List[str],
+                location: str, half_life_hours: float = DEFAULT_HALF_LIFE_HOURS,
+                now: Optional[float] = None) -> List[Tuple[Dict[str, Any], float]]:
+    """Fuse keyword and vector rankings, then apply location and recency boosts"""
+    fused = reciprocal_rank_fusion([keyword_ids, vector_ids])
+    doc_ids = [doc_id for doc_id in fused if doc_id in documents]
+    if not doc_ids:
+        return []
+
+    base = np.array([fused[doc_id] for doc_id in doc_ids], dtype=np.float64)
+    epochs = np.array([to_epoch(documents[doc_id].get('date')) for doc_id in doc_ids], dtype=np.float64)
+    boosts = location_boost([documents[doc_id].get('location') for doc_id in doc_ids], location)
+    scores = base * boosts * recency_decay(epochs, now, half_life_hours)
+
+    order = np.argsort(-scores, kind='stable')
+    return [(documents[doc_ids[i]], float(scores[i])) for i in order]
+
+
+def to_epoch(date_value: Any) -> float:
+    """ISO date string to epoch seconds, NaN when missing or unparseable"""
+    if not date_value:
+        return float('nan')
+    try:
+        parsed = datetime.fromisoformat(str(date_value).replace('Z', '+00:00'))
+    except ValueError:
+        return float('nan')
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def encode_continuation(offset: int, location: str, query: str) -> str:
+    """Opaque paging token bound to the query it was issued for"""
+    payload = {"o": offset, "q": _query_fingerprint(location, query)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_continuation(token: Optional[str], location: str, query: str) -> int:
+    """Offset encoded in a paging token; raises ValueError if it belongs to another query"""
+    if not token:
+        return 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, TypeError):
+        raise ValueError("Invalid continuation token")
+    if payload.get("q") != _query_fingerprint(location, query):
+        raise ValueError("Continuation token does not match this query")
+    return int(payload.get("o", 0))
+
+
+def _query_fingerprint(location: str, query: str) -> str:
+    return hashlib.sha256(f"{(location or '').lower()}\n{query or ''}".encode()).hexdigest()[:16]
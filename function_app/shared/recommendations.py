@@ -0,0 +1,184 @@
+"""
+Personalized feed ranking for user profiles
+Candidates come from precomputed per-location pools (or the vector index when none is stored yet)
+and are scored in one vectorized pass
+"""
+import os
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .bloom import SeenFilter
+from .candidate_pools import CandidatePool
+from .engagement import EngagementAggregates
+from .ranking import location_boost, recency_decay
+
+# Process-wide engine, shared across invocations on a warm worker
+_engine = None
+
+DEFAULT_LATENCY_BUDGET_MS = 50.0
+CANDIDATE_WINDOW_HOURS = 24 * 7
+CANDIDATES_PER_LOCATION = 100
+
+# Bonus for categories the user picked explicitly, on the same scale as learned affinity
+EXPLICIT_CATEGORY_BONUS = 0.5
+
+# Cap on how far learned preferences can reorder the feed, reached by highly engaged users
+MAX_PERSONALIZATION = 0.8
+
+
+class RecommendationEngine:
+    """Ranks recent location content by category affinity, recency, location and engagement"""
+
+    def __init__(self, vector_client, latency_budget_ms: float = DEFAULT_LATENCY_BUDGET_MS,
+                 candidates_per_location: int = CANDIDATES_PER_LOCATION,
+                 window_hours: int = CANDIDATE_WINDOW_HOURS, pool_store=None):
+        self.vector_client = vector_client
+        self.latency_budget_ms = latency_budget_ms
+        self.candidates_per_location = candidates_per_location
+        self.window_hours = window_hours
+        self.pool_store = pool_store
+
+    def recommend(self, profile: Dict[str, Any], top_k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k unseen items for a profile, cut short if the latency budget runs out"""
+        started = time.perf_counter()
+        deadline = started + self.latency_budget_ms / 1000.0
+
+        pool = self.gather_candidates(profile, deadline)
+        seen = SeenFilter.from_dict(profile.get('seen_filter'))
+        ranked = self.rank(profile, pool, seen, top_k)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if elapsed_ms > self.latency_budget_ms:
+            logging.warning(f"Recommendations for {profile.get('user_id')} took {elapsed_ms:.1f} ms "
+                            f"(budget {self.latency_budget_ms:.0f} ms)")
+        return ranked
+
+    def gather_candidates(self, profile: Dict[str, Any], deadline: float) -> CandidatePool:
+        """Candidate pools for the primary then additional locations, stopping at the deadline"""
+        locations = [profile.get('primary_location')] + list(profile.get('additional_locations') or [])
+        pools: List[CandidatePool] = []
+
+        for location in filter(None, locations):
+            if pools and time.perf_counter() >= deadline:
+                logging.info(f"Recommendation budget reached before fetching {location}")
+                break
+            pool = self.candidate_pool(location)
+            if pool is not None:
+                pools.append(pool)
+
+        return CandidatePool.concat(pools)
+
+    def pool_versions(self, locations: List[str]) -> Dict[str, Optional[str]]:
+        """Stored pool version per location; None where pools are not precomputed"""
+        if self.pool_store is None:
+            return {location: None for location in locations}
+        try:
+            return self.pool_store.versions(locations)
+        except Exception as e:
+            logging.warning(f"Failed to read candidate pool versions: {str(e)}")
+            return {location: None for location in locations}
+
+    def candidate_pool(self, location: str) -> Optional[CandidatePool]:
+        """Precomputed pool for a location, or one built from the index when none is stored yet"""
+        if self.pool_store is not None:
+            try:
+                pool = self.pool_store.get(location)
+                if pool is not None:
+                    return pool
+            except Exception as e:
+                logging.warning(f"Failed to load candidate pool for {location}: {str(e)}")
+
+        try:
+            results = self.vector_client.get_recent_content(
+                location, hours=self.window_hours, top=self.candidates_per_location)
+        except Exception as e:
+            logging.warning(f"Failed to fetch candidates for {location}: {str(e)}")
+            return None
+        return CandidatePool.build(location, results)
+
+    def rank(self, profile: Dict[str, Any], pool: CandidatePool,
+             seen: Optional[SeenFilter] = None, top_k: int = 10,
+             now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Score the pool in one vectorized pass and return the top-k unseen items as feed items"""
+        if not len(pool):
+            return []
+
+        scores = self.score(profile, pool, now)
+        if seen is not None:
+            scores = np.where(seen.contains_hashes(*pool.id_hashes), -np.inf, scores)
+
+        k = min(top_k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return [to_feed_item(pool.items[i], float(scores[i])) for i in top]
+
+    def score(self, profile: Dict[str, Any], pool: CandidatePool,
+              now: Optional[float] = None) -> np.ndarray:
+        """Score per candidate: location boost x recency x (1 + personalization x affinity) x popularity"""
+        # Per-profile lookup tables over the pool's interned names, so per-candidate work is array indexing
+        affinities = category_affinities(profile)
+        affinity_table = np.array([affinities.get(name, 0.0) for name in pool.category_names] or [0.0],
+                                  dtype=np.float64)
+        boost_table = location_boost(pool.location_names or [None], profile.get('primary_location') or '')
+
+        personalization = personalization_strength(profile)
+        return (boost_table[pool.location_codes] * recency_decay(pool.epochs, now) *
+                (1.0 + personalization * affinity_table[pool.category_codes]) * pool.popularity)
+
+
+def category_affinities(profile: Dict[str, Any]) -> Dict[str, float]:
+    """Learned category interest scaled to [-1, 1], plus a bonus for explicitly chosen categories"""
+    learned = EngagementAggregates.from_profile(profile).category_scores()
+    scale = max((abs(value) for value in learned.values()), default=0.0) or 1.0
+    affinities = {category.lower(): value / scale for category, value in learned.items()}
+
+    for category in profile.get('categories') or []:
+        key = category.lower()
+        affinities[key] = min(1.0, affinities.get(key, 0.0) + EXPLICIT_CATEGORY_BONUS)
+    return affinities
+
+
+def personalization_strength(profile: Dict[str, Any]) -> float:
+    """How strongly affinity reorders the feed; grows with the user's engagement score"""
+    engagement = max(float(profile.get('engagement_score') or 0.0), 0.0)
+    return min(MAX_PERSONALIZATION, 0.2 + engagement / (engagement + 2.0))
+
+
+def to_feed_item(document: Dict[str, Any], score: float) -> Dict[str, Any]:
+    """Feed entry returned to the app"""
+    return {
+        'id': document['id'],
+        'title': document.get('title'),
+        'category': document.get('category'),
+        'location': document.get('location'),
+        'url': document.get('url'),
+        'timestamp': document.get('date'),
+        'score': round(score, 6)
+    }
+
+
+def recommendations_configured() -> bool:
+    """Whether a vector backend is available to source candidates"""
+    return bool(os.environ.get('AZURE_AISEARCH_ENDPOINT')) or os.environ.get('VECTOR_BACKEND', '').lower() == 'local'
+
+
+def get_recommendation_engine() -> RecommendationEngine:
+    """Get the process-wide recommendation engine (RECOMMENDATION_BUDGET_MS sets the latency budget)"""
+    global _engine
+    if _engine is None:
+        from .vector_client import create_vector_client
+        from .storage_backend import storage_configured
+        from .candidate_pools import get_candidate_pool_store
+
+        _engine = RecommendationEngine(
+            create_vector_client(),
+            latency_budget_ms=float(os.environ.get('RECOMMENDATION_BUDGET_MS', DEFAULT_LATENCY_BUDGET_MS)),
+            pool_store=get_candidate_pool_store() if storage_configured() else None
+        )
+    return _engine
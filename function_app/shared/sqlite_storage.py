@@ -0,0 +1,540 @@
+"""
+Local SQLite storage backend for running without Cosmos DB
+Uses WAL mode so readers never block the writer; documents are stored as JSON beside indexed columns
+"""
+import json
+import uuid
+import base64
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from .storage_backend import StorageBackend, compute_next_due_at
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_snapshots (
+    id TEXT PRIMARY KEY,
+    source_url TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    has_changed INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source_url ON content_snapshots (source_url, timestamp);
+
+CREATE TABLE IF NOT EXISTS crawling_targets (
+    url TEXT PRIMARY KEY,
+    location TEXT NOT NULL,
+    frequency TEXT,
+    next_due_at TEXT NOT NULL DEFAULT '',
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_targets_location ON crawling_targets (location, url);
+CREATE INDEX IF NOT EXISTS idx_targets_next_due_at ON crawling_targets (next_due_at);
+
+CREATE TABLE IF NOT EXISTS editorial_queue (
+    location TEXT NOT NULL,
+    id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    review_score REAL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (location, id)
+);
+CREATE INDEX IF NOT EXISTS idx_queue_status_created ON editorial_queue (location, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_queue_status_score ON editorial_queue (location, status, review_score DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS candidate_pools (
+    location TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stale_candidate_pools (
+    location TEXT PRIMARY KEY,
+    marker TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_feeds (
+    user_id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS content_engagement (
+    content_id TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_engagement_updated_at ON content_engagement (updated_at, content_id);
+"""
+
+# Ids per IN (...) lookup, below SQLite's default bound-parameter limit
+ENGAGEMENT_LOOKUP_CHUNK = 500
+
+
+class SQLiteStorageClient(StorageBackend):
+    """Storage backend on an embedded SQLite database"""
+
+    def __init__(self, path: str = 'community_hub.db'):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        logging.info(f"Opened SQLite storage at {path}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def store_content_snapshot(self, url: str, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store content snapshot and detect changes"""
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        timestamp = datetime.utcnow().isoformat()
+
+        existing = self.get_latest_snapshot(url)
+        has_changed = not existing or existing.get('content_hash') != content_hash
+
+        snapshot = {
+            'id': f"{url}_{timestamp}",
+            'source_url': url,
+            'content': content,
+            'content_hash': content_hash,
+            'timestamp': timestamp,
+            'metadata': metadata,
+            'has_changed': has_changed,
+            'ttl': int((datetime.utcnow() + timedelta(days=90)).timestamp())
+        }
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO content_snapshots (id, source_url, timestamp, content_hash, has_changed, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (snapshot['id'], url, timestamp, content_hash, int(has_changed), json.dumps(snapshot))
+            )
+        logging.info(f"Stored content snapshot for {url}, changed: {has_changed}")
+        return snapshot
+
+    def get_latest_snapshot(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the latest content snapshot for a URL"""
+        row = self._fetchone(
+            "SELECT body FROM content_snapshots WHERE source_url = ? ORDER BY timestamp DESC LIMIT 1",
+            (url,)
+        )
+        return json.loads(row[0]) if row else None
+
+    def store_crawling_target(self, target: Dict[str, Any]) -> bool:
+        """Store or update a crawling target"""
+        try:
+            target['id'] = target['url']
+            target['last_updated'] = datetime.utcnow().isoformat()
+            target['next_due_at'] = compute_next_due_at(target)
+
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO crawling_targets (url, location, frequency, next_due_at, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (target['url'], target['location'], target.get('frequency'),
+                     target['next_due_at'], json.dumps(target))
+                )
+            logging.info(f"Stored crawling target: {target['url']}")
+            return True
+        except (sqlite3.Error, KeyError) as e:
+            logging.error(f"Failed to store crawling target: {str(e)}")
+            return False
+
+    def iter_crawling_targets(self, location: Optional[str] = None,
+                              page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream crawling targets page by page"""
+        token = None
+        while True:
+            targets, token = self.get_crawling_targets_page(location, page_size, token)
+            yield from targets
+            if not token:
+                return
+
+    def get_crawling_targets_page(self, location: Optional[str] = None, limit: int = 100,
+                                  continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of crawling targets and the continuation token for the next page"""
+        after = _decode_token(continuation_token)
+        clauses, parameters = [], []
+        if location:
+            clauses.append("location = ?")
+            parameters.append(location)
+        if after:
+            clauses.append("url > ?")
+            parameters.append(after[0])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._fetchall(
+            f"SELECT body, url FROM crawling_targets {where} ORDER BY url LIMIT ?",
+            (*parameters, limit)
+        )
+        return self._page(rows, limit)
+
+    def iter_due_crawling_targets(self, now: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stream crawling targets whose next crawl is due, using the next_due_at index"""
+        due_before = (now or datetime.utcnow()).isoformat()
+        rows = self._fetchall(
+            "SELECT body FROM crawling_targets WHERE next_due_at <= ? ORDER BY next_due_at",
+            (due_before,)
+        )
+        for row in rows:
+            yield json.loads(row[0])
+
+    def update_crawling_frequency(self, url: str, frequency: str, location: str) -> bool:
+        """Update crawling frequency for a target"""
+        with self._lock:
+            row = self._fetchone(
+                "SELECT body FROM crawling_targets WHERE url = ? AND location = ?", (url, location)
+            )
+            if not row:
+                logging.error(f"Failed to update crawling frequency: no target {url} in {location}")
+                return False
+
+            target = json.loads(row[0])
+            target['frequency'] = frequency
+            target['frequency_updated'] = datetime.utcnow().isoformat()
+            target['next_due_at'] = compute_next_due_at(target)
+
+            self._conn.execute(
+                "UPDATE crawling_targets SET frequency = ?, next_due_at = ?, body = ? WHERE url = ?",
+                (frequency, target['next_due_at'], json.dumps(target), url)
+            )
+        logging.info(f"Updated frequency for {url} to {frequency}")
+        return True
+
+    def add_to_editorial_queue(self, content: Dict[str, Any]) -> bool:
+        """Add content to editorial queue"""
+        try:
+            queue_item = self._build_queue_item(content)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO editorial_queue (location, id, status, created_at, review_score, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    _queue_row(queue_item)
+                )
+            logging.info(f"Added item to editorial queue: {queue_item['id']}")
+            return True
+        except (sqlite3.Error, KeyError) as e:
+            logging.error(f"Failed to add to editorial queue: {str(e)}")
+            return False
+
+    def add_items_to_editorial_queue(self, contents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Add many content items to the editorial queue in one transaction; existing ids keep their status"""
+        queue_items = [self._build_queue_item(content, item_id=content.get('queue_item_id'))
+                       for content in contents]
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO editorial_queue (location, id, status, created_at, review_score, body) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [_queue_row(item) for item in queue_items]
+                    )
+                    self._conn.execute("COMMIT")
+                except sqlite3.Error:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            outcomes = {item['id']: True for item in queue_items}
+        except sqlite3.Error as e:
+            logging.error(f"Failed to add batch to editorial queue: {str(e)}")
+            outcomes = {item['id']: False for item in queue_items}
+
+        logging.info(f"Added {sum(outcomes.values())}/{len(outcomes)} items to editorial queue")
+        return outcomes
+
+    def iter_editorial_queue(self, location: str, status: str = 'pending',
+                             page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream editorial queue items page by page"""
+        token = None
+        while True:
+            items, token = self.get_editorial_queue_page(location, status, page_size, token)
+            yield from items
+            if not token:
+                return
+
+    def get_editorial_queue_page(self, location: str, status: str = 'pending', limit: int = 50,
+                                 continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of editorial queue items, newest first, via keyset pagination"""
+        return self._queue_page('created_at', location, status, limit, continuation_token)
+
+    def get_review_queue(self, location: str, status: str = 'pending', limit: int = 50,
+                         continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get the next queue items to review, most important first, with a continuation token"""
+        return self._queue_page('review_score', location, status, limit, continuation_token)
+
+    def get_editorial_queue_stats(self, location: str) -> Dict[str, int]:
+        """Count editorial queue items per status for a location"""
+        rows = self._fetchall(
+            "SELECT status, COUNT(1) FROM editorial_queue WHERE location = ? GROUP BY status", (location,)
+        )
+        return {status: count for status, count in rows}
+
+    def update_queue_item_status(self, item_id: str, location: str, status: str,
+                                 editor_notes: Optional[str] = None) -> bool:
+        """Update editorial queue item status"""
+        return self.update_queue_items_status(location, [
+            {'item_id': item_id, 'status': status, 'editor_notes': editor_notes}
+        ])[item_id]
+
+    def update_queue_items_status(self, location: str, updates: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Apply status changes to many queue items in one transaction, patching the stored JSON in place"""
+        updated_at = datetime.utcnow().isoformat()
+        outcomes = {}
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for update in updates:
+                    notes = update.get('editor_notes')
+                    cursor = self._conn.execute(
+                        "UPDATE editorial_queue SET status = ?, "
+                        "body = json_set(body, '$.status', ?, '$.updated_at', ?, "
+                        "'$.editor_notes', COALESCE(?, json_extract(body, '$.editor_notes'))) "
+                        "WHERE location = ? AND id = ?",
+                        (update['status'], update['status'], updated_at, notes, location, update['item_id'])
+                    )
+                    outcomes[update['item_id']] = cursor.rowcount == 1
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                logging.error(f"Failed to update queue items in {location}: {str(e)}")
+                return {update['item_id']: False for update in updates}
+
+        logging.info(f"Updated {sum(outcomes.values())}/{len(outcomes)} queue items in {location}")
+        return outcomes
+
+    def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user profile, or None if it does not exist"""
+        row = self._fetchone("SELECT body FROM user_profiles WHERE user_id = ?", (user_id,))
+        return json.loads(row[0]) if row else None
+
+    def store_user_profile(self, profile: Dict[str, Any]) -> bool:
+        """Create or replace a user profile"""
+        try:
+            profile['id'] = profile['user_id']
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_profiles (user_id, body) VALUES (?, ?)",
+                    (profile['user_id'], json.dumps(profile))
+                )
+            return True
+        except (sqlite3.Error, KeyError) as e:
+            logging.error(f"Failed to store user profile: {str(e)}")
+            return False
+
+    def get_candidate_pool(self, location: str) -> Optional[Dict[str, Any]]:
+        """Get the serialized recommendation candidate pool for a location, or None if not built"""
+        row = self._fetchone("SELECT body FROM candidate_pools WHERE location = ?", (location,))
+        return json.loads(row[0]) if row else None
+
+    def store_candidate_pool(self, location: str, pool: Dict[str, Any]) -> bool:
+        """Create or replace the recommendation candidate pool for a location"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO candidate_pools (location, version, body) VALUES (?, ?, ?)",
+                    (location, pool.get('version', ''), json.dumps({**pool, 'location': location}))
+                )
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store candidate pool: {str(e)}")
+            return False
+
+    def mark_candidate_pools_stale(self, locations: List[str]) -> bool:
+        """Record that these locations' candidate pools need rebuilding by the pool builder"""
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO stale_candidate_pools (location, marker) VALUES (?, ?)",
+                    [(location, uuid.uuid4().hex) for location in sorted(set(locations))]
+                )
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Failed to mark candidate pools stale: {str(e)}")
+            return False
+
+    def get_stale_candidate_pools(self) -> Dict[str, str]:
+        """Locations whose pools need rebuilding, each with the marker to clear once rebuilt"""
+        return dict(self._fetchall("SELECT location, marker FROM stale_candidate_pools", ()))
+
+    def clear_stale_candidate_pool(self, location: str, marker: str) -> bool:
+        """Clear a location's rebuild marker, unless it was marked again since the marker was read"""
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM stale_candidate_pools WHERE location = ? AND marker = ?", (location, marker)
+                )
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logging.error(f"Failed to clear stale candidate pool marker: {str(e)}")
+            return False
+
+    def get_user_feed(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's materialized recommendation feed, or None if not cached"""
+        row = self._fetchone("SELECT body FROM user_feeds WHERE user_id = ?", (user_id,))
+        return json.loads(row[0]) if row else None
+
+    def store_user_feed(self, user_id: str, feed: Dict[str, Any]) -> bool:
+        """Create or replace a user's materialized recommendation feed"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_feeds (user_id, body) VALUES (?, ?)",
+                    (user_id, json.dumps(feed))
+                )
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store user feed: {str(e)}")
+            return False
+
+    def iter_content_engagement(self, updated_since: Optional[str] = None,
+                                page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Lazily stream per-content engagement records, optionally only those updated since a time"""
+        after = None
+        while True:
+            clauses, parameters = [], []
+            if updated_since:
+                clauses.append("updated_at >= ?")
+                parameters.append(updated_since)
+            if after:
+                clauses.append("content_id > ?")
+                parameters.append(after)
+
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = self._fetchall(
+                f"SELECT body, content_id FROM content_engagement {where} ORDER BY content_id LIMIT ?",
+                (*parameters, page_size)
+            )
+            for row in rows:
+                yield json.loads(row[0])
+            if len(rows) < page_size:
+                return
+            after = rows[-1][1]
+
+    def get_content_engagement(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """Get the engagement record for one content item, or None if it has none"""
+        row = self._fetchone("SELECT body FROM content_engagement WHERE content_id = ?", (content_id,))
+        return json.loads(row[0]) if row else None
+
+    def get_content_engagement_many(self, content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Engagement records for many content items, keyed by content id; items without one are left out"""
+        records = {}
+        content_ids = list(dict.fromkeys(content_ids))
+        for start in range(0, len(content_ids), ENGAGEMENT_LOOKUP_CHUNK):
+            chunk = content_ids[start:start + ENGAGEMENT_LOOKUP_CHUNK]
+            rows = self._fetchall(
+                f"SELECT content_id, body FROM content_engagement WHERE content_id IN ({','.join('?' * len(chunk))})",
+                tuple(chunk)
+            )
+            records.update((content_id, json.loads(body)) for content_id, body in rows)
+        return records
+
+    def store_content_engagement(self, records: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Write many per-content engagement records in one transaction; returns success per content id
+        `_etag` emulates Cosmos optimistic concurrency: a record is only written over the version it was read from
+        """
+        outcomes = {}
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    for record in records:
+                        row = self._conn.execute(
+                            "SELECT body FROM content_engagement WHERE content_id = ?", (record['content_id'],)
+                        ).fetchone()
+                        if (json.loads(row[0]).get('_etag') if row else None) != record.get('_etag'):
+                            logging.info(f"Engagement for {record['content_id']} changed concurrently")
+                            outcomes[record['content_id']] = False
+                            continue
+                        self._put_engagement({**record, 'id': record['content_id']})
+                        outcomes[record['content_id']] = True
+                    self._conn.execute("COMMIT")
+                except sqlite3.Error:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return outcomes
+        except (sqlite3.Error, KeyError) as e:
+            logging.error(f"Failed to store content engagement: {str(e)}")
+            return {record.get('content_id'): False for record in records}
+
+    def advance_content_level(self, content_id: str, from_level: str, to_level: str, changed_at: str) -> bool:
+        """Move a content item's spread level forward, touching nothing else, if it is still at from_level"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT body FROM content_engagement WHERE content_id = ?", (content_id,)
+                ).fetchone()
+                record = json.loads(row[0]) if row else None
+                if not record or record.get('level', 'Local') != from_level:
+                    logging.info(f"Spread level of {content_id} already moved past {from_level}")
+                    return False
+                self._put_engagement({**record, 'level': to_level, 'level_changed_at': changed_at})
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Failed to advance spread level for {content_id}: {str(e)}")
+            return False
+
+    def _put_engagement(self, record: Dict[str, Any]) -> None:
+        """Write an engagement record under a fresh `_etag`; callers hold the lock"""
+        record = {**record, '_etag': uuid.uuid4().hex}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO content_engagement (content_id, updated_at, body) VALUES (?, ?, ?)",
+            (record['content_id'], record.get('updated_at') or '', json.dumps(record))
+        )
+
+    def _queue_page(self, order_column: str, location: str, status: str, limit: int,
+                    continuation_token: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One descending page of the queue; the token is the last (order value, id) returned"""
+        after = _decode_token(continuation_token)
+        keyset = f"AND ({order_column}, id) < (?, ?)" if after else ""
+        rows = self._fetchall(
+            f"SELECT body, {order_column}, id FROM editorial_queue "
+            f"WHERE location = ? AND status = ? {keyset} "
+            f"ORDER BY {order_column} DESC, id DESC LIMIT ?",
+            (location, status, *(after or ()), limit)
+        )
+        return self._page(rows, limit)
+
+    def _page(self, rows: List[tuple], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Decode a page of (body, *sort key) rows; a full page gets a token for the next one"""
+        items = [json.loads(row[0]) for row in rows]
+        token = _encode_token(rows[-1][1:]) if rows and len(rows) == limit else None
+        return items, token
+
+    def _fetchone(self, query: str, parameters: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(query, parameters).fetchone()
+
+    def _fetchall(self, query: str, parameters: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(query, parameters).fetchall()
+
+
+def _queue_row(queue_item: Dict[str, Any]) -> tuple:
+    return (queue_item['location'], queue_item['id'], queue_item['status'], queue_item['created_at'],
+            queue_item.get('review_score'), json.dumps(queue_item))
+
+
+def _encode_token(sort_key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(sort_key)).encode()).decode()
+
+
+def _decode_token(token: Optional[str]) -> Optional[tuple]:
+    if not token:
+        return None
+    try:
+        return tuple(json.loads(base64.urlsafe_b64decode(token.encode()).decode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid continuation token")
@@ -0,0 +1,251 @@
+"""
+Storage backend interface shared by the Cosmos DB and local SQLite implementations
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+# Process-wide backend, shared across invocations on a warm worker
+_storage_client = None
+
+# Review score head start, in seconds, by priority and significance.
+# review_score = boost - created_epoch, so a boosted item ranks as if it had waited that much longer
+PRIORITY_BOOST_SECONDS = {
+    'low': 0,
+    'normal': 6 * 3600,
+    'medium': 6 * 3600,
+    'high': 24 * 3600,
+    'very_high': 72 * 3600,
+    'urgent': 72 * 3600
+}
+SIGNIFICANCE_BOOST_SECONDS = {
+    'low': 0,
+    'medium': 6 * 3600,
+    'high': 24 * 3600
+}
+
+CRAWL_INTERVALS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1)
+}
+
+
+class StorageBackend(ABC):
+    """Content snapshots, crawling targets, editorial queue and user profiles"""
+
+    @abstractmethod
+    def store_content_snapshot(self, url: str, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store content snapshot and detect changes"""
+
+    @abstractmethod
+    def get_latest_snapshot(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the latest content snapshot for a URL"""
+
+    @abstractmethod
+    def store_crawling_target(self, target: Dict[str, Any]) -> bool:
+        """Store or update a crawling target"""
+
+    @abstractmethod
+    def iter_crawling_targets(self, location: Optional[str] = None,
+                              page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream crawling targets page by page"""
+
+    @abstractmethod
+    def get_crawling_targets_page(self, location: Optional[str] = None, limit: int = 100,
+                                  continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of crawling targets and the continuation token for the next page"""
+
+    @abstractmethod
+    def update_crawling_frequency(self, url: str, frequency: str, location: str) -> bool:
+        """Update crawling frequency for a target"""
+
+    @abstractmethod
+    def add_to_editorial_queue(self, content: Dict[str, Any]) -> bool:
+        """Add content to editorial queue"""
+
+    @abstractmethod
+    def add_items_to_editorial_queue(self, contents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Add many content items to the editorial queue; items already queued under the same id are left as they are"""
+
+    @abstractmethod
+    def iter_editorial_queue(self, location: str, status: str = 'pending',
+                             page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream editorial queue items, newest first"""
+
+    @abstractmethod
+    def get_editorial_queue_page(self, location: str, status: str = 'pending', limit: int = 50,
+                                 continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of editorial queue items and the continuation token for the next page"""
+
+    @abstractmethod
+    def get_review_queue(self, location: str, status: str = 'pending', limit: int = 50,
+                         continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get the next queue items to review, most important first, with a continuation token"""
+
+    @abstractmethod
+    def get_editorial_queue_stats(self, location: str) -> Dict[str, int]:
+        """Count editorial queue items per status for a location"""
+
+    @abstractmethod
+    def update_queue_item_status(self, item_id: str, location: str, status: str,
+                                 editor_notes: Optional[str] = None) -> bool:
+        """Update editorial queue item status"""
+
+    @abstractmethod
+    def update_queue_items_status(self, location: str, updates: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Apply status changes to many queue items in one location"""
+
+    @abstractmethod
+    def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user profile, or None if it does not exist"""
+
+    @abstractmethod
+    def store_user_profile(self, profile: Dict[str, Any]) -> bool:
+        """Create or replace a user profile"""
+
+    @abstractmethod
+    def get_candidate_pool(self, location: str) -> Optional[Dict[str, Any]]:
+        """Get the serialized recommendation candidate pool for a location, or None if not built"""
+
+    @abstractmethod
+    def store_candidate_pool(self, location: str, pool: Dict[str, Any]) -> bool:
+        """Create or replace the recommendation candidate pool for a location"""
+
+    @abstractmethod
+    def mark_candidate_pools_stale(self, locations: List[str]) -> bool:
+        """Record that these locations' candidate pools need rebuilding by the pool builder"""
+
+    @abstractmethod
+    def get_stale_candidate_pools(self) -> Dict[str, str]:
+        """Locations whose pools need rebuilding, each with the marker to clear once rebuilt"""
+
+    @abstractmethod
+    def clear_stale_candidate_pool(self, location: str, marker: str) -> bool:
+        """Clear a location's rebuild marker, unless it was marked again since the marker was read"""
+
+    @abstractmethod
+    def get_user_feed(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's materialized recommendation feed, or None if not cached"""
+
+    @abstractmethod
+    def store_user_feed(self, user_id: str, feed: Dict[str, Any]) -> bool:
+        """Create or replace a user's materialized recommendation feed"""
+
+    @abstractmethod
+    def iter_content_engagement(self, updated_since: Optional[str] = None,
+                                page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Lazily stream per-content engagement records, optionally only those updated since a time"""
+
+    @abstractmethod
+    def get_content_engagement(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """Get the engagement record for one content item, or None if it has none"""
+
+    @abstractmethod
+    def get_content_engagement_many(self, content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Engagement records for many content items, keyed by content id; items without one are left out"""
+
+    @abstractmethod
+    def store_content_engagement(self, records: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Write many per-content engagement records; returns success per content id
+        A record carrying the `_etag` it was read with replaces the stored one only if it is unchanged since,
+        and a record without one is only created if none exists yet
+        """
+
+    @abstractmethod
+    def advance_content_level(self, content_id: str, from_level: str, to_level: str, changed_at: str) -> bool:
+        """Move a content item's spread level forward, touching nothing else, if it is still at from_level"""
+
+    def get_crawling_targets(self, location: Optional[str] = None,
+                             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get crawling targets, optionally filtered by location"""
+        return list(islice(self.iter_crawling_targets(location), limit))
+
+    def iter_due_crawling_targets(self, now: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stream crawling targets whose next crawl is due"""
+        due_before = (now or datetime.utcnow()).isoformat()
+        for target in self.iter_crawling_targets():
+            if compute_next_due_at(target) <= due_before:
+                yield target
+
+    def get_editorial_queue(self, location: str, status: str = 'pending',
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get editorial queue items for a location"""
+        return list(islice(self.iter_editorial_queue(location, status), limit))
+
+    def _build_queue_item(self, content: Dict[str, Any], item_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build an editorial queue document for content"""
+        created_at = datetime.utcnow()
+        priority = content.get('priority', 'normal')
+        return {
+            'id': item_id or f"{content['source_url']}_{created_at.isoformat()}",
+            'location': content['location'],
+            'content': content,
+            'status': 'pending',
+            'created_at': created_at.isoformat(),
+            'priority': priority,
+            'review_score': compute_review_score(priority, _content_significance(content), created_at)
+        }
+
+
+def compute_review_score(priority: Optional[str], significance: Optional[str], created_at: datetime) -> float:
+    """Numeric review order: higher is reviewed sooner; older items gain on newer ones over time"""
+    boost = (PRIORITY_BOOST_SECONDS.get(priority or 'normal', PRIORITY_BOOST_SECONDS['normal']) +
+             SIGNIFICANCE_BOOST_SECONDS.get(significance or 'medium', SIGNIFICANCE_BOOST_SECONDS['medium']))
+    created_epoch = (created_at - datetime(1970, 1, 1)).total_seconds()
+    return boost - created_epoch
+
+
+def compute_next_due_at(target: Dict[str, Any]) -> str:
+    """ISO time of a target's next crawl; empty (sorts first) when it has never been crawled"""
+    last_crawl = target.get('last_crawl_time')
+    if not last_crawl:
+        return ''
+    try:
+        last = datetime.fromisoformat(last_crawl.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return ''
+    interval = CRAWL_INTERVALS.get(target.get('frequency', 'weekly'), CRAWL_INTERVALS['weekly'])
+    return (last + interval).isoformat()
+
+
+def _content_significance(content: Dict[str, Any]) -> Optional[str]:
+    """Significance from processed content, falling back to the top-level field"""
+    processed = content.get('processed_content') or {}
+    return processed.get('significance') or content.get('significance')
+
+
+def storage_configured() -> bool:
+    """Whether a persistent storage backend is configured"""
+    return os.environ.get('STORAGE_BACKEND', '').lower() == 'sqlite' or bool(os.environ.get('AZURE_COSMOS_ENDPOINT'))
+
+
+def change_feed_configured() -> bool:
+    """Whether snapshot writes land in Cosmos DB, whose change feed drives the snapshot pipeline"""
+    return os.environ.get('STORAGE_BACKEND', '').lower() != 'sqlite' and bool(os.environ.get('AZURE_COSMOS_ENDPOINT'))
+
+
+def get_storage_client() -> StorageBackend:
+    """
+    Get the process-wide storage backend
+    STORAGE_BACKEND=sqlite uses the local SQLite database at SQLITE_STORAGE_PATH, otherwise Cosmos DB
+    """
+    global _storage_client
+    if _storage_client is not None:
+        return _storage_client
+
+    if os.environ.get('STORAGE_BACKEND', '').lower() == 'sqlite':
+        from .sqlite_storage import SQLiteStorageClient
+
+        _storage_client = SQLiteStorageClient(os.environ.get('SQLITE_STORAGE_PATH', 'community_hub.db'))
+    else:
+        from .storage_client import ContentStorageClient
+
+        _storage_client = ContentStorageClient()
+
+    logging.info(f"Initialized storage backend {type(_storage_client).__name__}")
+    return _storage_client
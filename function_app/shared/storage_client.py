@@ -3,15 +3,41 @@ Azure storage client for content persistence and change detection
 """
 import os
 import logging
-import json
 import hashlib
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from datetime import datetime, timedelta
 from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosResourceExistsError
+from azure.core import MatchConditions
 from azure.identity import ManagedIdentityCredential
-from azure.core.exceptions import AzureError
+from azure.core.exceptions import AzureError, ResourceNotFoundError
 
-class ContentStorageClient:
+from .storage_backend import StorageBackend, compute_next_due_at
+from .cosmos_metrics import InstrumentedContainer, get_cosmos_metrics, track_method
+
+QUEUE_INDEXING_POLICY = {
+    'indexingMode': 'consistent',
+    'includedPaths': [{'path': '/*'}],
+    'excludedPaths': [{'path': '/content/*'}, {'path': '/"_etag"/?'}],
+    'compositeIndexes': [
+        [
+            {'path': '/status', 'order': 'ascending'},
+            {'path': '/review_score', 'order': 'descending'}
+        ],
+        [
+            {'path': '/status', 'order': 'ascending'},
+            {'path': '/created_at', 'order': 'descending'}
+        ]
+    ]
+}
+
+# Materialized feeds left untouched this long are dropped by Cosmos
+FEED_TTL_SECONDS = 7 * 24 * 3600
+
+# Content ids per engagement lookup query
+ENGAGEMENT_LOOKUP_CHUNK = 100
+
+class ContentStorageClient(StorageBackend):
     """Client for content storage and change detection using Cosmos DB"""
 
     def __init__(self):
@@ -53,10 +79,11 @@ class ContentStorageClient:
             offer_throughput=400
         )
 
-        # Editorial queue
+        # Editorial queue; the composite index serves "next N to review" as one ordered query
         self.queue_container = self.database.create_container_if_not_exists(
             id="editorial_queue",
             partition_key=PartitionKey(path="/location"),
+            indexing_policy=QUEUE_INDEXING_POLICY,
             offer_throughput=400
         )
 
@@ -67,6 +94,41 @@ class ContentStorageClient:
             offer_throughput=400
         )
 
+        # Precomputed recommendation candidates, one document per location
+        self.pools_container = self.database.create_container_if_not_exists(
+            id="candidate_pools",
+            partition_key=PartitionKey(path="/location"),
+            indexing_policy={"indexingMode": "none", "automatic": False},
+            offer_throughput=400
+        )
+
+        # Materialized recommendation feeds; expire on their own if a user goes quiet
+        self.feeds_container = self.database.create_container_if_not_exists(
+            id="user_feeds",
+            partition_key=PartitionKey(path="/user_id"),
+            indexing_policy={"indexingMode": "none", "automatic": False},
+            default_ttl=FEED_TTL_SECONDS,
+            offer_throughput=400
+        )
+
+        # Engagement per content item and spread level, read by the viral spread batch
+        self.engagement_container = self.database.create_container_if_not_exists(
+            id="content_engagement",
+            partition_key=PartitionKey(path="/content_id"),
+            offer_throughput=400
+        )
+
+        # Record request charge and latency for every call, attributed to the calling method
+        metrics = get_cosmos_metrics()
+        self.content_container = InstrumentedContainer(self.content_container, metrics, "/source_url")
+        self.targets_container = InstrumentedContainer(self.targets_container, metrics, "/location")
+        self.queue_container = InstrumentedContainer(self.queue_container, metrics, "/location")
+        self.users_container = InstrumentedContainer(self.users_container, metrics, "/user_id")
+        self.pools_container = InstrumentedContainer(self.pools_container, metrics, "/location")
+        self.feeds_container = InstrumentedContainer(self.feeds_container, metrics, "/user_id")
+        self.engagement_container = InstrumentedContainer(self.engagement_container, metrics, "/content_id")
+
+    @track_method
     def store_content_snapshot(self, url: str, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Store content snapshot and detect changes"""
         content_hash = hashlib.sha256(content.encode()).hexdigest()
@@ -95,6 +157,7 @@ class ContentStorageClient:
             logging.error(f"Failed to store content snapshot: {str(e)}")
             raise
 
+    @track_method
     def get_latest_snapshot(self, url: str) -> Optional[Dict[str, Any]]:
         """Get the latest content snapshot for a URL"""
         try:
@@ -112,11 +175,13 @@ class ContentStorageClient:
             logging.error(f"Failed to get latest snapshot: {str(e)}")
             return None
 
+    @track_method
     def store_crawling_target(self, target: Dict[str, Any]) -> bool:
         """Store or update a crawling target"""
         try:
             target['id'] = target['url']
             target['last_updated'] = datetime.utcnow().isoformat()
+            target['next_due_at'] = compute_next_due_at(target)
 
             self.targets_container.upsert_item(target)
             logging.info(f"Stored crawling target: {target['url']}")
@@ -125,24 +190,63 @@ class ContentStorageClient:
             logging.error(f"Failed to store crawling target: {str(e)}")
             return False
 
-    def get_crawling_targets(self, location: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get crawling targets, optionally filtered by location"""
+    @track_method
+    def iter_crawling_targets(self, location: Optional[str] = None,
+                              page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream crawling targets page by page"""
+        query, parameters = self._crawling_targets_query(location)
         try:
-            if location:
-                query = "SELECT * FROM c WHERE c.location = @location"
-                parameters = [{"name": "@location", "value": location}]
-            else:
-                query = "SELECT * FROM c"
-                parameters = []
-
-            return list(self.targets_container.query_items(
+            yield from self.targets_container.query_items(
                 query=query,
-                parameters=parameters
-            ))
+                parameters=parameters,
+                **self._targets_scope(location),
+                max_item_count=page_size
+            )
         except AzureError as e:
             logging.error(f"Failed to get crawling targets: {str(e)}")
-            return []
 
+    @track_method
+    def iter_due_crawling_targets(self, now: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stream crawling targets whose next crawl is due, filtered on next_due_at server-side"""
+        due_before = (now or datetime.utcnow()).isoformat()
+        try:
+            yield from self.targets_container.query_items(
+                query="SELECT * FROM c WHERE NOT IS_DEFINED(c.next_due_at) OR c.next_due_at <= @due_before",
+                parameters=[{"name": "@due_before", "value": due_before}],
+                enable_cross_partition_query=True
+            )
+        except AzureError as e:
+            logging.error(f"Failed to get due crawling targets: {str(e)}")
+
+    @track_method
+    def get_crawling_targets_page(self, location: Optional[str] = None, limit: int = 100,
+                                  continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of crawling targets and the continuation token for the next page"""
+        query, parameters = self._crawling_targets_query(location)
+        try:
+            pager = self.targets_container.query_items(
+                query=query,
+                parameters=parameters,
+                **self._targets_scope(location),
+                max_item_count=limit
+            ).by_page(continuation_token)
+            return _first_page(pager)
+        except AzureError as e:
+            logging.error(f"Failed to get crawling targets page: {str(e)}")
+            return [], None
+
+    def _targets_scope(self, location: Optional[str]) -> Dict[str, Any]:
+        # Targets are partitioned by location; only unscoped listings fan out across partitions
+        if location:
+            return {"partition_key": location}
+        return {"enable_cross_partition_query": True}
+
+    def _crawling_targets_query(self, location: Optional[str]) -> Tuple[str, List[Dict[str, Any]]]:
+        if location:
+            return "SELECT * FROM c WHERE c.location = @location", [{"name": "@location", "value": location}]
+        return "SELECT * FROM c", []
+
+    @track_method
     def update_crawling_frequency(self, url: str, frequency: str, location: str) -> bool:
         """Update crawling frequency for a target"""
         try:
@@ -150,6 +254,7 @@ class ContentStorageClient:
             target = self.targets_container.read_item(item=url, partition_key=location)
             target['frequency'] = frequency
             target['frequency_updated'] = datetime.utcnow().isoformat()
+            target['next_due_at'] = compute_next_due_at(target)
 
             self.targets_container.replace_item(item=target['id'], body=target)
             logging.info(f"Updated frequency for {url} to {frequency}")
@@ -158,17 +263,11 @@ class ContentStorageClient:
             logging.error(f"Failed to update crawling frequency: {str(e)}")
             return False
 
+    @track_method
     def add_to_editorial_queue(self, content: Dict[str, Any]) -> bool:
         """Add content to editorial queue"""
         try:
-            queue_item = {
-                'id': f"{content['source_url']}_{datetime.utcnow().isoformat()}",
-                'location': content['location'],
-                'content': content,
-                'status': 'pending',
-                'created_at': datetime.utcnow().isoformat(),
-                'priority': content.get('priority', 'normal')
-            }
+            queue_item = self._build_queue_item(content)
 
             self.queue_container.create_item(queue_item)
             logging.info(f"Added item to editorial queue: {queue_item['id']}")
@@ -177,38 +276,402 @@ class ContentStorageClient:
             logging.error(f"Failed to add to editorial queue: {str(e)}")
             return False
 
-    def get_editorial_queue(self, location: str, status: str = 'pending') -> List[Dict[str, Any]]:
-        """Get editorial queue items for a location"""
+    @track_method
+    def add_items_to_editorial_queue(self, contents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Add many content items to the editorial queue using transactional batches per location
+        Items are only created: one already queued under the same id counts as added and keeps its review status
+        """
+        outcomes = {}
+        by_location = {}
+        for content in contents:
+            queue_item = self._build_queue_item(content, item_id=content.get('queue_item_id'))
+            by_location.setdefault(queue_item['location'], []).append(queue_item)
+
+        for location, queue_items in by_location.items():
+            # Transactional batches are limited to 100 operations within one partition
+            for start in range(0, len(queue_items), 100):
+                chunk = queue_items[start:start + 100]
+                try:
+                    self.queue_container.execute_item_batch(
+                        batch_operations=[("create", (item,)) for item in chunk],
+                        partition_key=location
+                    )
+                    for item in chunk:
+                        outcomes[item['id']] = True
+                except AzureError as e:
+                    # A batch is all-or-nothing, so one already queued item fails the chunk; create items individually
+                    logging.warning(f"Batch queue insert failed for {location}, creating items individually: {str(e)}")
+                    for item in chunk:
+                        outcomes[item['id']] = self._create_queue_item(item)
+
+        logging.info(f"Added {sum(outcomes.values())}/{len(outcomes)} items to editorial queue")
+        return outcomes
+
+    def _create_queue_item(self, queue_item: Dict[str, Any]) -> bool:
+        """Create one queue item; an existing item with the same id is left as it is"""
         try:
-            query = "SELECT * FROM c WHERE c.location = @location AND c.status = @status ORDER BY c.created_at DESC"
-            parameters = [
-                {"name": "@location", "value": location},
-                {"name": "@status", "value": status}
-            ]
+            self.queue_container.create_item(queue_item)
+            return True
+        except CosmosResourceExistsError:
+            logging.info(f"Queue item {queue_item['id']} already exists, keeping its status")
+            return True
+        except AzureError as e:
+            logging.error(f"Failed to add to editorial queue: {str(e)}")
+            return False
 
-            return list(self.queue_container.query_items(
+    @track_method
+    def iter_editorial_queue(self, location: str, status: str = 'pending',
+                             page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Lazily stream editorial queue items page by page"""
+        query, parameters = self._editorial_queue_query(location, status)
+        try:
+            yield from self.queue_container.query_items(
                 query=query,
                 parameters=parameters,
-                partition_key=location
-            ))
+                partition_key=location,
+                max_item_count=page_size
+            )
         except AzureError as e:
             logging.error(f"Failed to get editorial queue: {str(e)}")
-            return []
 
-    def update_queue_item_status(self, item_id: str, location: str, status: str,
-                                editor_notes: Optional[str] = None) -> bool:
-        """Update editorial queue item status"""
+    @track_method
+    def get_editorial_queue_page(self, location: str, status: str = 'pending', limit: int = 50,
+                                 continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of editorial queue items and the continuation token for the next page"""
+        query, parameters = self._editorial_queue_query(location, status)
+        try:
+            pager = self.queue_container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=location,
+                max_item_count=limit
+            ).by_page(continuation_token)
+            return _first_page(pager)
+        except AzureError as e:
+            logging.error(f"Failed to get editorial queue page: {str(e)}")
+            return [], None
+
+    def _editorial_queue_query(self, location: str, status: str) -> Tuple[str, List[Dict[str, Any]]]:
+        query = "SELECT * FROM c WHERE c.location = @location AND c.status = @status ORDER BY c.created_at DESC"
+        parameters = [
+            {"name": "@location", "value": location},
+            {"name": "@status", "value": status}
+        ]
+        return query, parameters
+
+    @track_method
+    def get_review_queue(self, location: str, status: str = 'pending', limit: int = 50,
+                         continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get the next queue items to review, most important first, with a continuation token"""
+        # Ordering on status too lets the (status, review_score) composite index serve the query
+        query = ("SELECT * FROM c WHERE c.location = @location AND c.status = @status "
+                 "ORDER BY c.status ASC, c.review_score DESC")
+        parameters = [
+            {"name": "@location", "value": location},
+            {"name": "@status", "value": status}
+        ]
+        try:
+            pager = self.queue_container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=location,
+                max_item_count=limit
+            ).by_page(continuation_token)
+            return _first_page(pager)
+        except AzureError as e:
+            logging.error(f"Failed to get review queue: {str(e)}")
+            return [], None
+
+    @track_method
+    def get_editorial_queue_stats(self, location: str) -> Dict[str, int]:
+        """Count editorial queue items per status for a location with one grouped query"""
         try:
-            item = self.queue_container.read_item(item=item_id, partition_key=location)
-            item['status'] = status
-            item['updated_at'] = datetime.utcnow().isoformat()
+            query = "SELECT c.status, COUNT(1) AS count FROM c WHERE c.location = @location GROUP BY c.status"
+            parameters = [{"name": "@location", "value": location}]
 
-            if editor_notes:
-                item['editor_notes'] = editor_notes
+            counts = {}
+            for row in self.queue_container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=location
+            ):
+                counts[row['status']] = row['count']
+            return counts
+        except AzureError as e:
+            logging.error(f"Failed to get editorial queue stats: {str(e)}")
+            return {}
 
-            self.queue_container.replace_item(item=item_id, body=item)
+    @track_method
+    def update_queue_item_status(self, item_id: str, location: str, status: str,
+                                editor_notes: Optional[str] = None) -> bool:
+        """Update editorial queue item status with a partial-document patch"""
+        try:
+            self.queue_container.patch_item(
+                item=item_id,
+                partition_key=location,
+                patch_operations=self._status_patch(status, editor_notes)
+            )
             logging.info(f"Updated queue item {item_id} status to {status}")
             return True
         except AzureError as e:
             logging.error(f"Failed to update queue item status: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    @track_method
+    def update_queue_items_status(self, location: str, updates: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Apply status changes to many queue items in one location
+        Each update is {'item_id', 'status', 'editor_notes'?}; patches are sent as transactional batches
+        """
+        outcomes = {}
+
+        # Transactional batches are limited to 100 operations within one partition
+        for start in range(0, len(updates), 100):
+            chunk = updates[start:start + 100]
+            operations = [
+                ("patch", (update['item_id'], self._status_patch(update['status'], update.get('editor_notes'))))
+                for update in chunk
+            ]
+            try:
+                self.queue_container.execute_item_batch(batch_operations=operations, partition_key=location)
+                for update in chunk:
+                    outcomes[update['item_id']] = True
+            except AzureError as e:
+                # A batch is all-or-nothing, so one missing item fails the chunk; retry items individually
+                logging.warning(f"Batch status update failed for {location}, patching items individually: {str(e)}")
+                for update in chunk:
+                    outcomes[update['item_id']] = self.update_queue_item_status(
+                        update['item_id'], location, update['status'], update.get('editor_notes')
+                    )
+
+        logging.info(f"Updated {sum(outcomes.values())}/{len(outcomes)} queue items in {location}")
+        return outcomes
+
+    def _status_patch(self, status: str, editor_notes: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Patch operations for an editorial status change"""
+        operations = [
+            {"op": "set", "path": "/status", "value": status},
+            {"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}
+        ]
+        if editor_notes:
+            operations.append({"op": "set", "path": "/editor_notes", "value": editor_notes})
+        return operations
+
+    @track_method
+    def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user profile, or None if it does not exist"""
+        try:
+            return self.users_container.read_item(item=user_id, partition_key=user_id)
+        except ResourceNotFoundError:
+            return None
+        except AzureError as e:
+            logging.error(f"Failed to get user profile: {str(e)}")
+            return None
+
+    @track_method
+    def store_user_profile(self, profile: Dict[str, Any]) -> bool:
+        """Create or replace a user profile"""
+        try:
+            profile['id'] = profile['user_id']
+            self.users_container.upsert_item(profile)
+            return True
+        except AzureError as e:
+            logging.error(f"Failed to store user profile: {str(e)}")
+            return False
+
+    @track_method
+    def get_candidate_pool(self, location: str) -> Optional[Dict[str, Any]]:
+        """Get the serialized recommendation candidate pool for a location, or None if not built"""
+        try:
+            return self.pools_container.read_item(item=location, partition_key=location)
+        except ResourceNotFoundError:
+            return None
+        except AzureError as e:
+            logging.error(f"Failed to get candidate pool: {str(e)}")
+            return None
+
+    @track_method
+    def store_candidate_pool(self, location: str, pool: Dict[str, Any]) -> bool:
+        """Create or replace the recommendation candidate pool for a location"""
+        try:
+            self.pools_container.upsert_item({**pool, 'id': location, 'location': location})
+            return True
+        except AzureError as e:
+            logging.error(f"Failed to store candidate pool: {str(e)}")
+            return False
+
+    @track_method
+    def mark_candidate_pools_stale(self, locations: List[str]) -> bool:
+        """Upsert a rebuild marker beside each location's pool; every upsert gives the marker a new etag"""
+        marked_at = datetime.utcnow().isoformat()
+        try:
+            for location in sorted(set(locations)):
+                self.pools_container.upsert_item({
+                    'id': f"stale_{location}",
+                    'location': location,
+                    'type': 'stale_marker',
+                    'marked_at': marked_at
+                })
+            return True
+        except AzureError as e:
+            logging.error(f"Failed to mark candidate pools stale: {str(e)}")
+            return False
+
+    @track_method
+    def get_stale_candidate_pools(self) -> Dict[str, str]:
+        """Locations whose pools need rebuilding, each with its marker's etag"""
+        try:
+            markers = self.pools_container.query_items(
+                query="SELECT c.location, c._etag FROM c WHERE c.type = 'stale_marker'",
+                enable_cross_partition_query=True
+            )
+            return {marker['location']: marker['_etag'] for marker in markers}
+        except AzureError as e:
+            logging.error(f"Failed to get stale candidate pools: {str(e)}")
+            return {}
+
+    @track_method
+    def clear_stale_candidate_pool(self, location: str, marker: str) -> bool:
+        """Delete a location's rebuild marker only if its etag still matches"""
+        try:
+            self.pools_container.delete_item(
+                item=f"stale_{location}",
+                partition_key=location,
+                etag=marker,
+                match_condition=MatchConditions.IfNotModified
+            )
+            return True
+        except ResourceNotFoundError:
+            return True
+        except CosmosAccessConditionFailedError:
+            logging.info(f"Candidate pool for {location} was marked stale again during its rebuild")
+            return False
+        except AzureError as e:
+            logging.error(f"Failed to clear stale candidate pool marker: {str(e)}")
+            return False
+
+    @track_method
+    def get_user_feed(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's materialized recommendation feed, or None if not cached"""
+        try:
+            return self.feeds_container.read_item(item=user_id, partition_key=user_id)
+        except ResourceNotFoundError:
+            return None
+        except AzureError as e:
+            logging.error(f"Failed to get user feed: {str(e)}")
+            return None
+
+    @track_method
+    def store_user_feed(self, user_id: str, feed: Dict[str, Any]) -> bool:
+        """Create or replace a user's materialized recommendation feed"""
+        try:
+            self.feeds_container.upsert_item({**feed, 'id': user_id, 'user_id': user_id})
+            return True
+        except AzureError as e:
+            logging.error(f"Failed to store user feed: {str(e)}")
+            return False
+
+    @track_method
+    def iter_content_engagement(self, updated_since: Optional[str] = None,
+                                page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Lazily stream per-content engagement records, optionally only those updated since a time"""
+        query, parameters = "SELECT * FROM c", []
+        if updated_since:
+            query = "SELECT * FROM c WHERE c.updated_at >= @since"
+            parameters = [{"name": "@since", "value": updated_since}]
+        try:
+            yield from self.engagement_container.query_items(
+                query=query,
+                parameters=parameters,
+                enable_cross_partition_query=True,
+                max_item_count=page_size
+            )
+        except AzureError as e:
+            logging.error(f"Failed to get content engagement: {str(e)}")
+
+    @track_method
+    def get_content_engagement(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """Get the engagement record for one content item, or None if it has none"""
+        try:
+            return self.engagement_container.read_item(item=content_id, partition_key=content_id)
+        except ResourceNotFoundError:
+            return None
+        except AzureError as e:
+            logging.error(f"Failed to get content engagement: {str(e)}")
+            return None
+
+    @track_method
+    def get_content_engagement_many(self, content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Engagement records for many content items in chunked cross-partition queries, keyed by content id"""
+        records = {}
+        content_ids = list(dict.fromkeys(content_ids))
+        try:
+            for start in range(0, len(content_ids), ENGAGEMENT_LOOKUP_CHUNK):
+                chunk = content_ids[start:start + ENGAGEMENT_LOOKUP_CHUNK]
+                for record in self.engagement_container.query_items(
+                    query="SELECT c.content_id, c.level, c.levels FROM c WHERE ARRAY_CONTAINS(@ids, c.content_id)",
+                    parameters=[{"name": "@ids", "value": chunk}],
+                    enable_cross_partition_query=True
+                ):
+                    records[record['content_id']] = record
+        except AzureError as e:
+            logging.error(f"Failed to get content engagement: {str(e)}")
+        return records
+
+    @track_method
+    def store_content_engagement(self, records: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Write many per-content engagement records; returns success per content id
+        A record carrying the `_etag` it was read with replaces the stored one only if it is unchanged since,
+        and a record without one is only created if none exists yet
+        """
+        outcomes = {}
+        for record in records:
+            try:
+                record['id'] = record['content_id']
+                if record.get('_etag'):
+                    self.engagement_container.replace_item(
+                        item=record['id'],
+                        body=record,
+                        etag=record['_etag'],
+                        match_condition=MatchConditions.IfNotModified
+                    )
+                else:
+                    self.engagement_container.create_item(body=record)
+                outcomes[record['content_id']] = True
+            except (CosmosAccessConditionFailedError, CosmosResourceExistsError):
+                logging.info(f"Engagement for {record.get('content_id')} changed concurrently")
+                outcomes[record['content_id']] = False
+            except AzureError as e:
+                logging.error(f"Failed to store engagement for {record.get('content_id')}: {str(e)}")
+                outcomes[record['content_id']] = False
+        return outcomes
+
+    @track_method
+    def advance_content_level(self, content_id: str, from_level: str, to_level: str, changed_at: str) -> bool:
+        """Move a content item's spread level forward with a partial-document patch, if still at from_level"""
+        try:
+            self.engagement_container.patch_item(
+                item=content_id,
+                partition_key=content_id,
+                patch_operations=[
+                    {"op": "set", "path": "/level", "value": to_level},
+                    {"op": "set", "path": "/level_changed_at", "value": changed_at}
+                ],
+                filter_predicate=f"FROM c WHERE c.level = '{from_level}'"
+            )
+            return True
+        except CosmosAccessConditionFailedError:
+            logging.info(f"Spread level of {content_id} already moved past {from_level}")
+            return False
+        except AzureError as e:
+            logging.error(f"Failed to advance spread level for {content_id}: {str(e)}")
+            return False
+
+
+def _first_page(pager) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Read a single page from a Cosmos pager along with its continuation token"""
+    page = next(pager, None)
+    items = list(page) if page is not None else []
+    return items, pager.continuation_token
@@ -5,14 +5,30 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 from azure.search.documents import SearchClient
+from azure.search.documents.models import VectorizedQuery
 from azure.core.credentials import AzureKeyCredential
 from azure.identity import ManagedIdentityCredential
-from azure.core.exceptions import AzureError
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+
+from .bulk_indexer import BulkIndexer
+from .local_vector_index import LocalVectorIndex
+from .embeddings import EmbeddingPipeline, get_embedding_pipeline
+from .query_cache import QueryResultCache, get_query_cache
+from .ranking import hybrid_rank, encode_continuation, decode_continuation
+
+# Process-wide local index, shared across invocations on a warm worker
+_local_index: Optional[LocalVectorIndex] = None
 
 class VectorSearchClient:
     """Client for Azure AI Search vector operations"""
 
-    def __init__(self, index_name: str = "community-content"):
+    def __init__(self, index_name: str = "community-content",
+                 local_index: Optional[LocalVectorIndex] = None,
+                 embedding_pipeline: Optional[EmbeddingPipeline] = None,
+                 query_cache: Optional[QueryResultCache] = None):
+        self.local_index = local_index
+        self.embedding_pipeline = embedding_pipeline
+        self.query_cache = query_cache
         self.endpoint = os.environ.get('AZURE_AISEARCH_ENDPOINT')
         self.key = os.environ.get('AZURE_AISEARCH_KEY')
         self.index_name = index_name
@@ -36,22 +52,24 @@ class VectorSearchClient:
             logging.error(f"Failed to initialize search client: {str(e)}")
             raise
 
+        # Per-instance memo of documents read by key; clients are created per invocation
+        self._document_memo: Dict[str, Optional[Dict[str, Any]]] = {}
+
     def search_community_content(self, location: str, query: str,
                                top: int = 5) -> List[Dict[str, Any]]:
         """Search for relevant community content based on location and query"""
-        try:
-            search_text = f"{location} {query}"
+        cache_key = QueryResultCache.make_key('search_community_content', location, query, (top,))
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            return cached
 
-            results = self.client.search(
-                search_text=search_text,
-                top=top,
-                select=["id", "title", "content", "source", "category",
-                       "location", "date", "url"],
-                filter=f"location eq '{location}' or location eq 'regional'",
-                order_by=["date desc"]
-            )
+        cached = self._from_local_index('search_community_content', top, location, location, query)
+        if cached is not None:
+            return cached
 
-            return [dict(result) for result in results]
+        try:
+            results = self.search_hybrid(location, query, top)["results"]
+            return self._remember(cache_key, location, results)
 
         except AzureError as e:
             logging.error(f"Search operation failed: {str(e)}")
@@ -60,6 +78,110 @@ class VectorSearchClient:
             logging.error(f"Unexpected error in search: {str(e)}")
             return []
 
+    def search_hybrid(self, location: str, query: str, top: int = 10,
+                      continuation_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Hybrid retrieval: BM25 and vector rankings fused with reciprocal rank fusion,
+        boosted by location match and recency, paged with a continuation token
+        """
+        offset = decode_continuation(continuation_token, location, query)
+        window = offset + top
+        # Fused ranking needs some headroom beyond the page, not the whole location
+        fetch_k = max(window * 2, 20)
+        location_filter = f"location eq '{location}' or location eq 'regional'"
+        select = ["id", "title", "content", "source", "category", "location", "date", "url"]
+
+        # An embedding service failure degrades to keyword-only ranking rather than failing the search
+        query_vector = None
+        if self.embedding_pipeline and query:
+            try:
+                query_vector = self.embedding_pipeline.embed_texts([query])[0]
+            except Exception as e:
+                logging.warning(f"Query embedding failed, using keyword search only: {str(e)}")
+
+        try:
+            keyword_results = [dict(result) for result in self.client.search(
+                search_text=query or "*",
+                filter=location_filter,
+                top=fetch_k,
+                select=select
+            )]
+
+            vector_results = []
+            if query_vector is not None:
+                vector_results = [dict(result) for result in self.client.search(
+                    search_text=None,
+                    vector_queries=[VectorizedQuery(
+                        vector=query_vector,
+                        k_nearest_neighbors=fetch_k,
+                        fields="content_vector"
+                    )],
+                    filter=location_filter,
+                    top=fetch_k,
+                    select=select
+                )]
+        except AzureError as e:
+            logging.error(f"Hybrid search failed: {str(e)}")
+            return {"results": [], "continuation_token": None}
+
+        documents = {}
+        for result in keyword_results + vector_results:
+            documents.setdefault(result['id'], {key: value for key, value in result.items()
+                                                if not key.startswith('@')})
+
+        ranked = hybrid_rank(documents, [r['id'] for r in keyword_results],
+                             [r['id'] for r in vector_results], location)
+        page = [dict(document, **{'@search.score': score}) for document, score in ranked[offset:window]]
+
+        has_more = (len(ranked) > window or len(keyword_results) >= fetch_k or
+                    len(vector_results) >= fetch_k)
+        return {
+            "results": page,
+            "continuation_token": encode_continuation(window, location, query) if page and has_more else None
+        }
+
+    def get_document(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single document by key, memoized for the lifetime of this client"""
+        if key in self._document_memo:
+            return self._document_memo[key]
+
+        if self.local_index:
+            document = self.local_index.get_document(key)
+            if document:
+                self._document_memo[key] = document
+                return document
+
+        try:
+            document = dict(self.client.get_document(key=key))
+        except ResourceNotFoundError:
+            document = None
+        except AzureError as e:
+            logging.error(f"Document lookup failed for {key}: {str(e)}")
+            return None
+
+        self._document_memo[key] = document
+        return document
+
+    def get_documents(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch many documents by key with one filtered query for keys not yet memoized"""
+        missing = [key for key in dict.fromkeys(keys) if key not in self._document_memo]
+
+        if missing:
+            try:
+                # Document keys may only contain letters, digits, '_', '-' and '=', so ',' is a safe delimiter
+                results = self.client.search(
+                    search_text="*",
+                    filter=f"search.in(id, '{','.join(missing)}', ',')",
+                    top=len(missing)
+                )
+                found = {result['id']: dict(result) for result in results}
+                for key in missing:
+                    self._document_memo[key] = found.get(key)
+            except AzureError as e:
+                logging.error(f"Multi-document lookup failed: {str(e)}")
+
+        return {key: self._document_memo.get(key) for key in keys}
+
     def store_content(self, content_item: Dict[str, Any]) -> bool:
         """Store or update content item in the search index"""
         try:
@@ -69,11 +191,18 @@ class VectorSearchClient:
                 logging.error("Missing required fields for content storage")
                 return False
 
+            if self.embedding_pipeline:
+                content_item = self.embedding_pipeline.embed_documents([content_item])[0]
+
             # Upload or update the document
+            self._document_memo.pop(content_item['id'], None)
             result = self.client.upload_documents([content_item])
 
             if result[0].succeeded:
                 logging.info(f"Successfully stored content: {content_item['id']}")
+                self._invalidate_locations([content_item])
+                if self.local_index:
+                    self.local_index.store_content(content_item)
                 return True
             else:
                 logging.error(f"Failed to store content: {result[0].error_message}")
@@ -86,9 +215,96 @@ class VectorSearchClient:
             logging.error(f"Unexpected error in storage: {str(e)}")
             return False
 
+    def store_contents(self, content_items: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """Store or update many content items in batched uploads; returns success per document id"""
+        required_fields = ['id', 'title', 'content', 'location']
+        outcomes = {}
+        valid_items = []
+
+        for item in content_items:
+            if all(field in item for field in required_fields):
+                valid_items.append(item)
+            else:
+                logging.error(f"Missing required fields for content storage: {item.get('id', 'unknown')}")
+                outcomes[item.get('id', '')] = False
+
+        try:
+            if self.embedding_pipeline and valid_items:
+                valid_items = self.embedding_pipeline.embed_documents(valid_items)
+
+            with self.bulk_indexer() as indexer:
+                for item in valid_items:
+                    self._document_memo.pop(item['id'], None)
+                    indexer.add(item)
+
+            for key, result in indexer.results.items():
+                outcomes[key] = result['succeeded']
+        except Exception as e:
+            logging.error(f"Unexpected error in storage: {str(e)}")
+
+        for item in valid_items:
+            outcomes.setdefault(item['id'], False)
+
+        self._invalidate_locations(valid_items)
+
+        if self.local_index:
+            self.local_index.store_contents([item for item in valid_items if outcomes.get(item['id'])])
+
+        logging.info(f"Stored {sum(outcomes.values())}/{len(outcomes)} content items")
+        return outcomes
+
+    def _from_local_index(self, method: str, top: int, location: str, *args) -> Optional[List[Dict[str, Any]]]:
+        """
+        Serve a query from the local hot index when it can fill the whole page and the location was
+        refreshed from the remote index within the cache TTL, so content indexed elsewhere still shows up
+        """
+        if not self.local_index or not self.local_index.is_synced(location):
+            return None
+
+        results = getattr(self.local_index, method)(*args, top=top)
+        return results if len(results) >= top else None
+
+    def _cached_results(self, cache_key) -> Optional[List[Dict[str, Any]]]:
+        """Look up a query in the result cache, if one is configured"""
+        return self.query_cache.get(cache_key) if self.query_cache else None
+
+    def _remember(self, cache_key, location: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cache remote results and copy them into the local hot index"""
+        if self.query_cache and results:
+            self.query_cache.put(cache_key, results)
+
+        if self.local_index and results:
+            self.local_index.store_contents([
+                {key: value for key, value in result.items() if not key.startswith('@')}
+                for result in results
+            ])
+            self.local_index.mark_synced(location, self.query_cache.ttl_seconds if self.query_cache else 60.0)
+        return results
+
+    def _invalidate_locations(self, content_items: List[Dict[str, Any]]) -> None:
+        """Drop cached query results and local hot-index freshness for every location that was written to"""
+        for location in {item.get('location') for item in content_items}:
+            if self.query_cache:
+                self.query_cache.invalidate_location(location)
+            if self.local_index:
+                self.local_index.invalidate_location(location)
+
+    def bulk_indexer(self, **kwargs) -> BulkIndexer:
+        """Create a buffered bulk indexer writing to this index"""
+        return BulkIndexer(self.client, **kwargs)
+
     def search_by_category(self, category: str, location: str,
                           top: int = 10) -> List[Dict[str, Any]]:
         """Search content by category and location"""
+        cache_key = QueryResultCache.make_key('search_by_category', location, '', (category, top))
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            return cached
+
+        cached = self._from_local_index('search_by_category', top, location, category, location)
+        if cached is not None:
+            return cached
+
         try:
             results = self.client.search(
                 search_text="*",
@@ -99,7 +315,7 @@ class VectorSearchClient:
                 order_by=["date desc"]
             )
 
-            return [dict(result) for result in results]
+            return self._remember(cache_key, location, [dict(result) for result in results])
 
         except AzureError as e:
             logging.error(f"Category search failed: {str(e)}")
@@ -108,6 +324,15 @@ class VectorSearchClient:
     def get_recent_content(self, location: str, hours: int = 24,
                           top: int = 20) -> List[Dict[str, Any]]:
         """Get recent content for a location within specified hours"""
+        cache_key = QueryResultCache.make_key('get_recent_content', location, '', (hours, top))
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            return cached
+
+        cached = self._from_local_index('get_recent_content', top, location, location, hours)
+        if cached is not None:
+            return cached
+
         try:
             from datetime import datetime, timedelta
             cutoff_date = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
@@ -121,8 +346,37 @@ class VectorSearchClient:
                 order_by=["date desc"]
             )
 
-            return [dict(result) for result in results]
+            return self._remember(cache_key, location, [dict(result) for result in results])
 
         except AzureError as e:
             logging.error(f"Recent content search failed: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+
+def get_local_index() -> LocalVectorIndex:
+    """Get the process-wide local vector index (LOCAL_VECTOR_INDEX_PATH persists it to disk)"""
+    global _local_index
+    if _local_index is None:
+        pipeline = get_embedding_pipeline()
+        _local_index = LocalVectorIndex(
+            path=os.environ.get('LOCAL_VECTOR_INDEX_PATH'),
+            dimensions=pipeline.dimensions if pipeline else 256,
+            quantization=os.environ.get('LOCAL_VECTOR_QUANTIZATION', 'float32'),
+            embed_fn=pipeline.embed_texts if pipeline else None
+        )
+    return _local_index
+
+
+def create_vector_client(index_name: str = "community-content"):
+    """
+    Create the configured vector store client
+    VECTOR_BACKEND=local uses the in-process index offline; otherwise Azure AI Search,
+    fronted by the local index as a hot cache when LOCAL_VECTOR_INDEX_PATH is set
+    """
+    if os.environ.get('VECTOR_BACKEND', 'azure').lower() == 'local':
+        return get_local_index()
+
+    local_index = get_local_index() if os.environ.get('LOCAL_VECTOR_INDEX_PATH') else None
+    return VectorSearchClient(index_name=index_name, local_index=local_index,
+                              embedding_pipeline=get_embedding_pipeline(),
+                              query_cache=get_query_cache())
@@ -0,0 +1,69 @@
+"""
+Viral spread thresholds and vectorized batch evaluation
+Content moves outward Local -> Local+ -> Regional -> Provincial -> Federal once enough of the
+current level's audience engages with it
+"""
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+SPREAD_LEVELS = ['Local', 'Local+', 'Regional', 'Provincial', 'Federal']
+
+# Share of the current level's audience that must engage before content spreads further
+SPREAD_THRESHOLDS = {
+    'Local': 0.25,
+    'Local+': 0.20,
+    'Regional': 0.15,
+    'Provincial': 0.10,
+    'Federal': 0.05
+}
+
+_THRESHOLDS = np.array([SPREAD_THRESHOLDS[level] for level in SPREAD_LEVELS], dtype=np.float64)
+_LEVEL_CODES = {level: code for code, level in enumerate(SPREAD_LEVELS)}
+
+
+def next_level(level: str) -> Optional[str]:
+    """Level content spreads to from `level`; None at the top or for unknown levels"""
+    code = _LEVEL_CODES.get(level)
+    if code is None or code + 1 >= len(SPREAD_LEVELS):
+        return None
+    return SPREAD_LEVELS[code + 1]
+
+
+def evaluate_spread(level_codes: np.ndarray, engaged: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Which items spread: engagement rate at the current level meets its threshold and a next level exists"""
+    level_codes = np.asarray(level_codes, dtype=np.int64)
+    engaged = np.asarray(engaged, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+
+    known = (level_codes >= 0) & (level_codes < len(SPREAD_LEVELS))
+    thresholds = _THRESHOLDS[np.where(known, level_codes, 0)]
+    rates = np.divide(engaged, total, out=np.zeros_like(engaged), where=total > 0)
+
+    return known & (total > 0) & (rates >= thresholds) & (level_codes < len(SPREAD_LEVELS) - 1)
+
+
+def level_columns(records: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Level code, engaged and total users at each record's current level, as arrays"""
+    count = len(records)
+    level_codes = np.full(count, -1, dtype=np.int64)
+    engaged = np.zeros(count, dtype=np.float64)
+    total = np.zeros(count, dtype=np.float64)
+
+    for row, record in enumerate(records):
+        level = record.get('level', 'Local')
+        stats = (record.get('levels') or {}).get(level) or {}
+        level_codes[row] = _LEVEL_CODES.get(level, -1)
+        engaged[row] = stats.get('engaged_users', 0)
+        total[row] = stats.get('total_users', 0)
+
+    return level_codes, engaged, total
+
+
+def select_spreading(records: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    """Records that should spread now, paired with the level they spread to"""
+    if not records:
+        return []
+    level_codes, engaged, total = level_columns(records)
+    spreading = np.flatnonzero(evaluate_spread(level_codes, engaged, total))
+    return [(records[row], SPREAD_LEVELS[level_codes[row] + 1]) for row in spreading]
@@ -0,0 +1,52 @@
+import azure.functions as func
+import json
+import logging
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add the function_app directory to the path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.cosmos_metrics import get_cosmos_metrics
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Storage Metrics Function
+    GET /api/storage_metrics - Cosmos DB request charge and latency histograms per storage method
+    Optional: ?method=<substring> to filter, ?reset=true to start a new measurement window
+
+    Metrics are kept per worker process, so each instance reports its own traffic
+    """
+
+    logging.info('Storage metrics function processed a request.')
+
+    try:
+        metrics = get_cosmos_metrics()
+        snapshot = metrics.snapshot()
+
+        method_filter = req.params.get('method')
+        if method_filter:
+            snapshot['methods'] = {
+                key: value for key, value in snapshot['methods'].items() if method_filter in key
+            }
+
+        if req.params.get('reset', 'false').lower() == 'true':
+            metrics.reset()
+
+        snapshot['since'] = datetime.fromtimestamp(snapshot['since'], timezone.utc).isoformat()
+        snapshot['timestamp'] = datetime.now(timezone.utc).isoformat()
+
+        return func.HttpResponse(
+            json.dumps(snapshot),
+            status_code=200,
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logging.error(f"Storage metrics function failed: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Failed to export storage metrics"}),
+            status_code=500,
+            mimetype="application/json"
+        )
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.bloom import BloomFilter, SeenFilter, key_hashes
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    keys = [f"content-{i}" for i in range(5000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert bloom.contains_many(keys).all()
+    assert bloom.contains_hashes(*key_hashes(keys)).all()
+
+
+def test_seen_filter_has_no_false_negatives_across_generations():
+    seen = SeenFilter(capacity=1000, error_rate=0.01)
+    keys = [f"content-{i}" for i in range(1500)]
+    for key in keys:
+        seen.add(key)
+
+    # The current and previous generations together still cover everything since the last rotation
+    recent = keys[1000:]
+    restored = SeenFilter.from_dict(seen.to_dict())
+    assert restored.contains_many(recent).all()
+    assert restored.contains_hashes(*key_hashes(recent)).all()
@@ -2,21 +2,32 @@ import azure.functions as func
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import sys
 import os
 
 # Add the function_app directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Demo mode - in-memory storage for user profiles
+from shared.storage_backend import get_storage_client, storage_configured
+from shared.engagement import EngagementAggregates
+from shared.interaction_log import InteractionLog, KNOWN_ACTIONS
+from shared.bloom import SeenFilter
+from shared.recommendations import get_recommendation_engine, recommendations_configured
+from shared.feed_cache import get_feed_cache, etag_matches
+from shared.engagement_aggregator import get_engagement_aggregator
+
+# Upper bound on interactions accepted in one batch request
+MAX_BATCH_INTERACTIONS = 1000
+
+# Demo mode - in-memory storage for user profiles when no storage backend is configured
 DEMO_USER_PROFILES = {}
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     User Profile and Personalization Function
-    GET /api/user_profile/{user_id} - Get user profile and preferences
-    POST /api/user_profile - Create new user profile
+    GET /api/user_profile/{user_id} - Get user profile and preferences (honours If-None-Match)
+    POST /api/user_profile - Create new user profile, or batch-ingest {"interactions": [...]}
     PUT /api/user_profile/{user_id} - Update user profile or record interaction
     """
 
@@ -64,22 +75,43 @@ def handle_get_profile(req: func.HttpRequest, user_id: str) -> func.HttpResponse
             # Create a default profile for demo users
             profile = create_demo_profile(user_id)
 
+        headers = {
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, POST, PUT, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, If-None-Match",
+            "Access-Control-Expose-Headers": "ETag"
+        }
+
         # Get personalized content recommendations
         include_recommendations = req.params.get('include_recommendations', 'true').lower() == 'true'
 
         if include_recommendations:
-            recommendations = get_personalized_recommendations(profile)
+            try:
+                top_k = int(req.params.get('limit', 10))
+            except ValueError:
+                top_k = 0
+            if top_k < 1:
+                return func.HttpResponse(
+                    json.dumps({"error": "limit must be a positive integer"}),
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            top_k = min(top_k, 50)
+            recommendations, etag = get_personalized_feed(profile, top_k)
             profile['recommendations'] = recommendations
 
+            if etag:
+                headers["ETag"] = etag
+                headers["Cache-Control"] = "private, no-cache"
+                # Nothing changed since the app last fetched this feed
+                if etag_matches(req.headers.get('If-None-Match'), etag):
+                    return func.HttpResponse(status_code=304, headers=headers)
+
         return func.HttpResponse(
-            json.dumps(profile),
+            json.dumps(public_profile(profile)),
             status_code=200,
             mimetype="application/json",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            }
+            headers=headers
         )
 
     except Exception as e:
@@ -101,6 +133,9 @@ def handle_create_profile(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json"
             )
 
+        if 'interactions' in req_body:
+            return handle_batch_interactions(req_body['interactions'])
+
         # Validate required fields
         required_fields = ['user_id', 'primary_location']
         missing_fields = [field for field in required_fields if field not in req_body]
@@ -141,7 +176,7 @@ def handle_create_profile(req: func.HttpRequest) -> func.HttpResponse:
                 'preferred_time_slots': req_body.get('preferred_time_slots', ['morning', 'evening']),
                 'content_length': req_body.get('content_length', 'medium')
             },
-            'interaction_history': [],
+            'engagement': EngagementAggregates().to_dict(),
             'engagement_score': 0.0,
             'created_at': datetime.now(timezone.utc).isoformat(),
             'updated_at': datetime.now(timezone.utc).isoformat()
@@ -193,40 +228,24 @@ def handle_update_profile(req: func.HttpRequest, user_id: str) -> func.HttpRespo
                 mimetype="application/json"
             )
 
+        update_type = req_body.get('update_type', 'profile')
+        if update_type == 'interaction' and req_body.get('action') and req_body['action'] not in KNOWN_ACTIONS:
+            return func.HttpResponse(
+                json.dumps({"error": f"action must be one of {', '.join(KNOWN_ACTIONS)}"}),
+                status_code=400,
+                mimetype="application/json"
+            )
+
         # Get existing profile
         profile = get_user_profile(user_id)
         if not profile:
             # Create a default profile for demo users
             profile = create_demo_profile(user_id)
 
-        update_type = req_body.get('update_type', 'profile')
-
         if update_type == 'interaction':
             # Record user interaction for personalization
-            interaction = {
-                'content_id': req_body.get('content_id'),
-                'action': req_body.get('action'),  # 'view', 'save', 'share', 'like', 'dismiss'
-                'category': req_body.get('category'),
-                'location': req_body.get('location'),
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'engagement_time': req_body.get('engagement_time', 0)
-            }
-
-            # Add interaction to history
-            if 'interaction_history' not in profile:
-                profile['interaction_history'] = []
-
-            profile['interaction_history'].append(interaction)
-
-            # Limit history size (keep last 1000 interactions)
-            if len(profile['interaction_history']) > 1000:
-                profile['interaction_history'] = profile['interaction_history'][-1000:]
-
-            # Update engagement score based on interaction
-            profile['engagement_score'] = calculate_engagement_score(profile['interaction_history'])
-
-            # Update interests based on interactions
-            profile['interests'] = update_interests_from_interactions(profile['interaction_history'])
+            interaction = build_interaction(req_body)
+            apply_interactions(profile, [interaction])
 
         else:
             # Update profile settings
@@ -245,6 +264,9 @@ def handle_update_profile(req: func.HttpRequest, user_id: str) -> func.HttpRespo
         success = store_user_profile(profile)
 
         if success:
+            if update_type == 'interaction':
+                record_content_engagement([(user_id, interaction)])
+
             return func.HttpResponse(
                 json.dumps({
                     "message": "User profile updated successfully",
@@ -270,12 +292,136 @@ def handle_update_profile(req: func.HttpRequest, user_id: str) -> func.HttpRespo
             mimetype="application/json"
         )
 
+def handle_batch_interactions(interactions: List[Dict[str, Any]]) -> func.HttpResponse:
+    """Apply many interactions for many users with one profile load and store per user"""
+    if not isinstance(interactions, list) or not interactions:
+        return func.HttpResponse(
+            json.dumps({"error": "interactions must be a non-empty list"}),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    if len(interactions) > MAX_BATCH_INTERACTIONS:
+        return func.HttpResponse(
+            json.dumps({"error": f"At most {MAX_BATCH_INTERACTIONS} interactions per request"}),
+            status_code=413,
+            mimetype="application/json"
+        )
+
+    results: List[Dict[str, Any]] = [None] * len(interactions)
+    by_user: Dict[str, List[int]] = {}
+
+    for index, item in enumerate(interactions):
+        if not isinstance(item, dict) or not item.get('user_id') or not item.get('action'):
+            results[index] = {"index": index, "status": "invalid", "error": "user_id and action are required"}
+            continue
+        if item['action'] not in KNOWN_ACTIONS:
+            results[index] = {"index": index, "status": "invalid",
+                              "error": f"action must be one of {', '.join(KNOWN_ACTIONS)}"}
+            continue
+        by_user.setdefault(item['user_id'], []).append(index)
+
+    applied_events = []
+    for user_id, indexes in by_user.items():
+        try:
+            profile = get_user_profile(user_id) or build_demo_profile(user_id)
+            user_interactions = [build_interaction(interactions[index]) for index in indexes]
+            apply_interactions(profile, user_interactions)
+            profile['updated_at'] = datetime.now(timezone.utc).isoformat()
+            success = store_user_profile(profile)
+        except Exception as e:
+            logging.error(f"Failed to apply interactions for {user_id}: {str(e)}")
+            success = False
+
+        if success:
+            applied_events.extend((user_id, interaction) for interaction in user_interactions)
+
+        for index in indexes:
+            results[index] = {
+                "index": index,
+                "user_id": user_id,
+                "status": "applied" if success else "failed"
+            }
+
+    record_content_engagement(applied_events)
+
+    applied = sum(1 for result in results if result["status"] == "applied")
+
+    return func.HttpResponse(
+        json.dumps({
+            "message": f"Applied {applied} of {len(interactions)} interactions",
+            "users_updated": sum(1 for indexes in by_user.values() if results[indexes[0]]["status"] == "applied"),
+            "results": results
+        }),
+        status_code=200 if applied == len(interactions) else 207,
+        mimetype="application/json"
+    )
+
+def build_interaction(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize an interaction from a request body"""
+    return {
+        'content_id': item.get('content_id'),
+        'original_content_id': item.get('original_content_id'),  # Set on distributed copies
+        'level': item.get('level'),  # Spread level the content was shown at
+        'action': item.get('action'),  # 'view', 'save', 'share', 'like', 'dismiss'
+        'category': item.get('category'),
+        'location': item.get('location'),
+        'timestamp': item.get('timestamp') or datetime.now(timezone.utc).isoformat(),
+        'engagement_time': item.get('engagement_time', 0)
+    }
+
+def apply_interactions(profile: Dict[str, Any], interactions: List[Dict[str, Any]]) -> None:
+    """Fold interactions into a profile's engagement aggregates and interaction log"""
+    # Decayed running aggregates (legacy history is replayed once)
+    engagement = EngagementAggregates.from_profile(profile)
+
+    # Keep the raw history in the compact columnar log instead of a list of dicts
+    interaction_log = InteractionLog.from_profile(profile)
+
+    # Seen and dismissed content is filtered out of recommendations
+    seen = SeenFilter.from_dict(profile.get('seen_filter'))
+
+    for interaction in interactions:
+        engagement.record(interaction)
+        interaction_log.append(interaction)
+        if interaction.get('content_id'):
+            seen.add(interaction['content_id'])
+
+    engagement.prune()
+    profile['engagement'] = engagement.to_dict()
+    profile.pop('interaction_history', None)
+    profile['interaction_log'] = interaction_log.to_dict()
+    profile['seen_filter'] = seen.to_dict()
+
+    # Update engagement score and interests from the aggregates
+    profile['engagement_score'] = engagement.score()
+    profile['interests'] = engagement.top_interests()
+
+def record_content_engagement(events: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Feed (user_id, interaction) events to the engagement aggregator used for viral spread (written behind)"""
+    if not events:
+        return
+    try:
+        get_engagement_aggregator().record_many(events)
+    except Exception as e:
+        # Engagement aggregation must never fail the profile update
+        logging.error(f"Failed to record content engagement: {str(e)}")
+
+def public_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile as returned to the app, without internal encoded state"""
+    return {key: value for key, value in profile.items() if key not in ('seen_filter', 'interaction_log')}
+
 def get_user_profile(user_id: str) -> Dict[str, Any]:
-    """Get user profile from demo storage"""
+    """Get user profile from the storage backend, or demo storage when none is configured"""
+    if storage_configured():
+        return get_storage_client().get_user_profile(user_id)
     return DEMO_USER_PROFILES.get(user_id)
 
 def store_user_profile(profile: Dict[str, Any]) -> bool:
-    """Store user profile to demo storage"""
+    """Store user profile to the storage backend, or demo storage when none is configured"""
+    if storage_configured():
+        return get_storage_client().store_user_profile(profile)
+
     try:
         user_id = profile['user_id']
         DEMO_USER_PROFILES[user_id] = profile
@@ -285,8 +431,14 @@ def store_user_profile(profile: Dict[str, Any]) -> bool:
         return False
 
 def create_demo_profile(user_id: str) -> Dict[str, Any]:
-    """Create a default demo profile"""
-    profile = {
+    """Create and store a default demo profile"""
+    profile = build_demo_profile(user_id)
+    store_user_profile(profile)
+    return profile
+
+def build_demo_profile(user_id: str) -> Dict[str, Any]:
+    """Build a default demo profile without storing it"""
+    return {
         'id': user_id,
         'user_id': user_id,
         'primary_location': 'Bellevue, WA',
@@ -303,17 +455,24 @@ def create_demo_profile(user_id: str) -> Dict[str, Any]:
             'preferred_time_slots': ['morning', 'evening'],
             'content_length': 'medium'
         },
-        'interaction_history': [],
+        'engagement': EngagementAggregates().to_dict(),
         'engagement_score': 0.0,
         'created_at': datetime.now(timezone.utc).isoformat(),
         'updated_at': datetime.now(timezone.utc).isoformat()
     }
-    store_user_profile(profile)
-    return profile
 
-def get_personalized_recommendations(profile: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Get demo personalized content recommendations for user"""
-    # Demo recommendations
+def get_personalized_feed(profile: Dict[str, Any], top_k: int = 10) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Recommendations served from the user's materialized feed, with an ETag when cacheable"""
+    if recommendations_configured():
+        return get_feed_cache().feed(profile, get_recommendation_engine(), top_k)
+    return get_personalized_recommendations(profile, top_k), None
+
+def get_personalized_recommendations(profile: Dict[str, Any], top_k: int = 10) -> List[Dict[str, Any]]:
+    """Get personalized content recommendations for user"""
+    if recommendations_configured():
+        return get_recommendation_engine().recommend(profile, top_k)
+
+    # Demo recommendations when no vector backend is configured
     recommendations = [
         {
             'id': 'demo-rec-1',
@@ -331,58 +490,3 @@ def get_personalized_recommendations(profile: Dict[str, Any]) -> List[Dict[str,
         }
     ]
     return recommendations
-
-def calculate_engagement_score(interactions: List[Dict[str, Any]]) -> float:
-    """Calculate user engagement score based on interaction history"""
-    if not interactions:
-        return 0.0
-
-    # Weight different actions
-    action_weights = {
-        'view': 1.0,
-        'save': 3.0,
-        'share': 4.0,
-        'like': 2.0,
-        'dismiss': -1.0
-    }
-
-    total_score = 0.0
-    total_interactions = 0
-
-    for interaction in interactions[-100:]:  # Consider last 100 interactions
-        action = interaction.get('action', 'view')
-        weight = action_weights.get(action, 1.0)
-        engagement_time = interaction.get('engagement_time', 0)
-
-        # Factor in engagement time
-        time_multiplier = min(engagement_time / 30.0, 2.0)  # Cap at 2x for 30+ seconds
-
-        score = weight * (1 + time_multiplier)
-        total_score += score
-        total_interactions += 1
-
-    return total_score / max(total_interactions, 1)
-
-def update_interests_from_interactions(interactions: List[Dict[str, Any]]) -> List[str]:
-    """Update user interests based on interaction patterns"""
-    category_scores = {}
-
-    for interaction in interactions[-50:]:  # Consider last 50 interactions
-        category = interaction.get('category')
-        action = interaction.get('action', 'view')
-
-        if category:
-            if category not in category_scores:
-                category_scores[category] = 0
-
-            # Weight positive interactions more
-            if action in ['save', 'share', 'like']:
-                category_scores[category] += 2
-            elif action == 'view':
-                category_scores[category] += 1
-            elif action == 'dismiss':
-                category_scores[category] -= 1
-
-    # Return top categories as interests
-    sorted_categories = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)
-    return [category for category, score in sorted_categories[:5] if score > 0]
\ No newline at end of file